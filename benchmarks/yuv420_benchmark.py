@@ -0,0 +1,81 @@
+"""
+Per-frame cost of the yuv420p image helpers at 720p and 1080p.
+
+Compares the PIL based path used by the vision plugins (convert to YCbCr, crop,
+grayscale in float64) with the planar helpers in realtime.utils.yuv420 and the
+key frame engines in realtime.utils.key_frames.
+
+Usage:
+    python benchmarks/yuv420_benchmark.py [--iterations N]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+from av import VideoFrame
+
+from realtime.utils.images import convert_yuv420_to_pil, image_hamming_distance
+from realtime.utils.key_frames import KEY_FRAME_ENGINES
+from realtime.utils.yuv420 import (
+    crop_yuv420_planes,
+    downscale_luma,
+    luma_change_ratio,
+    yuv420_planes,
+    yuv420_to_rgb,
+)
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080)}
+
+
+def make_frame(width: int, height: int, seed: int) -> VideoFrame:
+    rng = np.random.default_rng(seed)
+    data = rng.integers(0, 256, size=(height * 3 // 2, width), dtype=np.uint8)
+    return VideoFrame.from_ndarray(data, format="yuv420p")
+
+
+def bottom_left(width: int, height: int):
+    return (0, height // 2, width // 2, height)
+
+
+def run(iterations: int) -> None:
+    print(f"{'case':<40} {'720p':>10} {'1080p':>10}")
+    print("-" * 62)
+    results = {}
+    for name, (width, height) in RESOLUTIONS.items():
+        frame1 = make_frame(width, height, 1)
+        frame2 = make_frame(width, height, 2)
+        box = bottom_left(width, height)
+        pil_prev = convert_yuv420_to_pil(frame1).crop(box)
+        luma_prev = crop_yuv420_planes(yuv420_planes(frame1), box)[0].copy()
+
+        cases = {
+            "pil: convert_yuv420_to_pil": lambda: convert_yuv420_to_pil(frame2),
+            "pil: convert + crop + hamming": lambda: image_hamming_distance(
+                pil_prev, convert_yuv420_to_pil(frame2).crop(box)
+            ),
+            "planar: yuv420_planes": lambda: yuv420_planes(frame2),
+            "planar: crop + luma_change_ratio": lambda: luma_change_ratio(
+                luma_prev, crop_yuv420_planes(yuv420_planes(frame2), box)[0]
+            ),
+            "planar: downscale_luma 32x32": lambda: downscale_luma(yuv420_planes(frame2)[0], (32, 32)),
+            "planar: yuv420_to_rgb (full frame)": lambda: yuv420_to_rgb(yuv420_planes(frame2)),
+            "planar: crop + yuv420_to_rgb": lambda: yuv420_to_rgb(crop_yuv420_planes(yuv420_planes(frame2), box)),
+        }
+        for engine_name, engine_cls in KEY_FRAME_ENGINES.items():
+            engine = engine_cls(min_interval=0.0)
+            cases[f"engine: {engine_name} crop + score"] = lambda engine=engine: engine.is_key_frame(
+                crop_yuv420_planes(yuv420_planes(frame2), box)[0]
+            )
+        for case, fn in cases.items():
+            seconds = min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations
+            results.setdefault(case, {})[name] = seconds
+
+    for case, timings in results.items():
+        print(f"{case:<40} {timings['720p'] * 1e3:>8.3f}ms {timings['1080p'] * 1e3:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    run(parser.parse_args().iterations)
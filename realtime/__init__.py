@@ -21,6 +21,7 @@ sentry_sdk.init(
 try:
     from .app import App  # noqa: F401
     from .data import AudioData, ImageData, TextData  # noqa: F401
+    from .ops.crop import crop  # noqa: F401
     from .ops.map import map  # noqa: F401
     from .ops.merge import merge  # noqa: F401
     from .plugins.azure_tts import AzureTTS  # noqa: F401
@@ -56,6 +57,7 @@ __all__ = [
     "TokenAggregator",
     "map",
     "merge",
+    "crop",
     "AzureTTS",
     "ElevenLabsTTS",
     "FireworksLLM",
@@ -2,21 +2,29 @@ import asyncio
 import logging
 from typing import Any, Callable, Type
 
+from realtime import session
 from realtime._realtime_function import RealtimeFunction
 from realtime.server import RealtimeServer
+from realtime.utils import loop_monitor
 
 
-def App() -> Callable[[Type], Callable[..., "RealtimeApp"]]:
+def App(pool_size: int = 0, pool_idle_timeout: float = 300.0) -> Callable[[Type], Callable[..., "RealtimeApp"]]:
     """
     Decorator factory for creating a RealtimeApp.
 
+    Args:
+        pool_size: The number of sessions built and warmed up ahead of connections.
+        pool_idle_timeout: Seconds a pooled session may wait before it is replaced.
+
     Returns:
         A decorator function that wraps a user-defined class.
     """
 
     def wrapper(user_cls: Type) -> Callable[..., "RealtimeApp"]:
         def construct(*args: Any, **kwargs: Any) -> "RealtimeApp":
-            return RealtimeApp(user_cls=user_cls, *args, **kwargs)
+            app = RealtimeApp(user_cls, *args, **kwargs)
+            app.pool_size, app.pool_idle_timeout = pool_size, pool_idle_timeout
+            return app
 
         return construct
 
@@ -29,6 +37,8 @@ class RealtimeApp:
     """
 
     functions: list = []  # List to store realtime functions (currently unused)
+    pool_size: int = 0
+    pool_idle_timeout: float = 300.0
 
     def __init__(self, user_cls: Type, *args: Any, **kwargs: Any):
         """
@@ -77,6 +87,9 @@ class RealtimeApp:
         rt_functions = RealtimeFunction.get_realtime_functions_from_class(self._user_cls_instance)
         if len(rt_functions) > 1:
             raise RuntimeError("More than one realtime function found in the user class.")
+        # Measure event loop lag and report the callbacks that block it
+        loop_monitor.start(loop)
+        session.configure_pool(self.pool_size, self.pool_idle_timeout)
         try:
             # Run setup
             loop.run_until_complete(self._user_cls_instance.setup())
@@ -93,3 +106,5 @@ class RealtimeApp:
         except Exception as e:
             logging.error(e)
             loop.run_until_complete(RealtimeServer().shutdown())
+        finally:
+            loop_monitor.stop()
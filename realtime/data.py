@@ -2,13 +2,15 @@ import base64
 import fractions
 import io
 import time
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
 
 import numpy as np
 from av import AudioFrame, VideoFrame
 from PIL import Image
 
+from realtime.utils import tracing
 from realtime.utils.clock import Clock
+from realtime.utils.frame_pool import AudioFramePool, VideoFramePool
 
 
 class AudioData:
@@ -28,6 +30,8 @@ class AudioData:
         sample_width: int = 2,
         format: str = "wav",
         relative_start_time: Optional[float] = None,
+        turn_id: Optional[int] = None,
+        duration: Optional[float] = None,
     ):
         """
         Initialize an AudioData object.
@@ -40,6 +44,10 @@ class AudioData:
             format (str): The audio format ('wav' or 'opus'). Defaults to 'wav'.
             relative_start_time (Optional[float]): The relative start time of the audio.
                                                    If None, uses the current playback time.
+            turn_id (Optional[int]): The id of the turn the audio belongs to. If None, a
+                                     stream sets it to the turn of the context putting it.
+            duration (Optional[float]): The duration of the audio in seconds, for encoded
+                                        audio whose duration the size does not give.
 
         Raises:
             ValueError: If the data is not of type bytes or AudioFrame.
@@ -52,6 +60,8 @@ class AudioData:
         self.sample_width: int = sample_width
         self.format: str = format
         self.relative_start_time: float = relative_start_time or Clock.get_playback_time()
+        self.turn_id: Optional[int] = turn_id
+        self.duration: Optional[float] = duration
 
     def get_bytes(self) -> bytes:
         """
@@ -77,6 +87,8 @@ class AudioData:
         Returns:
             float: The duration of the audio in seconds.
         """
+        if self.duration is not None:
+            return self.duration
         audio_bytes = self.get_bytes()
         return len(audio_bytes) / (self.sample_rate * self.channels * self.sample_width)
 
@@ -87,7 +99,9 @@ class AudioData:
         Returns:
             str: The base64 encoded audio data as a string.
         """
-        return base64.b64encode(self.get_bytes()).decode("utf-8")
+        audio_bytes = self.get_bytes()
+        with tracing.span("base64_encode"):
+            return base64.b64encode(audio_bytes).decode("utf-8")
 
     def get_start_seconds(self) -> float:
         """
@@ -107,10 +121,15 @@ class AudioData:
         """
         return int(self.relative_start_time * self.sample_rate)
 
-    def get_frame(self) -> AudioFrame:
+    @tracing.traced("AudioData.get_frame")
+    def get_frame(self, pool: Optional[AudioFramePool] = None) -> AudioFrame:
         """
         Convert the audio data to an AudioFrame.
 
+        Args:
+            pool (Optional[AudioFramePool]): A pool to take the frame from. The caller
+                releases the frame back to the pool once it is done with it.
+
         Returns:
             AudioFrame: The audio data as an AudioFrame object.
 
@@ -121,41 +140,76 @@ class AudioData:
             self.data.pts = self.get_pts()
             return self.data
         elif isinstance(self.data, bytes):
-            if len(self.data) < 2:
-                raise ValueError("AudioData data must be at least 2 bytes")
-            if len(self.data) % 2 != 0:
-                audio_data = self.data[:-1]
-            else:
-                audio_data = self.data
+            return next(self._get_frames(None, pool))
+        else:
+            raise ValueError("AudioData data must be bytes or av.AudioFrame")
 
-            # Convert bytes to numpy array
-            array = np.frombuffer(audio_data, dtype=np.int16).reshape(1, -1)  # mono has 1 channel
+    def get_frames(self, frame_samples: int, pool: Optional[AudioFramePool] = None) -> Iterator[AudioFrame]:
+        """
+        Split the audio data into AudioFrames of at most ``frame_samples`` samples.
 
-            # Set channel layout
-            if self.channels == 2:
-                channel_layout = "stereo"
-            elif self.channels == 1:
-                channel_layout = "mono"
-            else:
-                raise ValueError("AudioData channels must be 1 or 2")
+        Fixed size frames let a pool reuse the same frames for chunks of any length.
 
-            # Set audio format
-            if self.format == "wav":
-                format = "s16"
-            elif self.format == "opus":
-                format = "opus"
-            else:
-                raise ValueError("AudioData format must be wav or opus")
+        Args:
+            frame_samples (int): Maximum number of samples per channel in each frame.
+            pool (Optional[AudioFramePool]): A pool to take the frames from. The caller
+                releases each frame back to the pool once it is done with it.
 
-            # Create AudioFrame from numpy array
-            frame = AudioFrame.from_ndarray(array, format=format, layout=channel_layout)
-            frame.sample_rate = self.sample_rate
-            frame.pts = self.get_pts()
-            frame.time_base = fractions.Fraction(1, self.sample_rate)
-            return frame
+        Yields:
+            AudioFrame: The consecutive frames, with their pts set.
+
+        Raises:
+            ValueError: If the data format is invalid or unsupported.
+        """
+        if isinstance(self.data, AudioFrame):
+            yield self.get_frame()
+        elif isinstance(self.data, bytes):
+            yield from self._get_frames(frame_samples, pool)
         else:
             raise ValueError("AudioData data must be bytes or av.AudioFrame")
 
+    def _get_frames(self, frame_samples: Optional[int], pool: Optional[AudioFramePool]) -> Iterator[AudioFrame]:
+        if len(self.data) < 2:
+            raise ValueError("AudioData data must be at least 2 bytes")
+
+        # Set channel layout
+        if self.channels == 2:
+            channel_layout = "stereo"
+        elif self.channels == 1:
+            channel_layout = "mono"
+        else:
+            raise ValueError("AudioData channels must be 1 or 2")
+
+        # Set audio format
+        if self.format == "wav":
+            format = "s16"
+        elif self.format == "opus":
+            format = "opus"
+        else:
+            raise ValueError("AudioData format must be wav or opus")
+
+        # Convert bytes to numpy array, dropping a trailing partial sample
+        total_samples = len(self.data) // (2 * self.channels)
+        if total_samples == 0:
+            raise ValueError("AudioData data must contain at least one sample")
+        array = np.frombuffer(self.data, dtype=np.int16, count=total_samples * self.channels).reshape(1, -1)
+        frame_samples = frame_samples or total_samples
+
+        pts = self.get_pts()
+        for start in range(0, total_samples, frame_samples):
+            samples = min(frame_samples, total_samples - start)
+            chunk = array[:, start * self.channels : (start + samples) * self.channels]
+            if pool is not None and format == "s16":
+                frame, view = pool.acquire(samples, self.sample_rate, format, channel_layout)
+                view[...] = chunk
+            else:
+                # Create AudioFrame from numpy array
+                frame = AudioFrame.from_ndarray(chunk, format=format, layout=channel_layout)
+                frame.sample_rate = self.sample_rate
+            frame.pts = pts + start
+            frame.time_base = fractions.Fraction(1, self.sample_rate)
+            yield frame
+
 
 class ImageData:
     """
@@ -207,17 +261,32 @@ class ImageData:
         """
         return int(self.relative_start_time * self.frame_rate)
 
-    def get_frame(self) -> VideoFrame:
+    def get_frame(self, pool: Optional[VideoFramePool] = None) -> VideoFrame:
         """
         Convert the image data to a VideoFrame.
 
+        Args:
+            pool (Optional[VideoFramePool]): A pool to take the frame from when the data has
+                to be copied into a new frame. The caller releases the frame back to the pool
+                once it is done with it.
+
         Returns:
             VideoFrame: The image data as a VideoFrame object.
 
         Raises:
             ValueError: If the data format is invalid or unsupported.
         """
-        if isinstance(self.data, bytes):
+        if pool is not None and isinstance(self.data, (bytes, np.ndarray)):
+            if isinstance(self.data, bytes):
+                array = pool.decode_image(self.data, self.format)
+            else:
+                array = self.data
+            image_frame, view = pool.acquire(array.shape[1], array.shape[0], "rgb24")
+            view[...] = array
+            image_frame.pts = self.get_pts()
+            image_frame.time_base = fractions.Fraction(1, self.frame_rate)
+            return image_frame
+        elif isinstance(self.data, bytes):
             pil_image = Image.open(io.BytesIO(self.data), formats=[self.format])
             image_frame = VideoFrame.from_image(pil_image)
             image_frame.pts = self.get_pts()
@@ -255,6 +324,7 @@ class TextData:
         data: Optional[str] = None,
         absolute_time: Optional[float] = None,
         relative_time: Optional[float] = None,
+        turn_id: Optional[int] = None,
     ):
         """
         Initialize a TextData object.
@@ -265,6 +335,8 @@ class TextData:
                                              If None, uses the current time.
             relative_time (Optional[float]): The relative time of the text data.
                                              Defaults to 0.0.
+            turn_id (Optional[int]): The id of the turn the text belongs to. If None, a
+                                     stream sets it to the turn of the context putting it.
 
         Raises:
             ValueError: If the data is not of type str.
@@ -274,3 +346,4 @@ class TextData:
         self.data: Optional[str] = data
         self.absolute_time: float = absolute_time or time.time()
         self.relative_time: float = relative_time or 0.0
+        self.turn_id: Optional[int] = turn_id
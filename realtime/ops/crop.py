@@ -0,0 +1,65 @@
+import asyncio
+from typing import Tuple, Union
+
+from av import VideoFrame
+
+from realtime.data import ImageData
+from realtime.streams import VideoStream
+from realtime.utils import metrics
+from realtime.utils.yuv420 import RegionOfInterest, yuv420_frame, yuv420_planes
+
+
+def crop(input_queue: VideoStream, region: Union[RegionOfInterest, Tuple[float, float, float, float]]) -> VideoStream:
+    """
+    Crop every frame of a video stream to a region of interest.
+
+    The crop is applied to the yuv420p planes, so only the pixels inside the region are
+    copied and downstream consumers convert a smaller frame.
+
+    Args:
+        input_queue (VideoStream): The input stream of ImageData or av.VideoFrame items.
+        region (Union[RegionOfInterest, Tuple[float, float, float, float]]): The region to keep.
+            A tuple of floats in [0, 1] is fractional, a tuple of ints is in pixels.
+
+    Returns:
+        VideoStream: A new stream of cropped ImageData items.
+
+    Raises:
+        ValueError: If the input queue is not a VideoStream.
+    """
+    if not isinstance(input_queue, VideoStream):
+        raise ValueError(f"Invalid input queue type: {type(input_queue)}")
+    region = RegionOfInterest.from_value(region)
+    output_queue = VideoStream()
+
+    async def run() -> None:
+        while True:
+            item = await input_queue.get()
+            if item is None:
+                await output_queue.put(None)
+                continue
+            try:
+                frame = yuv420_frame(region.crop(yuv420_planes(item)))
+            except Exception as e:
+                print(f"Error in crop function: {e}")
+                metrics.dropped_frames.inc(stream="video", reason="crop_error")
+                continue
+            source = item.data if isinstance(item, ImageData) else item
+            if isinstance(source, VideoFrame):
+                frame.pts = source.pts
+                if source.time_base is not None:
+                    frame.time_base = source.time_base
+            if isinstance(item, ImageData):
+                cropped = ImageData(
+                    frame,
+                    width=frame.width,
+                    height=frame.height,
+                    frame_rate=item.frame_rate,
+                    relative_start_time=item.relative_start_time,
+                )
+            else:
+                cropped = ImageData(frame, width=frame.width, height=frame.height)
+            await output_queue.put(cropped)
+
+    asyncio.create_task(run())
+    return output_queue
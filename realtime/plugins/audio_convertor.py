@@ -13,6 +13,7 @@ logger = logging.getLogger(__name__)
 
 class AudioConverter(Plugin):
     def __init__(self, sample_rate=16000, channel_layout="mono", format="s16"):
+        super().__init__()
         self.input_sample_rate = sample_rate
         self.input_channel_layout = channel_layout
         self.input_format = format
@@ -120,7 +120,7 @@ class AzureTTS(Plugin):
         self._viseme_data: Dict[str, List[Dict[str, Union[str, int, float]]]] = {"mouthCues": []}
         self._generating = False
         self._task: Optional[asyncio.Task] = None
-        self.thread_pool_executor = ThreadPoolExecutor(max_workers=1)
+        self.thread_pool_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="azure_tts")
 
         # Set up Azure Speech configuration
         self._speech_config = speechsdk.SpeechConfig(subscription=self._api_key, region=self._azure_speech_region)
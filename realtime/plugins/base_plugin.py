@@ -1,4 +1,17 @@
+from realtime.session import current_session
+
+
 class Plugin:
+    def __init__(self):
+        # A plugin created while a session builds its pipeline is closed with the session
+        session = current_session()
+        if session is not None:
+            session.add_plugin(self)
+
+    async def warmup(self):
+        # Connect and load ahead of the first turn, e.g. while the session waits in a pool
+        pass
+
     async def close(self):
         pass
 
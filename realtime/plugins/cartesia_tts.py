@@ -4,7 +4,7 @@ import json
 import logging
 import os
 import uuid
-from typing import Optional
+from typing import Dict, Optional
 from urllib.parse import urlencode
 
 import websockets
@@ -12,7 +12,7 @@ import websockets
 from realtime.data import AudioData
 from realtime.plugins.base_plugin import Plugin
 from realtime.streams import AudioStream, ByteStream, TextStream
-from realtime.utils import tracing
+from realtime.utils import tracing, turns
 
 
 class CartesiaTTS(Plugin):
@@ -69,7 +69,11 @@ class CartesiaTTS(Plugin):
         self.base_url: str = base_url
         self.cartesia_version: str = cartesia_version
         self._current_context_id: Optional[str] = None
+        # Turn of every Cartesia context, as audio is received by another task than the one sending text
+        self._context_turns: Dict[str, Optional[int]] = {}
         self._ws = None
+        # Whether the connection was opened by warmup, for the first text to use
+        self._warm: bool = False
 
         # Initialize queues
         self.input_queue: Optional[TextStream] = None
@@ -113,7 +117,9 @@ class CartesiaTTS(Plugin):
                 while True:
                     text_chunk = await self.input_queue.get()
                     if first_chunk:
-                        await self.connect_websocket()
+                        if not self._warm:
+                            await self.connect_websocket()
+                        self._warm = False
                         first_chunk = False
                     if text_chunk is None or text_chunk == "":
                         if self._current_context_id is None:
@@ -138,6 +144,7 @@ class CartesiaTTS(Plugin):
                         if self._generating:
                             continue
                         self._current_context_id = str(uuid.uuid4())
+                        self._context_turns[self._current_context_id] = turns.get_turn_id()
                     tracing.register_event(tracing.Event.TTS_START)
                     logging.info("Generating TTS: %s", text_chunk)
                     payload = {
@@ -172,8 +179,10 @@ class CartesiaTTS(Plugin):
                         continue
                     response = await self._ws.recv()
                     response = json.loads(response)
+                    turns.set_turn_id(self._context_turns.get(response.get("context_id")))
                     if response["type"] == "chunk":
-                        audio_bytes = base64.b64decode(response["data"])
+                        with tracing.span("base64_decode"):
+                            audio_bytes = base64.b64decode(response["data"])
                         total_audio_bytes += len(audio_bytes)
                         if is_first_chunk:
                             tracing.register_event(tracing.Event.TTS_TTFB)
@@ -182,9 +191,11 @@ class CartesiaTTS(Plugin):
                             AudioData(
                                 audio_bytes,
                                 sample_rate=self.output_sample_rate,
+                                turn_id=turns.get_turn_id(),
                             )
                         )
                     elif response["type"] == "done":
+                        self._context_turns.pop(response.get("context_id"), None)
                         tracing.register_event(tracing.Event.TTS_END)
                         tracing.register_metric(tracing.Metric.TTS_TOTAL_BYTES, total_audio_bytes)
                         total_audio_bytes = 0
@@ -207,6 +218,13 @@ class CartesiaTTS(Plugin):
             logging.info("TTS cancelled")
             self._generating = False
             self._current_context_id = None
+            self._context_turns.clear()
+
+    async def warmup(self):
+        """Connect to Cartesia ahead of the first text, which otherwise waits for the connection."""
+        if self._ws is None:
+            await self.connect_websocket()
+            self._warm = True
 
     async def close(self):
         """Close the websocket connection and cancel the main task."""
@@ -13,7 +13,7 @@ import aiohttp
 from realtime.data import AudioData
 from realtime.plugins.base_plugin import Plugin
 from realtime.streams import TextStream
-from realtime.utils import tracing
+from realtime.utils import tracing, turns
 
 # Constants for WebSocket messages
 _KEEPALIVE_MSG: str = json.dumps({"type": "KeepAlive"})
@@ -43,6 +43,7 @@ class DeepgramSTT(Plugin):
         sample_rate: int = 16000,
         num_channels: int = 1,
         sample_width: int = 2,
+        encoding: str = "linear16",
         min_silence_duration: int = 10,
         confidence_threshold: float = 0.8,
     ) -> None:
@@ -59,9 +60,11 @@ class DeepgramSTT(Plugin):
         :param sample_rate: The sample rate of the audio in Hz.
         :param num_channels: The number of audio channels.
         :param sample_width: The width of each audio sample in bytes.
+        :param encoding: "linear16" for PCM, or "opus" for Ogg Opus, e.g. from an AudioStream with codec="opus".
         :param min_silence_duration: The minimum duration of silence to trigger end of speech, in milliseconds.
         :param confidence_threshold: The minimum confidence score to accept a transcription.
         """
+        super().__init__()
         api_key = api_key or os.environ.get("DEEPGRAM_API_KEY")
         if api_key is None:
             raise ValueError("Deepgram API key is required")
@@ -78,6 +81,7 @@ class DeepgramSTT(Plugin):
         self._sample_rate: int = sample_rate
         self._num_channels: int = num_channels
         self._sample_width: int = sample_width
+        self._encoding: str = encoding
         self._speaking: bool = False
         self.confidence_threshold: float = confidence_threshold
 
@@ -90,6 +94,11 @@ class DeepgramSTT(Plugin):
         self._task: Optional[asyncio.Task] = None
         self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
 
+    async def warmup(self) -> None:
+        """Connect to Deepgram ahead of the first audio, which otherwise waits for the connection."""
+        if not self._ws:
+            await self._connect_ws()
+
     async def close(self) -> None:
         """Close the Deepgram connection and clean up resources."""
         if self.input_queue:
@@ -117,7 +126,7 @@ class DeepgramSTT(Plugin):
             "model": self.model,
             "punctuate": self.punctuate,
             "smart_format": self.smart_format,
-            "encoding": "linear16",
+            "encoding": self._encoding,
             "sample_rate": self._sample_rate,
             "channels": self._num_channels,
             "endpointing": self.endpointing,
@@ -173,9 +182,12 @@ class DeepgramSTT(Plugin):
                     break
 
                 bytes_data = data.get_bytes()
-                self._audio_duration_received += len(bytes_data) / (
-                    self._sample_rate * self._num_channels * self._sample_width
-                )
+                if self._encoding == "linear16":
+                    self._audio_duration_received += len(bytes_data) / (
+                        self._sample_rate * self._num_channels * self._sample_width
+                    )
+                else:
+                    self._audio_duration_received += data.get_duration_seconds()
                 await self._ws.send_bytes(bytes_data)
         except Exception:
             logger.error("Deepgram send task failed", exc_info=True)
@@ -214,6 +226,8 @@ class DeepgramSTT(Plugin):
                 if top_choice["transcript"] and confidence > self.confidence_threshold and is_final:
                     logger.info("Deepgram transcript: %s", top_choice["transcript"])
                     latency = self._audio_duration_received - audio_processed_duration
+                    # Every final transcript starts a turn, which the items derived from it carry
+                    turns.start_turn()
                     tracing.register_event(tracing.Event.USER_SPEECH_END, time.time() - latency)
                     tracing.register_event(tracing.Event.TRANSCRIPTION_RECEIVED)
                     await self.output_queue.put(top_choice["transcript"])
@@ -8,7 +8,7 @@ from openai import AsyncOpenAI
 
 from realtime.plugins.base_plugin import Plugin
 from realtime.streams import TextStream
-from realtime.utils import tracing
+from realtime.utils import playout, tracing
 
 
 class FireworksLLM(Plugin):
@@ -100,13 +100,18 @@ class FireworksLLM(Plugin):
     async def _interrupt(self):
         while True:
             user_speaking = await self.interrupt_queue.get()
-            if self._generating and user_speaking:
+            if not user_speaking:
+                continue
+            generating = self._generating
+            if generating:
                 self._task.cancel()
                 while not self.output_queue.empty():
                     self.output_queue.get_nowait()
                 logging.info("Done cancelling LLM")
                 self._generating = False
                 self._task = asyncio.create_task(self._stream_chat_completions())
+            # The reply keeps only what the user heard of it
+            playout.interrupt_reply(self._history, generating)
 
     async def set_interrupt(self, interrupt_queue: asyncio.Queue):
         self.interrupt_queue = interrupt_queue
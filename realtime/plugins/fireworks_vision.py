@@ -1,10 +1,12 @@
 import asyncio
 import time
-from typing import Optional
+from typing import Optional, Tuple, Union
 
 from openai import AsyncOpenAI
 
 from realtime.plugins.vision_plugin import VisionPlugin
+from realtime.utils.key_frames import KeyFrameEngine
+from realtime.utils.yuv420 import BOTTOM_LEFT_QUADRANT, RegionOfInterest
 
 
 class FireworksVision(VisionPlugin):
@@ -17,8 +19,18 @@ class FireworksVision(VisionPlugin):
         auto_respond: Optional[int] = None,
         temperature: float = 1.0,
         wait_for_first_user_response: bool = False,
+        key_frame_engine: Union[str, KeyFrameEngine] = "dhash",
+        key_frame_threshold: float = 0.25,
+        min_interval: float = 1.0,
+        region: Optional[Union[RegionOfInterest, Tuple[float, float, float, float]]] = BOTTOM_LEFT_QUADRANT,
     ):
-        super().__init__()
+        super().__init__(
+            region=region,
+            key_frame_engine=key_frame_engine,
+            key_frame_threshold=key_frame_threshold,
+            min_interval=min_interval,
+            auto_respond=auto_respond,
+        )
         self._model: str = model
         self._client = AsyncOpenAI(base_url="https://api.fireworks.ai/inference/v1", api_key=api_key)
         self._history = []
@@ -29,7 +41,6 @@ class FireworksVision(VisionPlugin):
         self._temperature = temperature
         if self._system_prompt is not None:
             self._history.append({"role": "system", "content": self._system_prompt})
-        self._auto_respond = auto_respond
         self.wait_for_first_user_response = wait_for_first_user_response
 
     async def _stream_chat_completions(self):
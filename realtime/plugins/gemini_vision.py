@@ -2,13 +2,14 @@ import asyncio
 import json
 import logging
 import time
-from typing import Optional
+from typing import Optional, Union
 
 import google.generativeai as genai
 import PIL.PngImagePlugin  # Not used but needed to make Gemini API work with PIL  # noqa: F401
 
 from realtime.plugins.vision_plugin import VisionPlugin
 from realtime.streams import TextStream, VideoStream
+from realtime.utils.key_frames import KeyFrameEngine
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +25,16 @@ class GeminiVision(VisionPlugin):
         temperature: float = 1.0,
         wait_for_first_user_response: bool = False,
         chat_history: bool = True,
+        key_frame_engine: Union[str, KeyFrameEngine] = "dhash",
+        key_frame_threshold: float = 0.25,
+        min_interval: float = 1.0,
     ):
-        super().__init__()
+        super().__init__(
+            key_frame_engine=key_frame_engine,
+            key_frame_threshold=key_frame_threshold,
+            min_interval=min_interval,
+            auto_respond=auto_respond,
+        )
         self._model: str = model
         self._client = genai.GenerativeModel(model)
         self._history = []
@@ -33,7 +42,6 @@ class GeminiVision(VisionPlugin):
         self._temperature = temperature
         if self._system_prompt is not None:
             self._history.append({"role": "user", "parts": [self._system_prompt]})
-        self._auto_respond = auto_respond
         self.wait_for_first_user_response = wait_for_first_user_response
         self._time_last_response = None
         self.chat_history_queue = TextStream()
@@ -96,7 +104,9 @@ class GeminiVision(VisionPlugin):
             if self.image_input_queue.qsize() > 0:
                 while self.image_input_queue.qsize() > 0:
                     image = self.image_input_queue.get_nowait()
-                self._history[-1]["parts"].append(image[0])
+                self._history[-1]["parts"].append(
+                    {"mime_type": self._image_encoder.mime_type, "data": await self._image_encoder.encode(image[0])}
+                )
                 logger.info("Google AI image %s", image[1])
 
             try:
@@ -7,7 +7,7 @@ from openai import AsyncOpenAI
 
 from realtime.plugins.base_plugin import Plugin
 from realtime.streams import TextStream
-from realtime.utils import tracing
+from realtime.utils import playout, tracing
 
 
 class GroqLLM(Plugin):
@@ -148,7 +148,10 @@ class GroqLLM(Plugin):
         """
         while True:
             user_speaking: bool = await self.interrupt_queue.get()
-            if self._generating and user_speaking:
+            if not user_speaking:
+                continue
+            generating = self._generating
+            if generating:
                 if self._task:
                     self._task.cancel()
                 while not self.output_queue.empty():
@@ -156,6 +159,8 @@ class GroqLLM(Plugin):
                 print("Done cancelling LLM")
                 self._generating = False
                 self._task = asyncio.create_task(self._stream_chat_completions())
+            # The reply keeps only what the user heard of it
+            playout.interrupt_reply(self._history, generating)
 
     async def set_interrupt(self, interrupt_queue: asyncio.Queue) -> None:
         """
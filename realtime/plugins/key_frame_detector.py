@@ -1,48 +1,67 @@
 import asyncio
-import time
 from collections import deque
+from typing import Optional, Tuple, Union
+
+from PIL import Image
 
 from realtime.plugins.base_plugin import Plugin
 from realtime.streams import VideoStream
-from realtime.utils.images import (
-    convert_yuv420_to_pil,
-    image_hamming_distance,
-)
+from realtime.utils.key_frames import KeyFrameEngine, create_key_frame_engine
+from realtime.utils.yuv420 import BOTTOM_LEFT_QUADRANT, RegionOfInterest, yuv420_planes, yuv420_to_rgb
 
 
 class KeyFrameDetector(Plugin):
-    def __init__(self, key_frame_threshold=0.4, key_frame_max_time=10):
+    def __init__(
+        self,
+        key_frame_threshold: float = 0.25,
+        key_frame_max_time: float = 10,
+        key_frame_min_time: float = 1.0,
+        key_frame_engine: Union[str, KeyFrameEngine] = "dhash",
+        region: Optional[Union[RegionOfInterest, Tuple[float, float, float, float]]] = BOTTOM_LEFT_QUADRANT,
+    ):
+        """
+        Initialize the KeyFrameDetector plugin.
+
+        Every incoming frame is cropped to the region of interest on its yuv420p planes
+        and scored on luma only, so the cost per frame is a few microseconds. Only the
+        region of key frames is converted to an RGB image.
+
+        Args:
+            key_frame_threshold (float): Minimum hash distance in [0, 1] from the last key frame.
+            key_frame_max_time (float): Emit a key frame after this many seconds without one.
+            key_frame_min_time (float): Minimum number of seconds between key frames.
+            key_frame_engine (Union[str, KeyFrameEngine]): 'dhash', 'phash', 'block_mean' or an engine instance.
+            region (Optional[Union[RegionOfInterest, Tuple[float, float, float, float]]]): The part of the
+                frame to analyse and output. Defaults to the bottom left quadrant, None uses the full frame.
+        """
         super().__init__()
         self.video_frames_stack = deque(maxlen=1)
-        self.prev_frame1 = None
-        self.time_since_last_key_frame = None
         self.output_queue = VideoStream()
         self._generating = False
         self._key_frame_threshold = key_frame_threshold
         self._key_frame_max_time = key_frame_max_time
+        if isinstance(key_frame_engine, str):
+            key_frame_engine = create_key_frame_engine(
+                key_frame_engine,
+                threshold=key_frame_threshold,
+                min_interval=key_frame_min_time,
+                max_interval=key_frame_max_time,
+            )
+        self._key_frame_engine: KeyFrameEngine = key_frame_engine
+        self._region: Optional[RegionOfInterest] = RegionOfInterest.from_value(region)
 
     async def process_video(self):
         i = 1
         while True:
             image = await self.image_input_queue.get()
-            while self.image_input_queue.qsize() > 0:
-                image = self.image_input_queue.get_nowait()
-
-            pil_image = convert_yuv420_to_pil(image)
-            width, height = pil_image.size
-
-            # Setting the points for cropped image
-            left = 0
-            top = height / 2
-            right = width / 2
-            bottom = height
 
-            # Cropped image of above dimension
-            # (It will not change original image)
-            im1 = pil_image.crop((left, top, right, bottom))
-            if not self._is_key_frame(im1):
+            planes = yuv420_planes(image)
+            if self._region is not None:
+                planes = self._region.crop(planes)
+            if not self._is_key_frame(planes[0]):
                 continue
 
+            im1 = Image.fromarray(yuv420_to_rgb(planes))
             await self.output_queue.put((im1, i))
             # if not os.path.exists("data"):
             #     os.makedirs("data")
@@ -68,26 +87,8 @@ class KeyFrameDetector(Plugin):
         self.interrupt_queue = interrupt_queue
         self._interrupt_task = asyncio.create_task(self._interrupt())
 
-    def _is_key_frame(self, frame):
-        if self.prev_frame1 is None:
-            self.prev_frame1 = frame
-            self.time_since_last_key_frame = time.time()
-            return True
-        if time.time() - self.time_since_last_key_frame < 1.0:
-            return False
-        d3 = image_hamming_distance(self.prev_frame1, frame)
-        if d3 >= self._key_frame_threshold:
-            self.prev_frame1 = frame
-            self.time_since_last_key_frame = time.time()
-            return True
-        elif (
-            self._key_frame_max_time
-            and time.time() - self.time_since_last_key_frame > self._key_frame_max_time
-        ):
-            self.prev_frame1 = frame
-            self.time_since_last_key_frame = time.time()
-            return True
-        return False
+    def _is_key_frame(self, luma):
+        return self._key_frame_engine.is_key_frame(luma)
 
     async def run(self, image_input_queue: asyncio.Queue) -> asyncio.Queue:
         self.image_input_queue = image_input_queue
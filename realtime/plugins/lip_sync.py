@@ -20,6 +20,7 @@ class LipSync(Plugin):
         sample_rate: int = 16000,
         rhubarb_path: Optional[str] = None,
     ):
+        super().__init__()
         self._channels = channels
         self._sample_width = sample_width
         self._sample_rate = sample_rate
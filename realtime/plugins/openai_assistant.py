@@ -7,9 +7,11 @@ import time
 from openai import AsyncAssistantEventHandler, AsyncOpenAI
 from typing_extensions import override
 
-from typing import Optional
+from typing import Optional, Tuple, Union
+from PIL import Image
 from realtime.plugins.vision_plugin import VisionPlugin
-from realtime.utils.images import convert_yuv420_to_pil
+from realtime.utils.key_frames import KeyFrameEngine
+from realtime.utils.yuv420 import BOTTOM_LEFT_QUADRANT, RegionOfInterest, yuv420_planes, yuv420_to_rgb
 
 logger = logging.getLogger(__name__)
 
@@ -37,9 +39,18 @@ class OpenAIVisionAssistant(VisionPlugin):
         auto_respond: Optional[int] = None,
         temperature: float = 1.0,
         wait_for_first_user_response: bool = False,
-        key_frame_threshold: float = 0.4,
+        key_frame_engine: Union[str, KeyFrameEngine] = "dhash",
+        key_frame_threshold: float = 0.25,
+        min_interval: float = 1.0,
+        region: Optional[Union[RegionOfInterest, Tuple[float, float, float, float]]] = BOTTOM_LEFT_QUADRANT,
     ):
-        super().__init__()
+        super().__init__(
+            region=region,
+            key_frame_engine=key_frame_engine,
+            key_frame_threshold=key_frame_threshold,
+            min_interval=min_interval,
+            auto_respond=auto_respond,
+        )
         self._model: str = model
         self._client = AsyncOpenAI(api_key=api_key, base_url=base_url)
         self._history = []
@@ -47,11 +58,9 @@ class OpenAIVisionAssistant(VisionPlugin):
         self._temperature = temperature
         if self._system_prompt is not None:
             self._history.append({"role": "system", "content": self._system_prompt})
-        self._auto_respond = auto_respond
         self.wait_for_first_user_response = wait_for_first_user_response
         self._time_last_response = None
         self.chat_history_queue = asyncio.Queue()
-        self._key_frame_threshold = key_frame_threshold
 
     async def _stream_chat_completions(self):
         self.assistant = await self._client.beta.assistants.create(
@@ -145,25 +154,17 @@ class OpenAIVisionAssistant(VisionPlugin):
             if image is None:
                 continue
             t = time.time()
-            pil_image = convert_yuv420_to_pil(image)
-            width, height = pil_image.size
-
-            # Setting the points for cropped image
-            left = 0
-            top = height / 2
-            right = width / 2
-            bottom = height
-
-            # Cropped image of above dimension
-            # (It will not change original image)
-            im1 = pil_image.crop((left, top, right, bottom))
-            if not self._is_key_frame(im1):
+            planes = yuv420_planes(image)
+            if self._region is not None:
+                planes = self._region.crop(planes)
+            if not self._is_key_frame(planes[0]):
                 continue
 
+            im1 = Image.fromarray(yuv420_to_rgb(planes))
             logger.info("open ai image processing: %s", time.time() - t)
-            im1.save(f"data/{i}.jpeg", quality=95)
+            image_bytes = await self._image_encoder.encode(im1)
             logger.info("open ai image processing: %s", time.time() - t)
-            file = await self._client.files.create(file=open(f"data/{i}.jpeg", "rb"), purpose="vision")
+            file = await self._client.files.create(file=(f"{i}.jpeg", image_bytes), purpose="vision")
             self.video_frames_stack.append((file.id, i))
             logger.info("open ai image processing: %s", time.time() - t)
             i += 1
@@ -7,6 +7,8 @@ import time
 from openai import AsyncOpenAI
 
 from realtime.plugins.base_plugin import Plugin
+from realtime.streams import TextStream
+from realtime.utils import playout
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +29,8 @@ class OpenAILLM(Plugin):
         self._api_key = api_key
         self._client = AsyncOpenAI(api_key=self._api_key, base_url=base_url)
         self._history = []
-        self.output_queue = asyncio.Queue()
-        self.chat_history_queue = asyncio.Queue()
+        self.output_queue = TextStream()
+        self.chat_history_queue = TextStream()
         self._generating = False
         self._system_prompt = system_prompt
         if self._system_prompt is not None:
@@ -72,13 +74,18 @@ class OpenAILLM(Plugin):
     async def _interrupt(self):
         while True:
             user_speaking = await self.interrupt_queue.get()
-            if self._generating and user_speaking:
+            if not user_speaking:
+                continue
+            generating = self._generating
+            if generating:
                 self._task.cancel()
                 while not self.output_queue.empty():
                     self.output_queue.get_nowait()
                 logger.info("Done cancelling LLM")
                 self._generating = False
                 self._task = asyncio.create_task(self._stream_chat_completions())
+            # The reply keeps only what the user heard of it
+            playout.interrupt_reply(self._history, generating)
 
     async def set_interrupt(self, interrupt_queue: asyncio.Queue):
         self.interrupt_queue = interrupt_queue
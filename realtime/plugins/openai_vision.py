@@ -6,10 +6,12 @@ import logging
 import time
 
 from openai import AsyncOpenAI
-from typing import Optional
+from typing import Optional, Tuple, Union
 
 from realtime.plugins.vision_plugin import VisionPlugin
 from realtime.streams import TextStream, VideoStream
+from realtime.utils.key_frames import KeyFrameEngine
+from realtime.utils.yuv420 import BOTTOM_LEFT_QUADRANT, RegionOfInterest
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +26,18 @@ class OpenAIVision(VisionPlugin):
         auto_respond: Optional[int] = None,
         temperature: float = 1.0,
         wait_for_first_user_response: bool = False,
-        key_frame_threshold: float = 0.4,
+        key_frame_engine: Union[str, KeyFrameEngine] = "dhash",
+        key_frame_threshold: float = 0.25,
+        min_interval: float = 1.0,
+        region: Optional[Union[RegionOfInterest, Tuple[float, float, float, float]]] = BOTTOM_LEFT_QUADRANT,
     ):
-        super().__init__()
+        super().__init__(
+            region=region,
+            key_frame_engine=key_frame_engine,
+            key_frame_threshold=key_frame_threshold,
+            min_interval=min_interval,
+            auto_respond=auto_respond,
+        )
         self._model: str = model
         self._client = AsyncOpenAI(api_key=api_key, base_url=base_url)
         self._history = []
@@ -34,11 +45,9 @@ class OpenAIVision(VisionPlugin):
         self._temperature = temperature
         if self._system_prompt is not None:
             self._history.append({"role": "system", "content": self._system_prompt})
-        self._auto_respond = auto_respond
         self.wait_for_first_user_response = wait_for_first_user_response
         self._time_last_response = None
         self.chat_history_queue = TextStream()
-        self._key_frame_threshold = key_frame_threshold
 
     async def _stream_chat_completions(self):
         while True:
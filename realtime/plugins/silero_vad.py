@@ -21,6 +21,7 @@ class SileroVAD(Plugin):
         audio_sample_rate: int = 8000,
         sensitivity_threshold: float = 0.91,
     ):
+        super().__init__()
         if audio_sample_rate not in [8000, 16000]:
             raise ValueError("Silero VAD only supports 8KHz and 16KHz sample rates")
 
@@ -42,7 +43,7 @@ class SileroVAD(Plugin):
 
     async def run(self, input_queue: CloneableQueue) -> CloneableQueue:
         self.input_queue = input_queue
-        self._vad_thread = threading.Thread(target=self.execute_vad, daemon=True)
+        self._vad_thread = threading.Thread(target=self.execute_vad, name="silero_vad", daemon=True)
         self._vad_thread.start()
         return self.output_queue
 
@@ -1,51 +1,72 @@
 import asyncio
-import time
 from collections import deque
+from typing import Optional, Tuple, Union
+
+from PIL import Image
 
 from realtime.plugins.base_plugin import Plugin
 from realtime.streams import TextStream
-from realtime.utils.images import (
-    convert_image_to_url,
-    convert_yuv420_to_pil,
-    image_hamming_distance,
-)
+from realtime.utils.image_encoder import ImageEncoder
+from realtime.utils.key_frames import KeyFrameEngine, create_key_frame_engine
+from realtime.utils.yuv420 import BOTTOM_LEFT_QUADRANT, RegionOfInterest, yuv420_planes, yuv420_to_rgb
 
 
 class VisionPlugin(Plugin):
-    def __init__(self):
+    def __init__(
+        self,
+        region: Optional[Union[RegionOfInterest, Tuple[float, float, float, float]]] = BOTTOM_LEFT_QUADRANT,
+        key_frame_engine: Union[str, KeyFrameEngine] = "dhash",
+        key_frame_threshold: float = 0.25,
+        min_interval: float = 1.0,
+        auto_respond: Optional[int] = None,
+    ):
+        """
+        Initialize the VisionPlugin.
+
+        Only key frames are encoded and sent to the model. With ``auto_respond``, a key frame
+        is forced after twice that many seconds without one, so the model sees the scene again.
+
+        Args:
+            region (Optional[Union[RegionOfInterest, Tuple[float, float, float, float]]]): The part of the
+                frame to analyse and send. Defaults to the bottom left quadrant, None uses the full frame.
+            key_frame_engine (Union[str, KeyFrameEngine]): 'dhash', 'phash', 'block_mean' or an engine instance.
+            key_frame_threshold (float): Minimum hash distance in [0, 1] from the last key frame.
+            min_interval (float): Minimum number of seconds between key frames.
+            auto_respond (Optional[int]): Seconds after which the model responds without a prompt.
+        """
         super().__init__()
+        self._region: Optional[RegionOfInterest] = RegionOfInterest.from_value(region)
         self.video_frames_stack = deque(maxlen=1)
-        self.prev_frame1 = None
-        self.time_since_last_key_frame = None
         self.output_queue = TextStream()
         self._generating = False
+        self._auto_respond = auto_respond
+        if isinstance(key_frame_engine, str):
+            key_frame_engine = create_key_frame_engine(
+                key_frame_engine,
+                threshold=key_frame_threshold,
+                min_interval=min_interval,
+                max_interval=2.0 * auto_respond if auto_respond else None,
+            )
+        self._key_frame_engine: KeyFrameEngine = key_frame_engine
+        self._primed: bool = False
+        self._image_encoder = ImageEncoder()
 
     async def process_video(self):
         i = 1
         while True:
-            image = None
-            while self.image_input_queue.qsize() > 0:
-                image = self.image_input_queue.get_nowait()
-
+            image = await self.image_input_queue.get()
             if image is None:
-                await asyncio.sleep(0.2)
                 continue
-            pil_image = convert_yuv420_to_pil(image)
-            width, height = pil_image.size
-
-            # Setting the points for cropped image
-            left = 0
-            top = height / 2
-            right = width / 2
-            bottom = height
 
-            # Cropped image of above dimension
-            # (It will not change original image)
-            im1 = pil_image.crop((left, top, right, bottom))
-            if not self._is_key_frame(im1):
+            # Crop on the yuv420p planes and score on luma only
+            planes = yuv420_planes(image)
+            if self._region is not None:
+                planes = self._region.crop(planes)
+            if not self._is_key_frame(planes[0]):
                 continue
 
-            image_url = convert_image_to_url(im1)
+            im1 = Image.fromarray(yuv420_to_rgb(planes))
+            image_url = await self._image_encoder.encode_to_url(im1)
             self.video_frames_stack.append((image_url, i))
             # if not os.path.exists("data"):
             #     os.makedirs("data")
@@ -55,6 +76,7 @@ class VisionPlugin(Plugin):
     async def close(self):
         for task in self._tasks:
             task.cancel()
+        self._image_encoder.close()
 
     async def _interrupt(self):
         while True:
@@ -71,23 +93,10 @@ class VisionPlugin(Plugin):
         self.interrupt_queue = interrupt_queue
         self._interrupt_task = asyncio.create_task(self._interrupt())
 
-    def _is_key_frame(self, frame):
-        if self.prev_frame1 is None:
-            self.prev_frame1 = frame
-            self.time_since_last_key_frame = time.time()
-            return False
-        if time.time() - self.time_since_last_key_frame < 1.0:
+    def _is_key_frame(self, luma):
+        if not self._primed:
+            # The first frame only primes the engine
+            self._primed = True
+            self._key_frame_engine.is_key_frame(luma)
             return False
-        d3 = image_hamming_distance(self.prev_frame1, frame)
-        if d3 >= self._key_frame_threshold:
-            self.prev_frame1 = frame
-            self.time_since_last_key_frame = time.time()
-            return True
-        elif (
-            self._auto_respond
-            and time.time() - self.time_since_last_key_frame > 2.0 * self._auto_respond
-        ):
-            self.prev_frame1 = frame
-            self.time_since_last_key_frame = time.time()
-            return True
-        return False
+        return self._key_frame_engine.is_key_frame(luma)
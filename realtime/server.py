@@ -1,12 +1,15 @@
+import asyncio
 import logging
 import os
 import ssl
 from typing import Dict, List, Optional
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from realtime.utils import chrome_trace, metrics, profiler, tracing
+
 
 class RealtimeServer:
     """
@@ -44,6 +47,12 @@ class RealtimeServer:
         Start the server with SSL configuration.
         """
         self.app.add_api_route("/connections", self.get_connections, methods=["GET"])
+        self.app.add_api_route("/metrics", self.get_metrics, methods=["GET"])
+        self.app.add_api_route("/trace", self.get_trace, methods=["GET"])
+        self.app.add_api_route("/profile", self.get_profile, methods=["GET"])
+        metrics.registry.register(
+            metrics.Gauge("realtime_connections", "Open client connections.", lambda: self._connections)
+        )
         if (
             os.environ.get("SSL_CERT_PATH")
             and os.environ.get("SSL_KEY_PATH")
@@ -83,6 +92,39 @@ class RealtimeServer:
         """
         return {"connections": ["active_connection"] if self._connections > 0 else []}
 
+    async def get_metrics(self) -> Response:
+        """
+        Get the process metrics in the OpenMetrics text format.
+        """
+        return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+    async def get_trace(self, session_id: Optional[str] = None) -> Dict:
+        """
+        Get the timelines of the running and recently ended sessions in the Chrome Trace Event Format.
+        Pass a session_id to only get that session.
+        """
+        if session_id is None:
+            return chrome_trace.export_chrome_trace()
+        session_tracer = tracing.get_session(session_id)
+        if session_tracer is None:
+            raise HTTPException(status_code=404, detail=f"Unknown session {session_id}")
+        return chrome_trace.export_chrome_trace([session_tracer])
+
+    async def get_profile(self, seconds: float = 10.0, interval_ms: Optional[float] = None) -> Response:
+        """
+        Profile every thread of the process for some seconds and get the collapsed stacks,
+        which flamegraph tools render. The profile runs on a worker thread, so the server
+        keeps serving meanwhile.
+        """
+        if seconds <= 0 or (interval_ms is not None and interval_ms <= 0):
+            raise HTTPException(status_code=400, detail="seconds and interval_ms must be positive")
+        interval = interval_ms / 1000 if interval_ms is not None else None
+        try:
+            counts = await asyncio.to_thread(profiler.profiler.profile, seconds, interval)
+        except profiler.ProfilerBusyError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return Response(content=profiler.collapse(counts), media_type="text/plain")
+
     def add_connection(self) -> None:
         """
         Increment the connection counter.
@@ -0,0 +1,291 @@
+import asyncio
+import contextvars
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Coroutine, Deque, List, Optional, Set, Tuple
+
+from realtime.utils import chrome_trace, tracing
+
+logger = logging.getLogger(__name__)
+
+_current_session: contextvars.ContextVar[Optional["Session"]] = contextvars.ContextVar("session", default=None)
+
+# Sessions that have started and not closed yet
+active_sessions: Set["Session"] = set()
+
+# Sessions every endpoint keeps built ahead of connections, and the seconds they may wait
+pool_size: int = 0
+pool_idle_timeout: float = 300.0
+
+
+def current_session() -> Optional["Session"]:
+    """Return the session the current context belongs to, or None outside of a session."""
+    return _current_session.get()
+
+
+class Session:
+    """
+    One conversation: the pipeline, drivers and tasks created for one client connection.
+
+    Code run with ``run`` or ``create_task`` runs in the context of the session, where the
+    session tracer is current. Every task created from that context, including the ones
+    plugins create in ``run()``, is owned by the session once ``install_task_factory`` was
+    called on the loop, and so is every plugin created in it. Closing the session closes
+    its plugins and cancels its tasks, and leaves the other sessions of the process alone.
+    """
+
+    def __init__(self, session_id: Optional[str] = None):
+        """
+        Initialize the Session.
+
+        Args:
+            session_id (Optional[str]): The id of the session. A random id is used if None.
+        """
+        self.context: contextvars.Context = contextvars.copy_context()
+        self.tracer: tracing.Tracer = self.context.run(self._enter, session_id)
+        self.session_id: str = self.tracer.session_id
+        self.tasks: Set[asyncio.Task] = set()
+        self.plugins: List[Any] = []
+        self.closed: bool = False
+        self._close_callbacks: List[Callable[[], Awaitable[None]]] = []
+        active_sessions.add(self)
+
+    def _enter(self, session_id: Optional[str]) -> tracing.Tracer:
+        _current_session.set(self)
+        return tracing.start_session(session_id)
+
+    def track(self, task: asyncio.Task) -> None:
+        """Make the session own a task, which is cancelled when the session closes."""
+        if self.closed:
+            task.cancel()
+            return
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def add_plugin(self, plugin: Any) -> None:
+        """Make the session own a plugin, which is closed when the session closes."""
+        self.plugins.append(plugin)
+
+    def on_close(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Register a coroutine function called when the session closes, before its tasks are cancelled."""
+        self._close_callbacks.append(callback)
+
+    async def warmup(self) -> None:
+        """Let the plugins of the session connect and load what they need before the first turn."""
+        await self.run(asyncio.gather(*(plugin.warmup() for plugin in self.plugins)))
+
+    def create_task(self, coro: Coroutine) -> asyncio.Task:
+        """
+        Create a task running in the context of the session and owned by it.
+
+        Args:
+            coro (Coroutine): The coroutine to run.
+
+        Returns:
+            asyncio.Task: The task.
+        """
+        task = self.context.run(asyncio.ensure_future, coro)
+        self.track(task)
+        return task
+
+    async def run(self, coro: Coroutine) -> Any:
+        """
+        Run a coroutine in the context of the session and return its result.
+
+        Args:
+            coro (Coroutine): The coroutine to run.
+
+        Returns:
+            Any: The result of the coroutine.
+        """
+        return await self.create_task(coro)
+
+    async def close(self) -> None:
+        """Close the plugins of the session, cancel its tasks and end its trace. Closing twice does nothing."""
+        if self.closed:
+            return
+        self.closed = True
+        active_sessions.discard(self)
+        for callback in self._close_callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error("Error closing session %s: %s", self.session_id, e)
+        for plugin in self.plugins:
+            try:
+                await plugin.close()
+            except Exception as e:
+                logger.error("Error closing plugin %s of session %s: %s", type(plugin).__name__, self.session_id, e)
+        current = asyncio.current_task()
+        tasks = [task for task in self.tasks if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        tracing.end_session(self.tracer)
+        chrome_trace.dump_session_trace(self.tracer)
+        logger.info("Session %s closed", self.session_id)
+
+
+def _session_task_factory(previous_factory: Optional[Callable]) -> Callable:
+    def factory(loop: asyncio.AbstractEventLoop, coro: Coroutine, **kwargs: Any) -> asyncio.Future:
+        if previous_factory is not None:
+            task = previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context")
+        session = context.get(_current_session) if context is not None else _current_session.get()
+        if session is not None:
+            session.track(task)
+        return task
+
+    factory.owns_session_tasks = True
+    return factory
+
+
+def install_task_factory(loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+    """
+    Make the tasks created in the context of a session owned by the session.
+
+    Args:
+        loop (Optional[asyncio.AbstractEventLoop]): The loop. Defaults to the running loop.
+    """
+    loop = loop or asyncio.get_running_loop()
+    previous_factory = loop.get_task_factory()
+    if not getattr(previous_factory, "owns_session_tasks", False):
+        loop.set_task_factory(_session_task_factory(previous_factory))
+
+
+async def close_all_sessions() -> None:
+    """Close every active session."""
+    await asyncio.gather(*(session.close() for session in list(active_sessions)), return_exceptions=True)
+
+
+def configure_pool(size: int, idle_timeout: float = 300.0) -> None:
+    """
+    Set how many warm sessions every endpoint keeps ahead of connections.
+
+    Args:
+        size (int): The number of sessions, or 0 to build every session on connection.
+        idle_timeout (float): Seconds a session may wait in the pool before it is replaced.
+    """
+    global pool_size, pool_idle_timeout
+    pool_size, pool_idle_timeout = size, idle_timeout
+
+
+class SessionPool:
+    """
+    Keeps sessions built and warmed up ahead of connections, to hand one out at once.
+
+    ``create_session`` builds a session and returns it first in a tuple with whatever else
+    it built, like the drivers of its pipeline. The pool builds ``size`` of them in the
+    background and warms up their plugins, so the first turn of a connection does not wait
+    for provider connections or model loads. A session that waited ``idle_timeout``
+    seconds is closed and replaced, so provider connections are not held forever. When the
+    pool is empty, ``get`` builds a session on the spot.
+    """
+
+    def __init__(
+        self,
+        create_session: Callable[[], Awaitable[Tuple[Any, ...]]],
+        size: int,
+        idle_timeout: float = 300.0,
+        retry_delay: float = 5.0,
+    ):
+        """
+        Initialize the SessionPool.
+
+        Args:
+            create_session (Callable[[], Awaitable[Tuple[Any, ...]]]): Builds a session, returned first in a tuple.
+            size (int): The number of sessions kept ready.
+            idle_timeout (float): Seconds a session may wait in the pool before it is replaced.
+            retry_delay (float): Seconds to wait after a session failed to build before the next attempt.
+        """
+        self.create_session = create_session
+        self.size: int = size
+        self.idle_timeout: float = idle_timeout
+        self.retry_delay: float = retry_delay
+        # Ready sessions with the loop time they were ready at, oldest first
+        self._ready: Deque[Tuple[float, Tuple[Any, ...]]] = deque()
+        # Resolved to wake the pool up when a session is handed out
+        self._waiter: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._ready)
+
+    def start(self) -> None:
+        """Start filling the pool in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def get(self) -> Tuple[Any, ...]:
+        """
+        Hand out a ready session, or build one if none is ready.
+
+        Returns:
+            Tuple[Any, ...]: What ``create_session`` returned for the session.
+        """
+        self._wake()
+        while self._ready:
+            _, built = self._ready.popleft()
+            if not built[0].closed:
+                return built
+        return await self.create_session()
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def _build(self) -> Optional[Tuple[Any, ...]]:
+        try:
+            built = await self.create_session()
+        except Exception as e:
+            logger.error("Error building a pooled session: %s", e)
+            return None
+        # Plugins report a failed connection by cancelling, which must not cancel the pool
+        warmup = asyncio.ensure_future(built[0].warmup())
+        await asyncio.wait([warmup])
+        if warmup.cancelled() or warmup.exception() is not None:
+            error = "cancelled" if warmup.cancelled() else warmup.exception()
+            logger.error("Error warming up session %s: %s", built[0].session_id, error)
+            await built[0].close()
+            return None
+        return built
+
+    async def _expire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._ready and loop.time() - self._ready[0][0] >= self.idle_timeout:
+            _, built = self._ready.popleft()
+            logger.info("Replacing session %s, idle for %.0fs", built[0].session_id, self.idle_timeout)
+            await built[0].close()
+
+    async def _maintain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._expire()
+            timeout = None
+            while len(self._ready) < self.size:
+                built = await self._build()
+                if built is None:
+                    timeout = self.retry_delay
+                    break
+                self._ready.append((loop.time(), built))
+            if self._ready:
+                expiry = self._ready[0][0] + self.idle_timeout - loop.time()
+                timeout = expiry if timeout is None else min(timeout, expiry)
+            self._waiter = loop.create_future()
+            timer = loop.call_later(timeout, self._wake) if timeout is not None else None
+            try:
+                await self._waiter
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+    async def close(self) -> None:
+        """Stop filling the pool and close the sessions in it."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        ready, self._ready = self._ready, deque()
+        await asyncio.gather(*(built[0].close() for _, built in ready), return_exceptions=True)
@@ -1,12 +1,15 @@
 import asyncio
 import fractions
 import logging
-import time
 
 from aiortc import MediaStreamTrack
-from av import AudioResampler
+from av import AudioFrame, AudioResampler
 
 from realtime.data import AudioData
+from realtime.utils import playout, turns
+from realtime.utils.frame_pool import AudioFramePool
+from realtime.utils.jitter_buffer import AudioJitterBuffer
+from realtime.utils.opus import OggOpusEncoder
 
 
 class AudioRTCDriver(MediaStreamTrack):
@@ -23,16 +26,46 @@ class AudioRTCDriver(MediaStreamTrack):
         super().__init__()
         self.audio_input_q = audio_input_q
         self.audio_output_q = audio_output_q
-        self.audio_data_q = asyncio.Queue()
+        # Paces the output frames, with a None frame at the end of every turn
+        self.jitter_buffer = AudioJitterBuffer()
         self.audio_samples = 0
-        self._start = None
         self._track = None
-        self.output_audio_sample_rate = output_audio_sample_rate
-        self.output_audio_layout = output_audio_layout
-        self.output_audio_format = output_audio_format
+        self.output_audio_chunk_size_seconds = 0.020
+        self.set_output_format(output_audio_sample_rate, output_audio_layout, output_audio_format)
+        # Inbound frames are converted once, here, to the format the input stream declares
+        self.input_audio_resampler = None
+        if self.audio_input_q:
+            frame_duration = self.audio_input_q.frame_duration
+            self.input_audio_resampler = AudioResampler(
+                format=self.audio_input_q.format,
+                layout=self.audio_input_q.layout,
+                rate=self.audio_input_q.sample_rate,
+                frame_size=int(self.audio_input_q.sample_rate * frame_duration) if frame_duration else None,
+            )
+        # Encoded once per session for consumers uploading Opus
+        self.input_audio_encoder = None
+        if self.audio_input_q and self.audio_input_q.codec == "opus":
+            self.input_audio_encoder = OggOpusEncoder(self.audio_input_q.sample_rate, self.audio_input_q.layout)
+        # Input frames are only read while resampling, so they go back to the pool right after
+        self.frame_pool = AudioFramePool()
+        self.playout = playout.PlayoutTracker()
+        playout.register_output(self)
+
+    def set_output_format(self, sample_rate, layout="stereo", format="s16"):
+        """
+        Set the format of the output frames, e.g. the one of the codec negotiated in the SDP,
+        which the encoder then takes without converting it again.
+
+        Args:
+            sample_rate (int): The sample rate of the output frames.
+            layout (str): The channel layout of the output frames.
+            format (str): The sample format of the output frames.
+        """
+        self.output_audio_sample_rate = sample_rate
+        self.output_audio_layout = layout
+        self.output_audio_format = format
         self.output_audio_time_base = fractions.Fraction(
             1, self.output_audio_sample_rate)
-        self.output_audio_chunk_size_seconds = 0.020
         self.output_audio_resampler = AudioResampler(
             format=self.output_audio_format,
             layout=self.output_audio_layout,
@@ -40,17 +73,43 @@ class AudioRTCDriver(MediaStreamTrack):
             frame_size=int(self.output_audio_sample_rate *
                            self.output_audio_chunk_size_seconds),
         )
+        # Sent while there is no audio to play, so the track never stalls. The encoder is done
+        # with a frame before the next recv, so the same frame is sent every time.
+        self.silence_frame = AudioFrame(
+            format=self.output_audio_format,
+            layout=self.output_audio_layout,
+            samples=int(self.output_audio_sample_rate * self.output_audio_chunk_size_seconds),
+        )
+        for plane in self.silence_frame.planes:
+            plane.update(bytes(plane.buffer_size))
+        self.silence_frame.sample_rate = self.output_audio_sample_rate
+        self.silence_frame.time_base = self.output_audio_time_base
+
+    def interrupt(self):
+        """
+        Drop the audio queued for the client, so the output turns to silence within a frame.
+
+        Returns:
+            Optional[float]: The milliseconds of the interrupted turn that were sent, or None
+                when no turn was being played.
+        """
+        if self.audio_output_q:
+            self.audio_output_q.clear()
+        self.jitter_buffer.clear()
+        sent_seconds = self.playout.flush()
+        return sent_seconds * 1000 if sent_seconds is not None else None
 
     async def recv(self):
-        frame = await self.audio_data_q.get()
-        data_time = frame.samples / frame.sample_rate
-        if self._start is None:
-            self._start = time.time() + data_time
-        else:
-            wait = self._start - time.time() - data_time
-            if wait > 0:
-                await asyncio.sleep(wait)
-            self._start = max(self._start, time.time()) + data_time
+        frame, turn_id = await self.jitter_buffer.get(self.silence_frame)
+        while frame is None:
+            self.playout.on_sent_end()
+            frame, turn_id = await self.jitter_buffer.get(self.silence_frame)
+        if frame is not self.silence_frame:
+            self.playout.on_sent(frame.samples / frame.sample_rate, turn_id)
+        # Timestamps follow the samples sent, silence included, so the stream stays continuous
+        frame.pts = self.audio_samples
+        frame.time_base = self.output_audio_time_base
+        self.audio_samples += frame.samples
         return frame
 
     async def run_input(self):
@@ -61,7 +120,28 @@ class AudioRTCDriver(MediaStreamTrack):
                 await asyncio.sleep(0.2)
             while True:
                 frame = await self._track.recv()
-                await self.audio_input_q.put(AudioData(frame))
+                for nframe in self.input_audio_resampler.resample(frame):
+                    if self.input_audio_encoder:
+                        encoded = self.input_audio_encoder.encode(nframe)
+                        if encoded:
+                            await self.audio_input_q.put(
+                                AudioData(
+                                    encoded,
+                                    sample_rate=nframe.sample_rate,
+                                    channels=len(nframe.layout.channels),
+                                    format="opus",
+                                    duration=nframe.samples / nframe.sample_rate,
+                                )
+                            )
+                        continue
+                    await self.audio_input_q.put(
+                        AudioData(
+                            nframe,
+                            sample_rate=nframe.sample_rate,
+                            channels=len(nframe.layout.channels),
+                            sample_width=nframe.format.bytes,
+                        )
+                    )
         except Exception as e:
             logging.error("Error in audio_frame_callback: ", e)
             raise asyncio.CancelledError
@@ -71,15 +151,15 @@ class AudioRTCDriver(MediaStreamTrack):
             while True:
                 audio_data: AudioData = await self.audio_output_q.get()
                 if audio_data is None:
+                    self.playout.on_queued_end()
+                    self.jitter_buffer.end_turn(turns.get_turn_id())
                     continue
-                self.audio_samples = max(
-                    self.audio_samples, audio_data.get_pts())
-                for nframe in self.output_audio_resampler.resample(audio_data.get_frame()):
-                    # fix timestamps
-                    nframe.pts = self.audio_samples
-                    nframe.time_base = self.output_audio_time_base
-                    self.audio_samples += nframe.samples
-                    self.audio_data_q.put_nowait(nframe)
+                frame_samples = int(audio_data.sample_rate * self.output_audio_chunk_size_seconds)
+                for frame in audio_data.get_frames(frame_samples, pool=self.frame_pool):
+                    for nframe in self.output_audio_resampler.resample(frame):
+                        self.playout.on_queued(nframe.samples / nframe.sample_rate, audio_data.turn_id)
+                        self.jitter_buffer.put(nframe, audio_data.turn_id)
+                    self.frame_pool.release(frame)
         except Exception as e:
             logging.error("Error in audio_frame_callback: ", e)
             raise asyncio.CancelledError
@@ -89,3 +169,7 @@ class AudioRTCDriver(MediaStreamTrack):
 
     def add_track(self, track):
         self._track = track
+
+    def stop(self):
+        super().stop()
+        self.frame_pool.clear()
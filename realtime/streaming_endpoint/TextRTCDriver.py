@@ -1,12 +1,54 @@
+import asyncio
+import json
+import struct
+from collections import deque
+from typing import Deque, List, Union
+
+from realtime.utils import metrics
 
 
 class TextRTCDriver:
+    """
+    Carries text between the pipeline and the data channel of a peer connection.
+
+    With a ``batch_delay``, the items output within that many seconds of the first one are
+    sent as one message, instead of one message per token: a JSON array of the items, or
+    with ``binary`` the UTF-8 items each prefixed with their length as a big-endian uint32.
+    Without it, every item is sent as it is.
+
+    Messages sent before the data channel is open are kept, up to ``max_buffered_bytes``,
+    the oldest being dropped first, and sent once it opens.
+    """
+
     kind = "text"
 
-    def __init__(self, text_input_q, text_output_q):
+    def __init__(
+        self,
+        text_input_q,
+        text_output_q,
+        batch_delay: float = 0.0,
+        binary: bool = False,
+        max_buffered_bytes: int = 1 << 20,
+    ):
+        """
+        Initialize the TextRTCDriver.
+
+        Args:
+            text_input_q: The stream the messages received from the client are put in.
+            text_output_q: The stream of the items to send to the client.
+            batch_delay (float): Seconds items are collected for before they are sent as one message,
+                or 0 to send them one by one.
+            binary (bool): Send batches in the length-prefixed binary framing instead of JSON.
+            max_buffered_bytes (int): Maximum size of the messages kept until the data channel opens.
+        """
         self.text_input_q = text_input_q
         self.text_output_q = text_output_q
+        self.batch_delay: float = batch_delay
+        self.binary: bool = binary
+        self.max_buffered_bytes: int = max_buffered_bytes
         self._track = None
+        self._pending: Deque[Union[str, bytes]] = deque()
+        self._pending_bytes: int = 0
 
     def put_text(self, text):
         if self.text_input_q:
@@ -14,12 +56,69 @@ class TextRTCDriver:
 
     def add_track(self, track):
         self._track = track
+        if hasattr(track, "on"):
+            track.on("open", self._flush)
+        self._flush()
+
+    @staticmethod
+    def _size(message: Union[str, bytes]) -> int:
+        """The size of a message on the wire, in bytes."""
+        return len(message.encode("utf-8")) if isinstance(message, str) else len(message)
+
+    def _is_open(self) -> bool:
+        return self._track is not None and getattr(self._track, "readyState", "open") == "open"
+
+    def _flush(self) -> None:
+        while self._pending and self._is_open():
+            message = self._pending.popleft()
+            self._pending_bytes -= self._size(message)
+            self._track.send(message)
+
+    def _send(self, message: Union[str, bytes]) -> None:
+        self._flush()
+        if self._is_open():
+            self._track.send(message)
+            return
+        self._pending.append(message)
+        self._pending_bytes += self._size(message)
+        while self._pending_bytes > self.max_buffered_bytes and len(self._pending) > 1:
+            self._pending_bytes -= self._size(self._pending.popleft())
+            metrics.dropped_frames.inc(stream="text", reason="overflow")
+
+    def frame(self, items: List[Union[str, bytes]]) -> Union[str, bytes]:
+        """
+        Frame a batch of items as one message.
+
+        Args:
+            items (List[Union[str, bytes]]): The items.
+
+        Returns:
+            Union[str, bytes]: A JSON array of the items, or their length-prefixed binary framing.
+        """
+        if self.binary:
+            parts = []
+            for item in items:
+                data = item.encode("utf-8") if isinstance(item, str) else item
+                parts.append(struct.pack(">I", len(data)))
+                parts.append(data)
+            return b"".join(parts)
+        return json.dumps([item.decode("utf-8") if isinstance(item, bytes) else item for item in items])
 
     async def run_input(self):
         if not self.text_output_q:
             return
         while True:
             text = await self.text_output_q.get()
-            if not self._track:
+            if text is None:
+                continue
+            if not self.batch_delay:
+                self._send(text)
                 continue
-            self._track.send(text)
+            # Collect what the pipeline outputs within the latency budget
+            await asyncio.sleep(self.batch_delay)
+            batch = [text]
+            while not self.text_output_q.empty():
+                text = self.text_output_q.get_nowait()
+                if text is not None:
+                    batch.append(text)
+            self._send(self.frame(batch))
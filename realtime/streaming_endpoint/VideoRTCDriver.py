@@ -4,6 +4,8 @@ import time
 from aiortc import MediaStreamTrack
 
 from realtime.data import ImageData
+from realtime.utils import metrics
+from realtime.utils.frame_pool import VideoFramePool
 
 
 class VideoRTCDriver(MediaStreamTrack):
@@ -16,12 +18,20 @@ class VideoRTCDriver(MediaStreamTrack):
         self._video_samples = 0
         self._track = None
         self._start = None
+        self.frame_pool = VideoFramePool()
+        self._sent_frame = None
+        self._next_input_time = 0.0
 
     async def recv(self):
         video_data = await self.video_output_q.get()
+        # The encoder is done with the frame returned by the previous call
+        if self._sent_frame is not None:
+            self.frame_pool.release(self._sent_frame)
+            self._sent_frame = None
         if video_data is None:
             return None
-        video_frame = video_data.get_frame()
+        video_frame = video_data.get_frame(pool=self.frame_pool)
+        self._sent_frame = video_frame
         self._video_samples = max(self._video_samples, video_frame.pts)
         video_frame.pts = self._video_samples
         self._video_samples += 1.0 / video_frame.time_base
@@ -38,6 +48,11 @@ class VideoRTCDriver(MediaStreamTrack):
     def add_track(self, track):
         self._track = track
 
+    def stop(self):
+        super().stop()
+        self._sent_frame = None
+        self.frame_pool.clear()
+
     async def run_input(self):
         try:
             if not self.video_input_q:
@@ -46,7 +61,22 @@ class VideoRTCDriver(MediaStreamTrack):
                 await asyncio.sleep(0.2)
             while True:
                 frame = await self._track.recv()
-                await self.video_input_q.put(ImageData(frame))
+                if self.video_input_q.fps:
+                    # Frames arriving before the next sample are dropped right away
+                    now = time.monotonic()
+                    if now < self._next_input_time:
+                        metrics.dropped_frames.inc(stream="video", reason="fps")
+                        continue
+                    # Samples stay on their grid, unless the track paused for longer than a period
+                    period = 1.0 / self.video_input_q.fps
+                    start = self._next_input_time if now - self._next_input_time < period else now
+                    self._next_input_time = start + period
+                if self.video_input_q.latest:
+                    dropped = self.video_input_q.put_latest(ImageData(frame))
+                    if dropped:
+                        metrics.dropped_frames.inc(dropped, stream="video", reason="stale")
+                else:
+                    await self.video_input_q.put(ImageData(frame))
         except Exception as e:
             print("Error in video_frame_callback: ", e)
             raise asyncio.CancelledError
@@ -2,26 +2,34 @@ import asyncio
 import functools
 import inspect
 import logging
-from typing import Callable, List, Optional, Tuple, Union
+from typing import Callable, Optional, Tuple
 
+from realtime import session as sessions
 from realtime._realtime_function import RealtimeFunction
-from realtime.server import RealtimeServer
+from realtime.session import Session, SessionPool, close_all_sessions, install_task_factory
 from realtime.streaming_endpoint.AudioRTCDriver import AudioRTCDriver
 from realtime.streaming_endpoint.server import create_and_run_server
 from realtime.streaming_endpoint.TextRTCDriver import TextRTCDriver
 from realtime.streaming_endpoint.VideoRTCDriver import VideoRTCDriver
 from realtime.streams import AudioStream, TextStream, VideoStream
-from realtime.utils import tracing
+from realtime.utils import playout
 
 logger = logging.getLogger(__name__)
 
 
-def streaming_endpoint() -> Callable:
+def streaming_endpoint(text_batch_delay: float = 0.0, text_binary: bool = False) -> Callable:
     """
     Decorator for creating a streaming endpoint.
 
     This decorator wraps a function to set up and manage audio, video, and text streams
-    for real-time communication.
+    for real-time communication. Every offer starts a session, which calls the function
+    with fresh input streams to build its own pipeline, so one process serves many
+    concurrent connections, and closing a session only stops its own tasks.
+
+    Args:
+        text_batch_delay (float): Seconds the text output is collected for before it is sent
+            to the data channel as one message, or 0 to send every item on its own.
+        text_binary (bool): Send the text batches in the binary framing instead of JSON.
 
     Returns:
         Callable: A decorator function.
@@ -30,29 +38,42 @@ def streaming_endpoint() -> Callable:
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         async def wrapper(*args, **kwargs) -> None:
-            try:
+            # Tasks created while a session builds its pipeline belong to that session
+            install_task_factory()
+
+            async def build_pipeline() -> Tuple[AudioRTCDriver, VideoRTCDriver, TextRTCDriver]:
+                # Interrupts from the plugins flush the audio drivers of this pipeline
+                playout.start_outputs()
                 # Initialize input queues
                 audio_input_q: Optional[AudioStream] = None
                 video_input_q: Optional[VideoStream] = None
                 text_input_q: Optional[TextStream] = None
+                session_kwargs = dict(kwargs)
 
                 # Inspect the function signature and set up input streams
                 signature = inspect.signature(func)
                 parameters = signature.parameters
                 for name, param in parameters.items():
                     if param.annotation == AudioStream:
-                        audio_input_q = AudioStream()
-                        kwargs[name] = audio_input_q
+                        # A default stream declares the format the input audio is converted to
+                        if isinstance(param.default, AudioStream):
+                            audio_input_q = param.default.like()
+                        else:
+                            audio_input_q = AudioStream()
+                        session_kwargs[name] = audio_input_q
                     elif param.annotation == VideoStream:
-                        video_input_q = VideoStream()
-                        kwargs[name] = video_input_q
+                        # A default stream declares how many of the input frames are kept
+                        if isinstance(param.default, VideoStream):
+                            video_input_q = param.default.like()
+                        else:
+                            video_input_q = VideoStream()
+                        session_kwargs[name] = video_input_q
                     elif param.annotation == TextStream:
                         text_input_q = TextStream()
-                        kwargs[name] = text_input_q
+                        session_kwargs[name] = text_input_q
 
-                tracing.start()
                 # Call the wrapped function and get output streams
-                output_streams = await func(*args, **kwargs)
+                output_streams = await func(*args, **session_kwargs)
                 # Ensure output_streams is iterable
                 if not isinstance(output_streams, (list, tuple)):
                     output_streams = (output_streams,)
@@ -69,38 +90,43 @@ def streaming_endpoint() -> Callable:
 
                 # Set up RTC drivers for each stream type
                 video_output_frame_processor = VideoRTCDriver(video_input_q, vq)
-                # TODO: get audio_output_layout, audio_output_format, audio_output_sample_rate from SDP
+                # The output format is set from the SDP once the offer is answered
                 audio_output_frame_processor = AudioRTCDriver(audio_input_q, aq)
-                text_output_processor = TextRTCDriver(text_input_q, tq)
-
-                # Create and run the server
-                create_and_run_server(audio_output_frame_processor, video_output_frame_processor, text_output_processor)
-
-                # Create and run tasks for each processor
-                tasks = [
-                    asyncio.create_task(video_output_frame_processor.run_input()),
-                    asyncio.create_task(audio_output_frame_processor.run()),
-                    asyncio.create_task(text_output_processor.run_input()),
-                ]
-                await asyncio.gather(*tasks)
-
+                text_output_processor = TextRTCDriver(
+                    text_input_q, tq, batch_delay=text_batch_delay, binary=text_binary
+                )
+
+                # Run the processors for as long as the session
+                asyncio.create_task(video_output_frame_processor.run_input())
+                asyncio.create_task(audio_output_frame_processor.run())
+                asyncio.create_task(text_output_processor.run_input())
+                return audio_output_frame_processor, video_output_frame_processor, text_output_processor
+
+            async def create_session() -> Tuple[Session, AudioRTCDriver, VideoRTCDriver, TextRTCDriver]:
+                session = Session()
+                try:
+                    drivers = await session.run(build_pipeline())
+                except Exception:
+                    await session.close()
+                    raise
+                return (session, *drivers)
+
+            # Every offer gets a session with its own pipeline, built ahead of time with a pool
+            pool = None
+            if sessions.pool_size > 0:
+                pool = SessionPool(create_session, sessions.pool_size, sessions.pool_idle_timeout)
+                pool.start()
+                create_and_run_server(pool.get)
+            else:
+                create_and_run_server(create_session)
+            try:
+                await asyncio.Future()
             except asyncio.CancelledError:
-                logging.error("streaming_endpoint: CancelledError")
-            except Exception as e:
-                logging.error("Error in streaming_endpoint: ", e)
+                logging.info("streaming_endpoint: stopping")
             finally:
-                RealtimeServer().remove_connection()
-                tracing.end()
-                logging.info("Received exit, stopping bot")
-                # Clean up tasks
-                loop = asyncio.get_event_loop()
-                tasks = asyncio.all_tasks(loop)
-                for task in tasks:
-                    try:
-                        task.cancel()
-                        await task
-                    except asyncio.CancelledError:
-                        logging.info("Task was cancelled")
+                if pool is not None:
+                    await pool.close()
+                await close_all_sessions()
 
         rt_func = RealtimeFunction(wrapper)
         return rt_func
@@ -3,12 +3,14 @@ import logging
 import os
 import uuid
 from contextlib import asynccontextmanager
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 from aiortc import RTCPeerConnection, RTCSessionDescription
+from aiortc.sdp import SessionDescription
 from fastapi import HTTPException
 
 from realtime.server import RealtimeServer
+from realtime.session import close_all_sessions
 
 ROOT = os.path.dirname(__file__)
 
@@ -17,10 +19,39 @@ logger = logging.getLogger(__name__)
 pcs = set()
 
 
-def offer(audio_driver, video_driver, text_driver):
+def negotiated_audio_format(sdp: str) -> Optional[Tuple[int, str]]:
+    """
+    Return the sample rate and channel layout of the audio codec negotiated in an answer.
+
+    The first codec of the audio media is the one the sender encodes with, and its clock
+    rate and channel count are the format its encoder takes, e.g. 48kHz stereo for Opus
+    and 8kHz mono for PCMU and PCMA. G.722 is the exception: it advertises an 8kHz clock
+    rate, as RFC 3551 requires, but encodes 16kHz audio.
+
+    Args:
+        sdp (str): The SDP of the answer.
+
+    Returns:
+        Optional[Tuple[int, str]]: The sample rate and layout, or None without an audio codec.
+    """
+    for media in SessionDescription.parse(sdp).media:
+        if media.kind == "audio" and media.rtp.codecs:
+            codec = media.rtp.codecs[0]
+            sample_rate = 16000 if codec.mimeType.lower() == "audio/g722" else codec.clockRate
+            return sample_rate, "stereo" if codec.channels == 2 else "mono"
+    return None
+
+
+def offer(create_session):
     async def handshake(params: Dict[str, str]):
         offer = RTCSessionDescription(sdp=params["sdp"], type=params["type"])
 
+        try:
+            session, audio_driver, video_driver, text_driver = await create_session()
+        except Exception as e:
+            logger.error("Error creating a session: %s", e)
+            raise HTTPException(status_code=500, detail="Error creating a session")
+
         pc = RTCPeerConnection()
         pc_id = "PeerConnection(%s)" % uuid.uuid4()
         pcs.add(pc)
@@ -29,7 +60,16 @@ def offer(audio_driver, video_driver, text_driver):
         def log_info(msg, *args):
             logger.info(pc_id + " " + msg, *args)
 
-        # log_info("Created for %s", params["remote"])
+        log_info("Created for session %s", session.session_id)
+
+        async def close_peer_connection():
+            pcs.discard(pc)
+            await pc.close()
+            audio_driver.stop()
+            video_driver.stop()
+            RealtimeServer().remove_connection()
+
+        session.on_close(close_peer_connection)
 
         @pc.on("datachannel")
         def on_datachannel(channel):
@@ -42,9 +82,8 @@ def offer(audio_driver, video_driver, text_driver):
         @pc.on("connectionstatechange")
         async def on_connectionstatechange():
             log_info("Connection state is %s", pc.connectionState)
-            if pc.connectionState == "failed":
-                await pc.close()
-                pcs.discard(pc)
+            if pc.connectionState in ("failed", "closed"):
+                await session.close()
 
         # For some unknown reason, making this funciton async breaks aiortc
         @pc.on("track")
@@ -68,12 +107,17 @@ def offer(audio_driver, video_driver, text_driver):
             # send answer
             answer = await pc.createAnswer()
             await pc.setLocalDescription(answer)
+            # Produce the output audio in the format of the negotiated codec
+            audio_format = negotiated_audio_format(pc.localDescription.sdp)
+            if audio_format and audio_driver.audio_output_q:
+                sample_rate, layout = audio_format
+                audio_driver.set_output_format(sample_rate, layout)
+                log_info("Sending %s Hz %s audio", sample_rate, layout)
         except Exception as e:
             logger.error(
                 "Please check that the proper Audio and Video settings are enabled. Error handling offer: %s", e
             )
-            await pc.close()
-            pcs.discard(pc)
+            await session.close()
             raise HTTPException(
                 status_code=400,
                 detail="Please check that the proper Audio and Video settings are enabled.",
@@ -90,14 +134,15 @@ async def get_active_connection_ids():
 @asynccontextmanager
 async def on_shutdown():
     yield
-    # close peer connections
+    # close the sessions, and with them their peer connections
     logger.info("Closing peer connections")
+    await close_all_sessions()
     coros = [pc.close() for pc in pcs]
     await asyncio.gather(*coros)
     pcs.clear()
 
 
-def create_and_run_server(audio_driver, video_driver, text_driver):
+def create_and_run_server(create_session):
     fastapi_app = RealtimeServer().get_app()
-    fastapi_app.add_api_route("/offer", offer(audio_driver, video_driver, text_driver), methods=["POST"])
+    fastapi_app.add_api_route("/offer", offer(create_session), methods=["POST"])
     fastapi_app.add_event_handler("shutdown", on_shutdown)
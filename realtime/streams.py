@@ -1,5 +1,8 @@
 import asyncio
-from typing import Any, List
+import weakref
+from typing import Any, Callable, List, Optional
+
+from realtime.utils import turns
 
 
 class Stream(asyncio.Queue):
@@ -9,12 +12,23 @@ class Stream(asyncio.Queue):
     This class extends asyncio.Queue to provide a mechanism for creating and managing
     multiple copies (clones) of the stream, where any item added to the original stream
     is automatically added to all of its clones.
+
+    Every live stream is kept in ``Stream.instances`` so metrics can report queue depths.
+
+    Items carry the id of the turn they belong to. An item with a ``turn_id`` attribute,
+    like TextData and AudioData, carries its own, and plain items such as ``str`` carry
+    the turn of the context that put them, side by side in the queue. Getting an item
+    makes its turn the current turn of the consumer, so the events the consumer registers
+    and the items it puts downstream are attributed to the same turn.
     """
 
+    instances: "weakref.WeakSet[Stream]" = weakref.WeakSet()
+
     def __init__(self) -> None:
         """Initialize the Stream with an empty list of clones."""
         super().__init__()
         self._clones: List[Stream] = []
+        Stream.instances.add(self)
 
     async def put(self, item: Any) -> None:
         """
@@ -42,6 +56,39 @@ class Stream(asyncio.Queue):
         for clone in self._clones:
             clone.put_nowait(item)
 
+    def clear(self, keep: Optional[Callable[[Any], bool]] = None) -> int:
+        """
+        Drop the queued items of this stream, without changing the turn of the caller.
+
+        Args:
+            keep (Optional[Callable[[Any], bool]]): Returns True for the items to keep queued.
+
+        Returns:
+            int: The number of items dropped.
+        """
+        queued = list(self._queue)
+        self._queue.clear()
+        for entry in queued:
+            if keep is not None and keep(entry[1]):
+                self._queue.append(entry)
+        dropped = len(queued) - len(self._queue)
+        for _ in range(dropped):
+            self.task_done()
+        return dropped
+
+    def _put(self, item: Any) -> None:
+        turn_id = getattr(item, "turn_id", None)
+        if turn_id is None:
+            turn_id = turns.get_turn_id()
+            if hasattr(item, "turn_id"):
+                item.turn_id = turn_id
+        self._queue.append((turn_id, item))
+
+    def _get(self) -> Any:
+        turn_id, item = self._queue.popleft()
+        turns.set_turn_id(turn_id)
+        return item
+
 
 class AudioStream(Stream):
     """
@@ -49,19 +96,57 @@ class AudioStream(Stream):
 
     This class extends the Stream class to handle audio-specific properties
     such as sample rate.
+
+    The format of an input stream is the format its audio is converted to where it enters
+    the process, so every consumer receives it ready to use. Declare it with a stream as
+    the default value of the parameter, e.g. ``audio: AudioStream = AudioStream(16000)``.
+    With ``codec="opus"`` the audio is encoded once more, as an Ogg Opus stream, for
+    consumers that upload it, like DeepgramSTT with ``encoding="opus"``.
     """
 
     type: str = "audio"
 
-    def __init__(self, sample_rate: int = 8000) -> None:
+    def __init__(
+        self,
+        sample_rate: int = 8000,
+        layout: str = "mono",
+        format: str = "s16",
+        frame_duration: Optional[float] = 0.02,
+        codec: Optional[str] = None,
+    ) -> None:
         """
         Initialize the AudioStream with a given sample rate.
 
         Args:
             sample_rate (int, optional): The sample rate of the audio stream. Defaults to 8000.
+            layout (str, optional): The channel layout of the audio stream. Defaults to "mono".
+            format (str, optional): The sample format of the audio stream. Defaults to "s16".
+            frame_duration (Optional[float], optional): The duration of the frames in seconds,
+                or None to keep the frames as they arrive. Defaults to 0.02.
+            codec (Optional[str], optional): "opus" to carry Ogg Opus bytes instead of PCM
+                frames. Defaults to None.
         """
         super().__init__()
         self.sample_rate: int = sample_rate
+        self.layout: str = layout
+        self.format: str = format
+        self.frame_duration: Optional[float] = frame_duration
+        self.codec: Optional[str] = codec
+
+    def like(self) -> "AudioStream":
+        """
+        Create an empty AudioStream with the same audio format, not linked to this one.
+
+        Returns:
+            AudioStream: A new AudioStream instance with the format of the current one.
+        """
+        return AudioStream(
+            sample_rate=self.sample_rate,
+            layout=self.layout,
+            format=self.format,
+            frame_duration=self.frame_duration,
+            codec=self.codec,
+        )
 
     def clone(self) -> "AudioStream":
         """
@@ -70,16 +155,62 @@ class AudioStream(Stream):
         Returns:
             AudioStream: A new AudioStream instance that is a clone of the current one.
         """
-        clone = AudioStream(sample_rate=self.sample_rate)
+        clone = self.like()
         self._clones.append(clone)
         return clone
 
 
 class VideoStream(Stream):
-    """A specialized Stream for video data."""
+    """
+    A specialized Stream for video data.
+
+    An input stream can ask for fewer frames than the camera sends, so a slow consumer
+    never works through a backlog of stale frames: with ``latest`` only the newest frame
+    is kept queued, and with ``fps`` frames are sampled at that rate at most. Declare it
+    with a stream as the default value of the parameter, e.g.
+    ``video: VideoStream = VideoStream(latest=True, fps=2)``.
+    """
 
     type: str = "video"
 
+    def __init__(self, latest: bool = False, fps: Optional[float] = None) -> None:
+        """
+        Initialize the VideoStream.
+
+        Args:
+            latest (bool, optional): Keep only the newest input frame queued. Defaults to False.
+            fps (Optional[float], optional): The maximum rate of input frames, or None to keep
+                them all. Defaults to None.
+        """
+        super().__init__()
+        self.latest: bool = latest
+        self.fps: Optional[float] = fps
+
+    def put_latest(self, item: Any) -> int:
+        """
+        Put an item in all queues of all instances, replacing the items still queued.
+
+        Args:
+            item (Any): The item to be added to the queue and all its clones.
+
+        Returns:
+            int: The number of items dropped from the queue and all its clones.
+        """
+        dropped = self.clear()
+        asyncio.Queue.put_nowait(self, item)
+        for clone in self._clones:
+            dropped += clone.put_latest(item)
+        return dropped
+
+    def like(self) -> "VideoStream":
+        """
+        Create an empty VideoStream with the same input options, not linked to this one.
+
+        Returns:
+            VideoStream: A new VideoStream instance with the options of the current one.
+        """
+        return VideoStream(latest=self.latest, fps=self.fps)
+
     def clone(self) -> "VideoStream":
         """
         Create a copy of this VideoStream.
@@ -87,7 +218,7 @@ class VideoStream(Stream):
         Returns:
             VideoStream: A new VideoStream instance that is a clone of the current one.
         """
-        clone = VideoStream()
+        clone = self.like()
         self._clones.append(clone)
         return clone
 
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from realtime.utils import tracing
+from realtime.utils.tracing import CODES, Event, Metric, Tracer
+
+logger = logging.getLogger(__name__)
+
+# Environment variable naming a directory every ended session is dumped to
+TRACE_DIR_ENV = "REALTIME_TRACE_DIR"
+
+# Spans drawn for every session, as (name, lane, start event, end event)
+SPANS: Tuple[Tuple[str, str, Event, Event], ...] = (
+    ("transcription", "stt", Event.USER_SPEECH_END, Event.TRANSCRIPTION_RECEIVED),
+    ("llm", "llm", Event.LLM_START, Event.LLM_END),
+    ("llm ttfb", "llm", Event.LLM_START, Event.LLM_TTFB),
+    ("tts", "tts", Event.TTS_START, Event.TTS_END),
+    ("tts ttfb", "tts", Event.TTS_START, Event.TTS_TTFB),
+    ("playout", "audio", Event.AUDIO_FIRST_SENT, Event.AUDIO_LAST_SENT),
+)
+
+# Time an output waits before the next stage picks it up, as (name, start event, end event)
+QUEUE_WAITS: Tuple[Tuple[str, Event, Event], ...] = (
+    ("stt -> llm", Event.TRANSCRIPTION_RECEIVED, Event.LLM_START),
+    ("llm -> tts", Event.LLM_TTFB, Event.TTS_START),
+    ("tts -> wire", Event.TTS_TTFB, Event.AUDIO_FIRST_SENT),
+)
+
+# Track of every lane within a session, top to bottom
+LANES: Dict[str, int] = {"session": 0, "turn": 1, "stt": 2, "llm": 3, "tts": 4, "audio": 5, "queue": 6}
+
+
+def _complete(name: str, pid: int, lane: str, start_ns: int, end_ns: int, **args) -> Dict:
+    return {
+        "name": name,
+        "cat": lane,
+        "ph": "X",
+        "pid": pid,
+        "tid": LANES[lane],
+        "ts": start_ns / 1000,
+        "dur": max(0, end_ns - start_ns) / 1000,
+        "args": args,
+    }
+
+
+def session_trace_events(session_tracer: Tracer, pid: int) -> List[Dict]:
+    """
+    Convert the event log of a session to Chrome Trace Event Format events.
+
+    The session is one process in the trace, with a thread per lane: the whole session,
+    its turns, one lane per plugin stage and the queue waits between stages. Every start
+    event is paired with the next end event of its span in the same turn, so stages that
+    run several times per turn, e.g. one TTS request per sentence, get a span each, and
+    overlapping turns do not steal each other's events. Records without a turn id are
+    split into turns at every ``Event.USER_SPEECH_END`` instead.
+
+    Args:
+        session_tracer (Tracer): The session.
+        pid (int): The process id of the session in the trace.
+
+    Returns:
+        List[Dict]: The trace events.
+    """
+    records = session_tracer.log.records().tolist()
+    trace_events: List[Dict] = [
+        {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"session {session_tracer.session_id}"}},
+        {"name": "process_sort_index", "ph": "M", "pid": pid, "args": {"sort_index": pid}},
+    ]
+    for lane, tid in LANES.items():
+        trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": lane}})
+        trace_events.append(
+            {"name": "thread_sort_index", "ph": "M", "pid": pid, "tid": tid, "args": {"sort_index": tid}}
+        )
+    if not records:
+        return trace_events
+
+    # Open spans and stage outputs by turn id, 0 for the records without one
+    open_spans: Dict[Tuple[str, int], List[int]] = {}
+    last_output: Dict[Tuple[Event, int], int] = {}
+    # First and last record time of every turn with an id
+    turn_bounds: Dict[int, List[int]] = {}
+    turn_start: Optional[int] = None
+    turn = 0
+    for time_ns, code, value, turn_id in records:
+        key = CODES[code]
+        if turn_id:
+            turn_bounds.setdefault(turn_id, [time_ns, time_ns])[1] = time_ns
+        if isinstance(key, Metric):
+            trace_events.append(
+                {"name": key.value, "ph": "C", "pid": pid, "ts": time_ns / 1000, "args": {key.value: value}}
+            )
+            continue
+        if key == Event.USER_SPEECH_END and not turn_id:
+            if turn_start is not None:
+                trace_events.append(_complete(f"turn {turn}", pid, "turn", turn_start, time_ns))
+            turn_start, turn = time_ns, turn + 1
+        span_turn = turn_id or turn
+        for name, lane, start_event, end_event in SPANS:
+            if key == start_event:
+                open_spans.setdefault((name, turn_id), []).append(time_ns)
+            elif key == end_event and open_spans.get((name, turn_id)):
+                start_ns = open_spans[(name, turn_id)].pop(0)
+                trace_events.append(_complete(name, pid, lane, start_ns, time_ns, turn=span_turn))
+        for name, start_event, end_event in QUEUE_WAITS:
+            if key == end_event and (start_event, turn_id) in last_output:
+                start_ns = last_output.pop((start_event, turn_id))
+                trace_events.append(_complete(name, pid, "queue", start_ns, time_ns, turn=span_turn))
+        if any(key == start_event for _, start_event, _ in QUEUE_WAITS):
+            last_output[(key, turn_id)] = time_ns
+
+    first_ns, last_ns = records[0][0], records[-1][0]
+    if turn_start is not None:
+        trace_events.append(_complete(f"turn {turn}", pid, "turn", turn_start, last_ns))
+    for turn_id, (start_ns, end_ns) in turn_bounds.items():
+        trace_events.append(_complete(f"turn {turn_id}", pid, "turn", start_ns, end_ns, turn=turn_id))
+    trace_events.append(_complete(f"session {session_tracer.session_id}", pid, "session", first_ns, last_ns))
+    return trace_events
+
+
+def export_chrome_trace(session_tracers: Optional[Iterable[Tracer]] = None) -> Dict:
+    """
+    Export sessions in the Chrome Trace Event Format, which Perfetto and chrome://tracing load.
+
+    Args:
+        session_tracers (Optional[Iterable[Tracer]]): The sessions to export. Defaults to the
+            running sessions and the recently ended ones.
+
+    Returns:
+        Dict: The JSON object trace.
+    """
+    if session_tracers is None:
+        session_tracers = [*tracing.ended_sessions, *tracing.sessions.values()]
+    trace_events: List[Dict] = []
+    for pid, session_tracer in enumerate(session_tracers, start=1):
+        trace_events.extend(session_trace_events(session_tracer, pid))
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def dump_chrome_trace(path: str, session_tracers: Optional[Iterable[Tracer]] = None) -> str:
+    """
+    Write sessions to a Chrome Trace Event Format JSON file.
+
+    Args:
+        path (str): The file to write.
+        session_tracers (Optional[Iterable[Tracer]]): The sessions to export. Defaults to the
+            running sessions and the recently ended ones.
+
+    Returns:
+        str: The path written.
+    """
+    with open(path, "w") as trace_file:
+        json.dump(export_chrome_trace(session_tracers), trace_file)
+    return path
+
+
+def dump_session_trace(session_tracer: Tracer) -> Optional[str]:
+    """
+    Dump a session to ``$REALTIME_TRACE_DIR/<session id>.trace.json`` if the variable is set.
+
+    Args:
+        session_tracer (Tracer): The session.
+
+    Returns:
+        Optional[str]: The path written, or None.
+    """
+    trace_dir = os.environ.get(TRACE_DIR_ENV)
+    if not trace_dir:
+        return None
+    try:
+        os.makedirs(trace_dir, exist_ok=True)
+        return dump_chrome_trace(os.path.join(trace_dir, f"{session_tracer.session_id}.trace.json"), [session_tracer])
+    except OSError as e:
+        logger.error("Error dumping the trace of session %s: %s", session_tracer.session_id, e)
+        return None
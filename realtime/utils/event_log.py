@@ -0,0 +1,78 @@
+import numpy as np
+
+RECORD_DTYPE = np.dtype([("time_ns", np.int64), ("code", np.int16), ("value", np.float64), ("turn_id", np.int32)])
+
+
+class EventLog:
+    """
+    A fixed-capacity ring buffer of compact event records.
+
+    Every record holds an int64 timestamp in nanoseconds, an int16 event code, a float64
+    value and the int32 id of its turn, 22 bytes in a preallocated numpy structured
+    array. Once the buffer is full the oldest records are overwritten, so memory stays
+    constant however long the session runs. Records are addressed by a sequence number
+    that keeps increasing across wrap-arounds, which lets callers remember where a range
+    of records started.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        """
+        Initialize the EventLog.
+
+        Args:
+            capacity (int): Maximum number of records kept.
+        """
+        if capacity <= 0:
+            raise ValueError("EventLog capacity must be positive")
+        self.capacity: int = capacity
+        self._records: np.ndarray = np.zeros(capacity, dtype=RECORD_DTYPE)
+        # Sequence number of the next record
+        self.next_seq: int = 0
+
+    def __len__(self) -> int:
+        return min(self.next_seq, self.capacity)
+
+    @property
+    def oldest_seq(self) -> int:
+        """Sequence number of the oldest record still in the buffer."""
+        return max(0, self.next_seq - self.capacity)
+
+    def append(self, time_ns: int, code: int, value: float = np.nan, turn_id: int = 0) -> int:
+        """
+        Append a record, overwriting the oldest one when the buffer is full.
+
+        Args:
+            time_ns (int): The timestamp in nanoseconds.
+            code (int): The event code.
+            value (float): The value of the record, NaN when it has none.
+            turn_id (int): The id of the turn of the record, 0 when it has none.
+
+        Returns:
+            int: The sequence number of the record.
+        """
+        seq = self.next_seq
+        self._records[seq % self.capacity] = (time_ns, code, value, turn_id)
+        self.next_seq += 1
+        return seq
+
+    def records(self, since_seq: int = 0) -> np.ndarray:
+        """
+        Return the records from a sequence number on, oldest first.
+
+        Args:
+            since_seq (int): The first sequence number wanted. Records that were already
+                overwritten are skipped.
+
+        Returns:
+            np.ndarray: A copy of the records, with the RECORD_DTYPE fields.
+        """
+        start = max(since_seq, self.oldest_seq)
+        if start >= self.next_seq:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        first, last = start % self.capacity, self.next_seq % self.capacity
+        if first < last:
+            return self._records[first:last].copy()
+        return np.concatenate((self._records[first:], self._records[:last]))
+
+    def clear(self) -> None:
+        self.next_seq = 0
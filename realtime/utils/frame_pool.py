@@ -0,0 +1,213 @@
+import io
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, List, Optional, Tuple, TypeVar, Union
+
+import numpy as np
+from av import AudioFrame, VideoFrame
+from PIL import Image
+
+FrameT = TypeVar("FrameT", AudioFrame, VideoFrame)
+
+_SAMPLE_DTYPES = {
+    "u8": np.uint8,
+    "s16": np.int16,
+    "s32": np.int32,
+    "flt": np.float32,
+    "dbl": np.float64,
+}
+
+_PACKED_PIXEL_CHANNELS = {
+    "gray": 1,
+    "rgb24": 3,
+    "bgr24": 3,
+    "rgba": 4,
+    "bgra": 4,
+}
+
+
+class FramePool(Generic[FrameT]):
+    """
+    A pool of reusable frames and writable ndarray views into their planes.
+
+    Frames are grouped by a key describing their layout. ``acquire`` hands out a free
+    frame for a key, or allocates one, and ``release`` returns it so the next caller can
+    overwrite it. A frame must not be written to after it is released. At most
+    ``max_free`` frames are kept per key and at most ``max_keys`` keys are kept, the
+    least recently used key being dropped first.
+    """
+
+    def __init__(self, max_free: int = 4, max_keys: int = 8):
+        """
+        Initialize the FramePool.
+
+        Args:
+            max_free (int): Maximum number of free frames kept per key.
+            max_keys (int): Maximum number of keys with free frames kept.
+        """
+        self.max_free: int = max_free
+        self.max_keys: int = max_keys
+        self._free: "OrderedDict[Hashable, List[Tuple[FrameT, object]]]" = OrderedDict()
+        self._in_use: Dict[int, Tuple[Hashable, FrameT, object]] = {}
+        self.allocated: int = 0
+        self.reused: int = 0
+
+    def _allocate(self, key: Hashable) -> Tuple[FrameT, object]:
+        raise NotImplementedError
+
+    def _acquire(self, key: Hashable) -> Tuple[FrameT, object]:
+        free = self._free.get(key)
+        if free:
+            self._free.move_to_end(key)
+            frame, view = free.pop()
+            self.reused += 1
+        else:
+            frame, view = self._allocate(key)
+            self.allocated += 1
+        self._in_use[id(frame)] = (key, frame, view)
+        return frame, view
+
+    def release(self, frame: FrameT) -> bool:
+        """
+        Return a frame to the pool.
+
+        Args:
+            frame (FrameT): A frame returned by ``acquire``.
+
+        Returns:
+            bool: True if the frame belonged to the pool, False if it was ignored.
+        """
+        entry = self._in_use.pop(id(frame), None)
+        if entry is None:
+            return False
+        key, frame, view = entry
+        free = self._free.setdefault(key, [])
+        self._free.move_to_end(key)
+        if len(free) < self.max_free:
+            free.append((frame, view))
+        while len(self._free) > self.max_keys:
+            self._free.popitem(last=False)
+        return True
+
+    def clear(self) -> None:
+        """Drop all free frames and forget the frames in use, which are then never reused."""
+        self._free.clear()
+        self._in_use.clear()
+
+    @property
+    def in_use(self) -> int:
+        return len(self._in_use)
+
+
+class AudioFramePool(FramePool[AudioFrame]):
+    """A pool of AudioFrames keyed by sample format, layout, number of samples and sample rate."""
+
+    def acquire(
+        self, samples: int, sample_rate: int, format: str = "s16", layout: str = "mono"
+    ) -> Tuple[AudioFrame, np.ndarray]:
+        """
+        Acquire an audio frame and a writable view of its samples.
+
+        Args:
+            samples (int): Number of samples per channel.
+            sample_rate (int): The sample rate in Hz.
+            format (str): A packed sample format, one of 'u8', 's16', 's32', 'flt' or 'dbl'.
+            layout (str): The channel layout, e.g. 'mono' or 'stereo'.
+
+        Returns:
+            Tuple[AudioFrame, np.ndarray]: The frame and a (1, samples * channels) view of its
+                interleaved samples, shaped like ``AudioFrame.to_ndarray()``.
+
+        Raises:
+            ValueError: If the format is not a supported packed format.
+        """
+        if format not in _SAMPLE_DTYPES:
+            raise ValueError(f"Unsupported pooled audio format: {format}")
+        frame, view = self._acquire((format, layout, samples, sample_rate))
+        frame.pts = None
+        return frame, view
+
+    def _allocate(self, key: Hashable) -> Tuple[AudioFrame, np.ndarray]:
+        format, layout, samples, sample_rate = key
+        frame = AudioFrame(format=format, layout=layout, samples=samples)
+        frame.sample_rate = sample_rate
+        channels = len(frame.layout.channels)
+        view = np.frombuffer(frame.planes[0], _SAMPLE_DTYPES[format])[: samples * channels].reshape(1, -1)
+        return frame, view
+
+
+class VideoFramePool(FramePool[VideoFrame]):
+    """A pool of VideoFrames keyed by pixel format and resolution."""
+
+    def __init__(self, max_free: int = 4, max_keys: int = 8):
+        super().__init__(max_free=max_free, max_keys=max_keys)
+        self._decoded: Optional[Tuple[bytes, np.ndarray]] = None
+
+    def acquire(
+        self, width: int, height: int, format: str = "rgb24"
+    ) -> Tuple[VideoFrame, Union[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+        """
+        Acquire a video frame and writable views of its pixels.
+
+        Args:
+            width (int): The frame width in pixels.
+            height (int): The frame height in pixels.
+            format (str): One of 'gray', 'rgb24', 'bgr24', 'rgba', 'bgra' or 'yuv420p'.
+
+        Returns:
+            Tuple[VideoFrame, Union[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]]: The frame and
+                an (h, w, channels) view for packed formats, or the (y, u, v) plane views for yuv420p.
+
+        Raises:
+            ValueError: If the format is not supported.
+        """
+        if format != "yuv420p" and format not in _PACKED_PIXEL_CHANNELS:
+            raise ValueError(f"Unsupported pooled video format: {format}")
+        frame, view = self._acquire((format, width, height))
+        frame.pts = None
+        return frame, view
+
+    def _allocate(self, key: Hashable) -> Tuple[VideoFrame, object]:
+        format, width, height = key
+        frame = VideoFrame(width, height, format)
+        if format == "yuv420p":
+            y, u, v = frame.planes
+            view = (
+                _plane_view(y, width, height),
+                _plane_view(u, width // 2, height // 2),
+                _plane_view(v, width // 2, height // 2),
+            )
+        else:
+            channels = _PACKED_PIXEL_CHANNELS[format]
+            plane = frame.planes[0]
+            # Rows may be padded, so stride over the plane instead of reshaping a slice, which would copy
+            view = np.ndarray((height, width, channels), np.uint8, buffer=plane, strides=(plane.line_size, channels, 1))
+        return frame, view
+
+    def decode_image(self, data: bytes, format: str = "jpeg") -> np.ndarray:
+        """
+        Decode an encoded image to an rgb24 array, reusing the last result for identical bytes.
+
+        Video sources often repeat the same encoded image, e.g. an idle avatar, so the last
+        decoded image is kept and returned while the bytes do not change.
+
+        Args:
+            data (bytes): The encoded image.
+            format (str): The PIL format of the image.
+
+        Returns:
+            np.ndarray: The (h, w, 3) decoded image. It must not be modified.
+        """
+        if self._decoded is not None and (self._decoded[0] is data or self._decoded[0] == data):
+            return self._decoded[1]
+        with Image.open(io.BytesIO(data), formats=[format]) as image:
+            array = np.asarray(image.convert("RGB"))
+        self._decoded = (data, array)
+        return array
+
+    def clear(self) -> None:
+        super().clear()
+        self._decoded = None
+
+
+def _plane_view(plane, width: int, height: int) -> np.ndarray:
+    return np.frombuffer(plane, np.uint8).reshape(-1, plane.line_size)[:height, :width]
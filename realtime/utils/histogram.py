@@ -0,0 +1,170 @@
+import math
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class LatencyHistogram:
+    """
+    A fixed-memory histogram of latencies with logarithmic buckets.
+
+    Like an HDR histogram, bucket boundaries grow geometrically, so every recorded value
+    is known within ``precision`` (relative) from ``min_value`` to ``max_value`` in a
+    few hundred counters, however many values are recorded. Values outside the range
+    are clamped into the first and last bucket.
+
+    The cumulative view covers every recorded value. When ``window_seconds`` is set the
+    histogram also keeps ``window_slots`` rotating sub-histograms, which give a sliding
+    window view over roughly the last ``window_seconds``.
+    """
+
+    def __init__(
+        self,
+        min_value: float = 1e-3,
+        max_value: float = 300.0,
+        precision: float = 0.03,
+        window_seconds: Optional[float] = None,
+        window_slots: int = 6,
+    ):
+        """
+        Initialize the LatencyHistogram.
+
+        Args:
+            min_value (float): The smallest value tracked with full precision, in seconds.
+            max_value (float): The largest value tracked with full precision, in seconds.
+            precision (float): The relative width of a bucket, e.g. 0.03 for 3%.
+            window_seconds (Optional[float]): The length of the sliding window. Disabled when None.
+            window_slots (int): Number of sub-histograms the sliding window rotates through.
+        """
+        self.min_value: float = min_value
+        self.max_value: float = max_value
+        self._log_min: float = math.log(min_value)
+        self._log_growth: float = math.log1p(precision)
+        # Bucket 0 holds values below min_value, the last bucket values above max_value
+        self.num_buckets: int = int(math.ceil((math.log(max_value) - self._log_min) / self._log_growth)) + 2
+        self._counts: np.ndarray = np.zeros(self.num_buckets, dtype=np.uint64)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+        self.window_seconds: Optional[float] = window_seconds
+        if window_seconds is not None:
+            self._slot_seconds: float = window_seconds / window_slots
+            self._slot_counts: np.ndarray = np.zeros((window_slots, self.num_buckets), dtype=np.uint32)
+            self._slot_max: np.ndarray = np.zeros(window_slots)
+            self._slot: Optional[int] = None
+
+    def bucket_index(self, value: float) -> int:
+        if value < self.min_value:
+            return 0
+        return min(self.num_buckets - 1, 1 + int((math.log(value) - self._log_min) / self._log_growth))
+
+    def bucket_value(self, index: int) -> float:
+        """Return the upper bound of a bucket, so percentiles never under-report."""
+        if index == 0:
+            return self.min_value
+        return math.exp(self._log_min + index * self._log_growth)
+
+    def bucket_upper_bounds(self) -> np.ndarray:
+        """Return the upper bound of every bucket."""
+        bounds = np.exp(self._log_min + np.arange(self.num_buckets) * self._log_growth)
+        bounds[0] = self.min_value
+        return bounds
+
+    def record(self, value: float, now: Optional[float] = None) -> None:
+        """
+        Record a value.
+
+        Args:
+            value (float): The value in seconds.
+            now (Optional[float]): The current time, used by the sliding window. Defaults to time.monotonic().
+        """
+        index = self.bucket_index(value)
+        self._counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if self.window_seconds is not None:
+            slot = self._advance(now)
+            self._slot_counts[slot, index] += 1
+            if value > self._slot_max[slot]:
+                self._slot_max[slot] = value
+
+    def _advance(self, now: Optional[float]) -> int:
+        """Rotate the window to the current time and return the current slot."""
+        slot = int((time.monotonic() if now is None else now) // self._slot_seconds)
+        slots = len(self._slot_counts)
+        if slot == self._slot:
+            return slot % slots
+        if self._slot is None or slot - self._slot >= slots:
+            self._slot_counts[:] = 0
+            self._slot_max[:] = 0
+        else:
+            for stale in range(self._slot + 1, slot + 1):
+                self._slot_counts[stale % slots] = 0
+                self._slot_max[stale % slots] = 0
+        if self._slot is None or slot > self._slot:
+            self._slot = slot
+        return self._slot % slots
+
+    def _view(self, window: bool, now: Optional[float]):
+        if not window:
+            return self._counts, self.max
+        if self.window_seconds is None:
+            raise ValueError("The histogram has no sliding window")
+        self._advance(now)
+        return self._slot_counts.sum(axis=0, dtype=np.uint64), float(self._slot_max.max())
+
+    def percentiles(
+        self, percentiles: Iterable[float] = DEFAULT_PERCENTILES, window: bool = False, now: Optional[float] = None
+    ) -> Dict[str, float]:
+        """
+        Compute percentiles and the maximum.
+
+        Args:
+            percentiles (Iterable[float]): The percentiles to compute, in [0, 100].
+            window (bool): Use the sliding window instead of every recorded value.
+            now (Optional[float]): The current time for the sliding window.
+
+        Returns:
+            Dict[str, float]: 'count', 'max' and 'p<percentile>' for each percentile. Percentiles
+                are 0.0 when nothing was recorded.
+        """
+        counts, maximum = self._view(window, now)
+        cumulative = np.cumsum(counts)
+        total = int(cumulative[-1])
+        summary = {"count": float(total)}
+        for percentile in percentiles:
+            if total == 0:
+                value = 0.0
+            else:
+                rank = max(1, math.ceil(percentile / 100 * total))
+                value = min(self.bucket_value(int(np.searchsorted(cumulative, rank))), maximum)
+            summary[f"p{percentile:g}"] = value
+        summary["max"] = maximum
+        return summary
+
+    def percentile(self, percentile: float, window: bool = False, now: Optional[float] = None) -> float:
+        return self.percentiles((percentile,), window=window, now=now)[f"p{percentile:g}"]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def bucket_counts(self, window: bool = False, now: Optional[float] = None) -> np.ndarray:
+        """Return a copy of the count of every bucket."""
+        return self._view(window, now)[0].copy()
+
+    def reset(self) -> None:
+        self._counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        if self.window_seconds is not None:
+            self._slot_counts[:] = 0
+            self._slot_max[:] = 0
+            self._slot = None
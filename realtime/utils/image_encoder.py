@@ -0,0 +1,134 @@
+import asyncio
+import base64
+import io
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from realtime.utils import tracing
+
+logger = logging.getLogger(__name__)
+
+# PIL formats whose size depends on the quality option
+QUALITY_FORMATS = ("jpeg", "jpg", "webp")
+
+
+class ImageEncoder:
+    """
+    Encodes images for vision model requests off the event loop.
+
+    Images are downscaled to fit a target resolution and encoded in a thread pool. When
+    the result exceeds the byte budget the quality is lowered step by step, for the formats
+    that have one, and after that the image is downscaled further, until the payload fits.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[Tuple[int, int]] = (1024, 1024),
+        quality: int = 85,
+        min_quality: int = 55,
+        max_bytes: Optional[int] = 200_000,
+        format: str = "jpeg",
+        max_workers: int = 1,
+    ):
+        """
+        Initialize the ImageEncoder.
+
+        Args:
+            max_size (Optional[Tuple[int, int]]): The (width, height) box the image is scaled to fit. None keeps the size.
+            quality (int): The initial encoder quality.
+            min_quality (int): The lowest quality used before downscaling further.
+            max_bytes (Optional[int]): The byte budget of the encoded image. None disables the budget.
+            format (str): The PIL format to encode to.
+            max_workers (int): Number of encoder threads.
+        """
+        self.max_size: Optional[Tuple[int, int]] = max_size
+        self.quality: int = quality
+        self.min_quality: int = min(min_quality, quality)
+        self.max_bytes: Optional[int] = max_bytes
+        self.format: str = format
+        self.thread_pool_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image_encoder")
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.format.lower()}"
+
+    async def encode(self, image: Image.Image) -> bytes:
+        """
+        Encode an image in the thread pool.
+
+        The encode time and the number of bytes are reported to tracing.
+
+        Args:
+            image (Image.Image): The image to encode. It is not modified.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        start_time = time.time()
+        data = await asyncio.get_event_loop().run_in_executor(self.thread_pool_executor, self.encode_sync, image)
+        tracing.register_metric(tracing.Metric.IMAGE_ENCODE_MS, (time.time() - start_time) * 1000)
+        tracing.register_metric(tracing.Metric.IMAGE_ENCODE_BYTES, len(data))
+        return data
+
+    async def encode_to_url(self, image: Image.Image) -> str:
+        """
+        Encode an image in the thread pool to a base64 data URL.
+
+        Args:
+            image (Image.Image): The image to encode.
+
+        Returns:
+            str: The data URL.
+        """
+        data = await self.encode(image)
+        with tracing.span("base64_encode"):
+            return f"data:{self.mime_type};base64,{base64.b64encode(data).decode()}"
+
+    def encode_sync(self, image: Image.Image) -> bytes:
+        """
+        Encode an image on the calling thread, fitting it to the size and byte budget.
+
+        Args:
+            image (Image.Image): The image to encode.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        if self.max_size is not None:
+            scale = min(self.max_size[0] / image.width, self.max_size[1] / image.height)
+            if scale < 1:
+                image = self._resize(image, scale)
+
+        quality = self.quality
+        data = self._save(image, quality)
+        lossy = self.format.lower() in QUALITY_FORMATS
+        while self.max_bytes is not None and len(data) > self.max_bytes:
+            if lossy and quality > self.min_quality:
+                quality = max(self.min_quality, quality - 10)
+            elif min(image.size) > 64:
+                # Bytes scale roughly with the pixel count
+                image = self._resize(image, max(0.5, 0.9 * math.sqrt(self.max_bytes / len(data))))
+            else:
+                logger.warning("Image encoder could not fit %s bytes into %s bytes", len(data), self.max_bytes)
+                break
+            data = self._save(image, quality)
+        return data
+
+    def _save(self, image: Image.Image, quality: int) -> bytes:
+        with io.BytesIO() as buffer:
+            image.save(buffer, format=self.format, quality=quality)
+            return buffer.getvalue()
+
+    @staticmethod
+    def _resize(image: Image.Image, scale: float) -> Image.Image:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+    def close(self) -> None:
+        """Shut down the encoder threads."""
+        self.thread_pool_executor.shutdown(wait=False)
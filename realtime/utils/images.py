@@ -4,6 +4,9 @@ import io
 import numpy as np
 from PIL import Image
 
+from realtime.utils import tracing
+from realtime.utils.yuv420 import yuv420_planes
+
 
 def convert_image_to_url(image: Image.Image, format: str = "jpeg") -> str:
     """Encode a pillow image object to a data URL with the specified format."""
@@ -54,22 +57,15 @@ def image_hamming_distance(img1: Image.Image, img2: Image.Image):
     return diffMag
 
 
+@tracing.traced
 def convert_yuv420_to_pil(frame):
-    data = frame.to_ndarray(format="yuv420p")
-    w, h = data.shape[1], round(data.shape[0] * 2 / 3)
-    data1d = data.reshape(-1)
-
-    # Extract Y, U, and V channels
-    Y_end = w * h
-    Y = data1d[:Y_end].reshape(h, w)
-    U_end = Y_end + (w // 2) * (h // 2)
-    U = data1d[Y_end:U_end].reshape((h // 2, w // 2))
-    V = data1d[U_end:].reshape((h // 2, w // 2))
-
-    # Upsample U and V channels
-    U_upsampled = U.repeat(2, axis=0).repeat(2, axis=1)
-    V_upsampled = V.repeat(2, axis=0).repeat(2, axis=1)
-
-    # Stack the channels
-    ycbcr_image = np.stack([Y, U_upsampled, V_upsampled], axis=-1)
+    Y, U, V = yuv420_planes(frame)
+    h, w = Y.shape[0] & ~1, Y.shape[1] & ~1
+
+    # Write the channels into one buffer, broadcasting U and V over each 2x2 block
+    ycbcr_image = np.empty((h, w, 3), dtype=np.uint8)
+    ycbcr_image[..., 0] = Y[:h, :w]
+    blocks = ycbcr_image.reshape(h // 2, 2, w // 2, 2, 3)
+    blocks[..., 1] = U[: h // 2, : w // 2][:, None, :, None]
+    blocks[..., 2] = V[: h // 2, : w // 2][:, None, :, None]
     return Image.fromarray(ycbcr_image, "YCbCr")
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from av import AudioFrame
+
+from realtime.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AudioJitterBuffer:
+    """
+    An output jitter buffer pacing audio frames at their real-time rate.
+
+    Producers ``put`` frames as they arrive, often in bursts, and mark the end of every turn
+    with ``end_turn``. ``get`` returns the frames one frame duration apart, against deadlines
+    on the ``loop.time()`` clock: every deadline follows the previous one, not the time the
+    previous sleep actually ended, so sleep overshoot is caught up on the next frame instead
+    of accumulating into drift. A consumer that falls more than ``max_lag`` behind, e.g.
+    after the loop was blocked, is resynchronized to the current time.
+
+    Playback of a turn, or resumption after an underrun, waits until ``target_depth`` seconds
+    are buffered, the turn is complete, or ``target_depth`` seconds have passed. The target
+    adapts to the producer: it rises to the largest lag seen between the arrival of a frame
+    and the time it would have been played had playback started at the first frame of its
+    turn, and decays by ``decay`` at the end of every turn, within [min_depth, max_depth].
+
+    When ``get`` is given an idle frame, typically silence, it returns that frame at the
+    same cadence whenever there is nothing to play, between turns, while a turn buffers and
+    on underruns, so the output never stalls and the deadlines never have to be reset.
+
+    An underrun is a frame the consumer asked for while a turn was being played and none
+    was buffered, an overrun a frame buffered beyond ``capacity`` seconds. Overruns are only
+    counted: the audio is a reply the user has to hear, so nothing is dropped.
+    """
+
+    def __init__(
+        self,
+        min_depth: float = 0.02,
+        max_depth: float = 0.3,
+        initial_depth: float = 0.06,
+        decay: float = 0.9,
+        max_lag: float = 0.1,
+        capacity: float = 30.0,
+    ):
+        """
+        Initialize the AudioJitterBuffer.
+
+        Args:
+            min_depth (float): Smallest target depth in seconds.
+            max_depth (float): Largest target depth in seconds.
+            initial_depth (float): Target depth in seconds before any burst was measured.
+            decay (float): Factor applied to the target depth at the end of every turn.
+            max_lag (float): Seconds the consumer may fall behind its deadlines before it is resynchronized.
+            capacity (float): Seconds of audio buffered beyond which frames count as overruns.
+        """
+        self.min_depth: float = min_depth
+        self.max_depth: float = max_depth
+        self.target_depth: float = initial_depth
+        self.decay: float = decay
+        self.max_lag: float = max_lag
+        self.capacity: float = capacity
+        # Seconds of audio buffered
+        self.depth: float = 0.0
+        self.underruns: int = 0
+        self.overruns: int = 0
+        self.resyncs: int = 0
+
+        self._entries: Deque[Tuple[Optional[AudioFrame], Optional[int]]] = deque()
+        self._turn_ends: int = 0
+        self._data_event: asyncio.Event = asyncio.Event()
+        self._playing: bool = False
+        self._buffering_since: Optional[float] = None
+        self._deadline: Optional[float] = None
+        self._arrival_start: Optional[float] = None
+        self._arrival_audio: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, frame: AudioFrame, turn_id: Optional[int] = None, now: Optional[float] = None) -> None:
+        """
+        Buffer a frame.
+
+        Args:
+            frame (AudioFrame): The frame.
+            turn_id (Optional[int]): The turn of the frame.
+            now (Optional[float]): The arrival time on the loop clock. Defaults to ``loop.time()``.
+        """
+        now = asyncio.get_running_loop().time() if now is None else now
+        duration = frame.samples / frame.sample_rate
+        if self._arrival_start is None:
+            self._arrival_start, self._arrival_audio = now, 0.0
+        else:
+            lag = now - (self._arrival_start + self._arrival_audio)
+            if lag > self.target_depth:
+                self.target_depth = min(self.max_depth, lag)
+        self._arrival_audio += duration
+        self._entries.append((frame, turn_id))
+        if self._buffering_since is None:
+            self._buffering_since = now
+        self.depth += duration
+        if self.depth > self.capacity:
+            self.overruns += 1
+            metrics.audio_buffer_events.inc(event="overrun")
+        self._data_event.set()
+
+    def end_turn(self, turn_id: Optional[int] = None) -> None:
+        """
+        Mark the end of the frames of a turn, which ``get`` returns as a None frame.
+
+        Args:
+            turn_id (Optional[int]): The turn.
+        """
+        self._entries.append((None, turn_id))
+        if self._buffering_since is None:
+            self._buffering_since = asyncio.get_running_loop().time()
+        self._turn_ends += 1
+        self._arrival_start = None
+        self.target_depth = max(self.min_depth, self.target_depth * self.decay)
+        self._data_event.set()
+
+    def clear(self) -> None:
+        """Drop the buffered frames, e.g. when the reply is interrupted."""
+        self._entries.clear()
+        self._turn_ends = 0
+        self.depth = 0.0
+        self._playing = False
+        self._buffering_since = None
+        self._arrival_start = None
+
+    def _ready(self, now: float) -> bool:
+        """Whether enough of the next turn is buffered to start playing it."""
+        if not self._entries:
+            return False
+        return (
+            self.depth >= self.target_depth or self._turn_ends > 0 or now - self._buffering_since >= self.target_depth
+        )
+
+    async def _buffer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._ready(loop.time()):
+            timeout = self._buffering_since + self.target_depth - loop.time() if self._entries else None
+            self._data_event.clear()
+            try:
+                await asyncio.wait_for(self._data_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _wait_deadline(self, duration: float) -> None:
+        loop = asyncio.get_running_loop()
+        if self._deadline is None:
+            self._deadline = loop.time()
+        delay = self._deadline - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif -delay > self.max_lag:
+            self.resyncs += 1
+            self._deadline = loop.time()
+        self._deadline += duration
+
+    async def get(self, idle_frame: Optional[AudioFrame] = None) -> Tuple[Optional[AudioFrame], Optional[int]]:
+        """
+        Wait for the deadline of the next frame and return it.
+
+        Args:
+            idle_frame (Optional[AudioFrame]): A frame returned, paced like the others, when
+                there is nothing to play. When None, this waits for the next turn instead.
+
+        Returns:
+            Tuple[Optional[AudioFrame], Optional[int]]: The frame and its turn, the idle frame
+                and None, or None and the turn at the end of a turn.
+        """
+        loop = asyncio.get_running_loop()
+        if self._playing and not self._entries:
+            self.underruns += 1
+            metrics.audio_buffer_events.inc(event="underrun")
+            logger.debug("Audio output underrun, buffering %.0fms", self.target_depth * 1000)
+            self._playing = False
+        if not self._playing:
+            if idle_frame is not None and not self._ready(loop.time()):
+                await self._wait_deadline(idle_frame.samples / idle_frame.sample_rate)
+                return idle_frame, None
+            if idle_frame is None:
+                await self._buffer()
+                # The output stalled until now, so pacing starts over
+                self._deadline = None
+            self._playing = True
+            self._buffering_since = None
+
+        frame, turn_id = self._entries.popleft()
+        if frame is None:
+            self._turn_ends -= 1
+            self._playing = False
+            if self._entries:
+                # The next turn was queued while this one played, so it buffers from now
+                self._buffering_since = loop.time()
+            return None, turn_id
+        self.depth = max(0.0, self.depth - frame.samples / frame.sample_rate)
+        await self._wait_deadline(frame.samples / frame.sample_rate)
+        return frame, turn_id
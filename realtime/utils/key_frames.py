@@ -0,0 +1,174 @@
+import time
+from collections import deque
+from typing import Deque, Optional
+
+import numpy as np
+from scipy.fft import dctn
+
+from realtime.utils.yuv420 import downscale_luma
+
+# Number of set bits for every byte value, used to popcount packed hashes.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class KeyFrameEngine:
+    """
+    Base class for key frame detection on luma planes.
+
+    An engine turns each luma plane into a small fingerprint and compares it with the
+    fingerprint of the last key frame. A frame becomes a key frame when it differs from
+    the last key frame by at least ``threshold`` and the scene has settled, i.e. the
+    frames in the rolling history all agree with it. ``min_interval`` rate limits key
+    frames and ``max_interval`` forces one when nothing has changed for a while.
+
+    Subclasses implement ``fingerprint`` and ``distance``.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.25,
+        min_interval: float = 1.0,
+        max_interval: Optional[float] = None,
+        history_size: int = 2,
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            threshold (float): Minimum distance in [0, 1] from the last key frame.
+            min_interval (float): Minimum number of seconds between key frames.
+            max_interval (Optional[float]): Emit a key frame after this many seconds
+                even if the scene did not change. Disabled when None.
+            history_size (int): Number of recent frames that must agree with a frame
+                before it is accepted as a new scene.
+        """
+        self.threshold: float = threshold
+        self.min_interval: float = min_interval
+        self.max_interval: Optional[float] = max_interval
+        self._history: Deque[np.ndarray] = deque(maxlen=max(history_size, 1))
+        self._key_fingerprint: Optional[np.ndarray] = None
+        self._key_time: Optional[float] = None
+        self.last_score: float = 0.0
+
+    def fingerprint(self, luma: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def distance(self, a: np.ndarray, b: np.ndarray) -> float:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget the last key frame and the rolling history."""
+        self._history.clear()
+        self._key_fingerprint = None
+        self._key_time = None
+        self.last_score = 0.0
+
+    def is_key_frame(self, luma: np.ndarray, now: Optional[float] = None) -> bool:
+        """
+        Score a luma plane and decide whether it starts a new key frame.
+
+        Args:
+            luma (np.ndarray): The (h, w) uint8 luma plane.
+            now (Optional[float]): The current time. Defaults to time.time().
+
+        Returns:
+            bool: True if the frame is a key frame.
+        """
+        now = time.time() if now is None else now
+        fingerprint = self.fingerprint(luma)
+        settled = all(self.distance(fingerprint, previous) < self.threshold for previous in self._history)
+        self._history.append(fingerprint)
+
+        if self._key_fingerprint is None:
+            self._accept(fingerprint, now)
+            return True
+        self.last_score = self.distance(fingerprint, self._key_fingerprint)
+        elapsed = now - self._key_time
+        if elapsed < self.min_interval:
+            return False
+        if (self.last_score >= self.threshold and settled) or (self.max_interval and elapsed > self.max_interval):
+            self._accept(fingerprint, now)
+            return True
+        return False
+
+    def _accept(self, fingerprint: np.ndarray, now: float) -> None:
+        self._key_fingerprint = fingerprint
+        self._key_time = now
+
+
+class HashKeyFrameEngine(KeyFrameEngine):
+    """Base class for engines whose fingerprint is a packed bit hash."""
+
+    def distance(self, a: np.ndarray, b: np.ndarray) -> float:
+        """Return the fraction of differing bits between two packed hashes."""
+        return int(_POPCOUNT[np.bitwise_xor(a, b)].sum(dtype=np.uint32)) / (a.size * 8)
+
+
+class DHashEngine(HashKeyFrameEngine):
+    """Difference hash: compares horizontally adjacent pixels of a downscaled frame."""
+
+    def __init__(self, hash_size: int = 8, **kwargs):
+        super().__init__(**kwargs)
+        self.hash_size: int = hash_size
+
+    def fingerprint(self, luma: np.ndarray) -> np.ndarray:
+        small = downscale_luma(luma, (self.hash_size + 1, self.hash_size))
+        return np.packbits(small[:, 1:] > small[:, :-1])
+
+
+class PHashEngine(HashKeyFrameEngine):
+    """Perceptual hash: signs of the low frequency DCT coefficients of a downscaled frame."""
+
+    def __init__(self, hash_size: int = 8, highfreq_factor: int = 4, **kwargs):
+        super().__init__(**kwargs)
+        self.hash_size: int = hash_size
+        self.highfreq_factor: int = highfreq_factor
+
+    def fingerprint(self, luma: np.ndarray) -> np.ndarray:
+        size = self.hash_size * self.highfreq_factor
+        small = downscale_luma(luma, (size, size)).astype(np.float32)
+        low = dctn(small, norm="ortho")[: self.hash_size, : self.hash_size]
+        return np.packbits(low > np.median(low[1:, 1:]))
+
+
+class BlockMeanEngine(KeyFrameEngine):
+    """Block mean difference: the fraction of blocks whose mean luma moved by more than a noise floor."""
+
+    def __init__(self, grid_size: int = 16, noise_floor: int = 10, **kwargs):
+        super().__init__(**kwargs)
+        self.grid_size: int = grid_size
+        self.noise_floor: int = noise_floor
+
+    def fingerprint(self, luma: np.ndarray) -> np.ndarray:
+        return downscale_luma(luma, (self.grid_size, self.grid_size))
+
+    def distance(self, a: np.ndarray, b: np.ndarray) -> float:
+        diff = np.maximum(a, b)
+        diff -= np.minimum(a, b)
+        return np.count_nonzero(diff > self.noise_floor) / diff.size
+
+
+KEY_FRAME_ENGINES = {
+    "dhash": DHashEngine,
+    "phash": PHashEngine,
+    "block_mean": BlockMeanEngine,
+}
+
+
+def create_key_frame_engine(engine: str = "dhash", **kwargs) -> KeyFrameEngine:
+    """
+    Create a key frame engine by name.
+
+    Args:
+        engine (str): One of 'dhash', 'phash' or 'block_mean'.
+        **kwargs: Passed to the engine constructor.
+
+    Returns:
+        KeyFrameEngine: The engine.
+
+    Raises:
+        ValueError: If the engine name is unknown.
+    """
+    if engine not in KEY_FRAME_ENGINES:
+        raise ValueError(f"Unknown key frame engine: {engine}. Expected one of {list(KEY_FRAME_ENGINES)}")
+    return KEY_FRAME_ENGINES[engine](**kwargs)
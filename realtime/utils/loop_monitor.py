@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from realtime.utils.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class Stall:
+    """A period during which one callback kept the event loop busy."""
+
+    __slots__ = ("start_time", "duration", "owner", "stack")
+
+    def __init__(self, start_time: float, owner: str, stack: Optional[List[str]]):
+        self.start_time: float = start_time
+        self.duration: Optional[float] = None
+        self.owner: str = owner
+        self.stack: Optional[List[str]] = stack
+
+    def to_dict(self) -> Dict:
+        return {"start_time": self.start_time, "duration": self.duration, "owner": self.owner, "stack": self.stack}
+
+
+def _task_owner(task: Optional[asyncio.Task]) -> str:
+    """Name a task after the coroutine it runs, e.g. 'DeepgramSTT.run', which names the plugin or op."""
+    if task is None:
+        return "<callback>"
+    coro = task.get_coro()
+    return getattr(coro, "__qualname__", None) or task.get_name()
+
+
+class LoopMonitor:
+    """
+    Measures event loop scheduling lag and catches the callbacks that block the loop.
+
+    A heartbeat callback is scheduled on the loop every ``interval`` seconds and records
+    how late it ran in ``lag_histogram``. A watchdog thread checks the heartbeat, and when
+    it is more than ``slow_callback_threshold`` seconds overdue the loop is stalled: the
+    watchdog attributes the stall to the task running on the loop and, for a
+    ``stack_sample_rate`` fraction of the stalls, captures the stack of the loop thread,
+    which shows the blocking call. Once the loop recovers the stall duration is recorded
+    in ``stall_histogram`` and per owner, and the stall is logged.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.01,
+        slow_callback_threshold: float = 0.1,
+        stack_sample_rate: float = 1.0,
+        max_stalls: int = 100,
+        stack_limit: int = 30,
+    ):
+        """
+        Initialize the LoopMonitor.
+
+        Args:
+            interval (float): Seconds between two heartbeats.
+            slow_callback_threshold (float): Seconds a callback may block the loop before it counts as a stall.
+            stack_sample_rate (float): Fraction of the stalls whose stack is captured, in [0, 1].
+            max_stalls (int): Number of recent stalls kept.
+            stack_limit (int): Maximum number of frames captured per stack.
+        """
+        self.interval: float = interval
+        self.slow_callback_threshold: float = slow_callback_threshold
+        self.stack_sample_rate: float = stack_sample_rate
+        self.stack_limit: int = stack_limit
+        self.lag_histogram: LatencyHistogram = LatencyHistogram(min_value=1e-4, window_seconds=60.0)
+        self.stall_histogram: LatencyHistogram = LatencyHistogram(window_seconds=60.0)
+        self.stalls: Deque[Stall] = deque(maxlen=max_stalls)
+        self.stall_counts: Dict[str, int] = {}
+        self.stall_seconds: Dict[str, float] = {}
+        self.last_lag: float = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._expected: float = 0.0
+        self._current_stall: Optional[Stall] = None
+        self._stop_event: threading.Event = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["LoopMonitor"]:
+        """
+        Create a monitor configured by environment variables.
+
+        REALTIME_LOOP_MONITOR=0 disables the monitor. REALTIME_LOOP_MONITOR_INTERVAL_MS,
+        REALTIME_SLOW_CALLBACK_MS and REALTIME_STALL_STACK_SAMPLE_RATE override the defaults.
+
+        Returns:
+            Optional[LoopMonitor]: The monitor, or None when it is disabled.
+        """
+        if os.environ.get("REALTIME_LOOP_MONITOR", "1") == "0":
+            return None
+        return cls(
+            interval=float(os.environ.get("REALTIME_LOOP_MONITOR_INTERVAL_MS", 10)) / 1000,
+            slow_callback_threshold=float(os.environ.get("REALTIME_SLOW_CALLBACK_MS", 100)) / 1000,
+            stack_sample_rate=float(os.environ.get("REALTIME_STALL_STACK_SAMPLE_RATE", 1.0)),
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """
+        Start monitoring a loop. The loop does not need to be running yet.
+
+        Args:
+            loop (Optional[asyncio.AbstractEventLoop]): The loop. Defaults to the running loop.
+        """
+        if self.running:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._stop_event = threading.Event()
+        self._loop_thread_id = None
+        self._schedule()
+        self._watchdog = threading.Thread(
+            target=self._watch, args=(self._stop_event,), name="loop_monitor", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        """Stop monitoring."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._stop_event.set()
+        self._loop = None
+
+    def _schedule(self) -> None:
+        self._expected = time.perf_counter() + self.interval
+        self._handle = self._loop.call_later(self.interval, self._heartbeat)
+
+    def _heartbeat(self) -> None:
+        now = time.perf_counter()
+        if self._loop_thread_id is None:
+            self._loop_thread_id = threading.get_ident()
+        self.last_lag = max(0.0, now - self._expected)
+        self.lag_histogram.record(self.last_lag)
+        stall = self._current_stall
+        if stall is not None:
+            self._current_stall = None
+            stall.duration = self.last_lag
+            self._report(stall)
+        self._schedule()
+
+    def _watch(self, stop_event: threading.Event) -> None:
+        poll = min(self.interval, self.slow_callback_threshold / 2)
+        while not stop_event.wait(poll):
+            loop = self._loop
+            if loop is None or self._loop_thread_id is None or self._current_stall is not None:
+                continue
+            expected = self._expected
+            overdue = time.perf_counter() - expected
+            if overdue < self.slow_callback_threshold or not loop.is_running():
+                continue
+            stack = None
+            if random.random() < self.stack_sample_rate:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    stack = traceback.format_stack(frame, limit=self.stack_limit)
+            # The heartbeat may have run meanwhile, in which case the loop was not stalled anymore
+            if expected == self._expected:
+                self._current_stall = Stall(time.time() - overdue, _task_owner(asyncio.current_task(loop)), stack)
+
+    def _report(self, stall: Stall) -> None:
+        self.stalls.append(stall)
+        self.stall_histogram.record(stall.duration)
+        self.stall_counts[stall.owner] = self.stall_counts.get(stall.owner, 0) + 1
+        self.stall_seconds[stall.owner] = self.stall_seconds.get(stall.owner, 0.0) + stall.duration
+        logger.warning(
+            "Event loop blocked for %.0fms by %s%s",
+            stall.duration * 1000,
+            stall.owner,
+            ":\n" + "".join(stall.stack) if stall.stack else "",
+        )
+
+    def get_stats(self) -> Dict:
+        """Return the lag percentiles, the stalls by owner and the recent stalls."""
+        return {
+            "lag": self.lag_histogram.percentiles(window=True),
+            "stalls": self.stall_histogram.percentiles(window=True),
+            "stall_counts": dict(self.stall_counts),
+            "stall_seconds": dict(self.stall_seconds),
+            "recent_stalls": [stall.to_dict() for stall in self.stalls],
+        }
+
+
+# Monitor of the application loop, started by RealtimeApp.start
+monitor: Optional[LoopMonitor] = None
+
+
+def start(loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[LoopMonitor]:
+    """
+    Start the process wide monitor configured by environment variables on a loop.
+
+    Args:
+        loop (Optional[asyncio.AbstractEventLoop]): The loop. Defaults to the running loop.
+
+    Returns:
+        Optional[LoopMonitor]: The monitor, or None when it is disabled.
+    """
+    global monitor
+    if monitor is None:
+        monitor = LoopMonitor.from_env()
+    if monitor is not None:
+        monitor.start(loop)
+    return monitor
+
+
+def stop() -> None:
+    if monitor is not None:
+        monitor.stop()
@@ -0,0 +1,279 @@
+import logging
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from realtime.streams import Stream
+from realtime.utils import loop_monitor, tracing
+from realtime.utils.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Upper bounds of the exported latency buckets, in seconds
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+GaugeValue = Union[float, Dict[Labels, float]]
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = ((name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for name, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _callback_values(callback: Callable[[], GaugeValue]) -> Dict[Labels, float]:
+    values = callback()
+    return values if isinstance(values, dict) else {(): values}
+
+
+class Counter:
+    """
+    A monotonically increasing counter, optionally split by labels.
+
+    The counter is either incremented with ``inc`` or, when a callback is given, read
+    from a running total kept elsewhere at scrape time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        callback: Optional[Callable[[], GaugeValue]] = None,
+    ):
+        """
+        Initialize the Counter.
+
+        Args:
+            name (str): The metric family name, without the '_total' suffix.
+            documentation (str): The HELP text.
+            label_names (Sequence[str]): The names of the labels every increment sets.
+            callback (Optional[Callable[[], GaugeValue]]): Returns the total, or the total of every label set.
+        """
+        self.name: str = name
+        self.documentation: str = documentation
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self.callback: Optional[Callable[[], GaugeValue]] = callback
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Increment the counter.
+
+        Args:
+            amount (float): The non-negative amount to add.
+            **labels (str): A value for every label name.
+        """
+        key = tuple(str(labels[name]) for name in self.label_names)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.label_names), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# TYPE {self.name} counter", f"# HELP {self.name} {self.documentation}"]
+        if self.callback is not None:
+            values = _callback_values(self.callback)
+        else:
+            values = {tuple(zip(self.label_names, key)): value for key, value in self._values.items()}
+        for labels, value in values.items():
+            lines.append(f"{self.name}_total{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """A gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], GaugeValue]):
+        """
+        Initialize the Gauge.
+
+        Args:
+            name (str): The metric family name.
+            documentation (str): The HELP text.
+            callback (Callable[[], GaugeValue]): Returns the value, or the value of every label set.
+        """
+        self.name: str = name
+        self.documentation: str = documentation
+        self.callback: Callable[[], GaugeValue] = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# TYPE {self.name} gauge", f"# HELP {self.name} {self.documentation}"]
+        for labels, value in _callback_values(self.callback).items():
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Exports LatencyHistograms as an OpenMetrics histogram with coarse ``le`` buckets."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[Labels, LatencyHistogram]],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        """
+        Initialize the Histogram.
+
+        Args:
+            name (str): The metric family name.
+            documentation (str): The HELP text.
+            callback (Callable[[], Dict[Labels, LatencyHistogram]]): Returns the histogram of every label set.
+            buckets (Sequence[float]): The exported bucket upper bounds.
+        """
+        self.name: str = name
+        self.documentation: str = documentation
+        self.callback: Callable[[], Dict[Labels, LatencyHistogram]] = callback
+        self.buckets: Tuple[float, ...] = tuple(buckets)
+
+    def render(self) -> List[str]:
+        lines = [f"# TYPE {self.name} histogram", f"# HELP {self.name} {self.documentation}"]
+        for labels, histogram in self.callback().items():
+            cumulative = np.cumsum(histogram.bucket_counts())
+            # A fine bucket counts towards an exported bucket when it lies entirely below its bound
+            indices = np.searchsorted(histogram.bucket_upper_bounds(), self.buckets, side="right")
+            for bound, index in zip(self.buckets, indices):
+                count = int(cumulative[index - 1]) if index else 0
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {histogram.count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(histogram.total)}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metric families exported on the /metrics route."""
+
+    def __init__(self):
+        self._families: Dict[str, Union[Counter, Gauge, Histogram]] = {}
+
+    def register(self, family: Union[Counter, Gauge, Histogram]) -> Union[Counter, Gauge, Histogram]:
+        """
+        Register a metric family, replacing any family with the same name.
+
+        Returns:
+            Union[Counter, Gauge, Histogram]: The registered family.
+        """
+        self._families[family.name] = family
+        return family
+
+    def render(self) -> str:
+        """Render every family in the OpenMetrics text format."""
+        lines: List[str] = []
+        for family in list(self._families.values()):
+            try:
+                lines.extend(family.render())
+            except Exception as e:
+                logger.error("Error rendering metric %s: %s", family.name, e)
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _stream_depths(aggregate: Callable[[List[int]], float]) -> Dict[Labels, float]:
+    depths: Dict[str, List[int]] = {}
+    for stream in list(Stream.instances):
+        depths.setdefault(getattr(stream, "type", "stream"), []).append(stream.qsize())
+    return {(("stream", stream_type),): aggregate(values) for stream_type, values in depths.items()}
+
+
+def _loop_monitor_values(attribute: str) -> Dict[Labels, float]:
+    if loop_monitor.monitor is None:
+        return {}
+    return {(("owner", owner),): value for owner, value in getattr(loop_monitor.monitor, attribute).items()}
+
+
+registry = MetricsRegistry()
+
+dropped_frames: Counter = registry.register(
+    Counter("realtime_dropped_frames", "Frames dropped before reaching their consumer.", ("stream", "reason"))
+)
+audio_buffer_events: Counter = registry.register(
+    Counter("realtime_audio_buffer_events", "Underruns and overruns of the output audio jitter buffers.", ("event",))
+)
+
+registry.register(Gauge("realtime_active_sessions", "Sessions being traced.", lambda: len(tracing.sessions)))
+registry.register(
+    Counter(
+        "realtime_sessions_started",
+        "Sessions started since the process started.",
+        callback=lambda: tracing.sessions_started,
+    )
+)
+registry.register(
+    Histogram(
+        "realtime_stage_latency_seconds",
+        "Latency of every pipeline stage over all sessions.",
+        lambda: {(("stage", stage.value),): histogram for stage, histogram in tracing.stage_histograms.items()},
+    )
+)
+registry.register(
+    Counter(
+        "realtime_provider_bytes",
+        "Bytes received from the LLM and TTS providers since the process started.",
+        callback=lambda: {
+            (("stage", "llm"),): tracing.metric_totals[tracing.Metric.LLM_TOTAL_BYTES],
+            (("stage", "tts"),): tracing.metric_totals[tracing.Metric.TTS_TOTAL_BYTES],
+        },
+    )
+)
+registry.register(
+    Histogram(
+        "realtime_span_duration_seconds",
+        "Duration of the sampled hot path spans, see REALTIME_SPAN_SAMPLE_RATE.",
+        lambda: {(("span", name),): histogram for name, histogram in list(tracing.span_histograms.items())},
+        buckets=(1e-5, 5e-5, 1e-4, 5e-4, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+    )
+)
+registry.register(Gauge("realtime_stream_depth", "Items queued in all streams.", lambda: _stream_depths(sum)))
+registry.register(
+    Gauge("realtime_stream_max_depth", "Items queued in the fullest stream.", lambda: _stream_depths(max))
+)
+registry.register(
+    Gauge(
+        "realtime_event_loop_lag_seconds",
+        "Last measured event loop lag.",
+        lambda: loop_monitor.monitor.last_lag if loop_monitor.monitor is not None else 0.0,
+    )
+)
+registry.register(
+    Histogram(
+        "realtime_event_loop_lag_distribution_seconds",
+        "Event loop scheduling lag.",
+        lambda: {(): loop_monitor.monitor.lag_histogram} if loop_monitor.monitor is not None else {},
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    )
+)
+registry.register(
+    Counter(
+        "realtime_event_loop_stalls",
+        "Callbacks that blocked the event loop longer than the threshold, by owning task.",
+        callback=lambda: _loop_monitor_values("stall_counts"),
+    )
+)
+registry.register(
+    Counter(
+        "realtime_event_loop_blocked_seconds",
+        "Time the event loop was blocked by slow callbacks, by owning task.",
+        callback=lambda: _loop_monitor_values("stall_seconds"),
+    )
+)
+
+
+def render() -> str:
+    """Render the registered metrics in the OpenMetrics text format."""
+    return registry.render()
@@ -0,0 +1,79 @@
+from typing import List
+
+from av import AudioFrame, open as av_open
+
+# Sample rates libopus encodes at
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class _Sink:
+    """A write-only file collecting the bytes the muxer writes."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class OggOpusEncoder:
+    """
+    Encodes PCM frames into an Ogg Opus stream, returned piece by piece as it is written.
+
+    The Ogg muxer flushes a page after every packet, so the bytes returned by ``encode``
+    can be streamed right away, e.g. to a speech-to-text service accepting Ogg Opus. The
+    first bytes returned carry the stream headers, so one encoder is used per stream.
+    """
+
+    def __init__(self, sample_rate: int = 16000, layout: str = "mono", bit_rate: int = 24000, complexity: int = 0):
+        """
+        Initialize the OggOpusEncoder.
+
+        Args:
+            sample_rate (int): The sample rate of the frames, one of ``OPUS_SAMPLE_RATES``.
+            layout (str): The channel layout of the frames.
+            bit_rate (int): The target bit rate in bits per second.
+            complexity (int): The libopus complexity, from 0, the cheapest, to 10.
+
+        Raises:
+            ValueError: If Opus does not support the sample rate.
+        """
+        if sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"Opus does not support a sample rate of {sample_rate}")
+        self.sample_rate: int = sample_rate
+        self._sink = _Sink()
+        self._container = av_open(
+            self._sink,
+            "w",
+            format="ogg",
+            container_options={"page_duration": "20000", "flush_packets": "1"},
+            buffer_size=4096,
+        )
+        self._stream = self._container.add_stream(
+            "libopus", rate=sample_rate, options={"compression_level": str(complexity), "application": "voip"}
+        )
+        self._stream.layout = layout
+        self._stream.bit_rate = bit_rate
+        self._samples: int = 0
+
+    def encode(self, frame: AudioFrame) -> bytes:
+        """
+        Encode a frame.
+
+        Args:
+            frame (AudioFrame): The frame, at the sample rate and layout of the encoder.
+
+        Returns:
+            bytes: The Ogg data written so far, which may be empty while the encoder buffers.
+        """
+        frame.pts = self._samples
+        self._samples += frame.samples
+        for packet in self._stream.encode(frame):
+            self._container.mux(packet)
+        return self._sink.pop()
@@ -0,0 +1,174 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from realtime.utils import tracing
+from realtime.utils.tracing import Event, Metric, Tracer
+
+# Rough speaking rate of text to speech, to tell how much of a reply was heard
+CHARS_PER_SECOND = 15.0
+
+# Output drivers of the pipeline, shared by the tasks it creates
+_outputs: ContextVar[Optional[List[Any]]] = ContextVar("playout_outputs", default=None)
+
+
+def start_outputs() -> None:
+    """Start collecting the output drivers of a pipeline, before the pipeline is built."""
+    _outputs.set([])
+
+
+def register_output(output: Any) -> None:
+    """
+    Make ``interrupt_outputs`` flush an output driver of the pipeline being built.
+
+    Args:
+        output (Any): The driver, with an ``interrupt()`` method flushing its queued audio and
+            returning the milliseconds of the turn being played that were sent, or None.
+    """
+    outputs = _outputs.get()
+    if outputs is not None:
+        outputs.append(output)
+
+
+def interrupt_outputs() -> Optional[float]:
+    """
+    Flush the audio queued by the output drivers of the pipeline, e.g. when the user barges in.
+
+    Returns:
+        Optional[float]: The milliseconds of the interrupted turn that were sent, or None when
+            no turn was being played.
+    """
+    transmitted = [output.interrupt() for output in _outputs.get() or ()]
+    transmitted = [ms for ms in transmitted if ms is not None]
+    return max(transmitted) if transmitted else None
+
+
+def heard_text(text: str, transmitted_ms: float, chars_per_second: float = CHARS_PER_SECOND) -> str:
+    """
+    Estimate the part of a reply spoken in some time, cut at a word boundary.
+
+    Args:
+        text (str): The reply.
+        transmitted_ms (float): The milliseconds of its audio that were sent.
+        chars_per_second (float): The speaking rate.
+
+    Returns:
+        str: The beginning of the reply the user heard.
+    """
+    length = int(transmitted_ms / 1000 * chars_per_second)
+    if length >= len(text):
+        return text
+    cut = text[: length + 1].rfind(" ")
+    return text[:cut].rstrip() if cut > 0 else ""
+
+
+def interrupt_reply(history: List[Dict[str, str]], generating: bool) -> Optional[float]:
+    """
+    Flush the output audio when the user barges in, and trim the reply being played in a
+    chat history to what the user heard, so later prompts do not carry the rest.
+
+    Args:
+        history (List[Dict[str, str]]): The chat history, ending with the reply.
+        generating (bool): Whether the reply was still being generated.
+
+    Returns:
+        Optional[float]: The milliseconds of the reply that were sent, or None when no reply
+            was being played.
+    """
+    transmitted_ms = interrupt_outputs()
+    if transmitted_ms is None and not generating:
+        return None
+    if history and history[-1]["role"] == "assistant":
+        history[-1]["content"] = heard_text(history[-1]["content"], transmitted_ms or 0.0)
+    return transmitted_ms
+
+
+class PlayoutTracker:
+    """
+    Records when the audio of every turn actually leaves the process.
+
+    Output drivers call ``on_queued`` when they buffer audio to send and ``on_sent`` when it
+    is handed to the transport. The first audio sent for a turn registers
+    ``Event.AUDIO_FIRST_SENT``, the last one ``Event.AUDIO_LAST_SENT`` once the turn ends,
+    and the audio already buffered when a turn's first audio is queued is registered as
+    ``Metric.OUTPUT_BUFFER_MS``, the wait that audio has ahead of it. When a driver drops
+    its queued audio, ``flush`` tells how much of the turn was sent.
+
+    Drivers are called from transport tasks that do not run in the session context, so the
+    tracer of the session is captured when the tracker is created.
+    """
+
+    def __init__(self, tracer: Optional[Tracer] = None):
+        """
+        Initialize the PlayoutTracker.
+
+        Args:
+            tracer (Optional[Tracer]): The tracer to record into. Defaults to the tracer of the current session.
+        """
+        self.tracer: Tracer = tracer or tracing.get_tracer()
+        self.buffered_seconds: float = 0.0
+        self._queueing: bool = False
+        self._queued_turn_id: Optional[int] = None
+        self._sending: bool = False
+        self._sent_turn_id: Optional[int] = None
+        self._last_sent_time: float = 0.0
+        self._turn_sent_seconds: float = 0.0
+
+    def on_queued(self, duration: float, turn_id: Optional[int]) -> None:
+        """
+        Record audio added to the output buffer.
+
+        Args:
+            duration (float): The duration of the audio in seconds.
+            turn_id (Optional[int]): The turn of the audio.
+        """
+        if not self._queueing or turn_id != self._queued_turn_id:
+            self.tracer.register_metric(Metric.OUTPUT_BUFFER_MS, self.buffered_seconds * 1000, turn_id=turn_id)
+            self._queueing, self._queued_turn_id = True, turn_id
+        self.buffered_seconds += duration
+
+    def on_queued_end(self) -> None:
+        """Record that the audio of the current turn was all added to the output buffer."""
+        self._queueing = False
+
+    def on_sent(self, duration: float, turn_id: Optional[int], sent_time: Optional[float] = None) -> None:
+        """
+        Record audio handed to the transport.
+
+        Args:
+            duration (float): The duration of the audio in seconds.
+            turn_id (Optional[int]): The turn of the audio.
+            sent_time (Optional[float]): The time the audio was sent. Defaults to now.
+        """
+        sent_time = sent_time or time.time()
+        self.buffered_seconds = max(0.0, self.buffered_seconds - duration)
+        if self._sending and turn_id != self._sent_turn_id:
+            self.on_sent_end()
+        if not self._sending:
+            self.tracer.register_event(Event.AUDIO_FIRST_SENT, sent_time, turn_id)
+            self._sending, self._sent_turn_id = True, turn_id
+        self._last_sent_time = sent_time
+        self._turn_sent_seconds += duration
+
+    def on_sent_end(self) -> None:
+        """Record that the audio of the current turn was all sent."""
+        if self._sending:
+            self.tracer.register_event(Event.AUDIO_LAST_SENT, self._last_sent_time, self._sent_turn_id)
+            self._sending = False
+        self._turn_sent_seconds = 0.0
+
+    def flush(self) -> Optional[float]:
+        """
+        Record that the audio buffered for output was dropped.
+
+        Returns:
+            Optional[float]: The seconds of the turn being played that were sent, or None when
+                no turn was being played.
+        """
+        sent_seconds = None
+        if self._sending or self._queueing or self.buffered_seconds > 0:
+            sent_seconds = self._turn_sent_seconds
+        self.on_sent_end()
+        self._queueing = False
+        self.buffered_seconds = 0.0
+        return sent_seconds
@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Dict, List, Optional
+
+# Python functions a thread sits in while it waits, whose samples are idle time
+IDLE_FUNCTIONS = frozenset({"wait", "select", "poll", "accept", "_wait_for_tstate_lock", "_worker"})
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    A statistical profiler of every thread of the process, built on ``sys._current_frames``.
+
+    A sampler thread captures the Python stack of every other thread, including the event
+    loop and plugin worker threads, every ``interval`` seconds and counts identical stacks.
+    The counts are rendered in the collapsed stack format that flamegraph.pl, speedscope
+    and inferno read, one ``thread;outer;...;inner count`` line per stack, with the thread
+    name as the root frame.
+
+    Sampling holds the GIL, so its cost is paid by the profiled threads. The sampler
+    measures how long each sample takes and sleeps long enough in between for that cost
+    to stay below ``max_overhead`` of the wall time, and only one profile runs at a time.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        max_overhead: float = 0.05,
+        max_seconds: float = 60.0,
+        max_depth: int = 64,
+        include_idle: bool = False,
+    ):
+        """
+        Initialize the SamplingProfiler.
+
+        Args:
+            interval (float): Seconds between two samples, when sampling is cheap enough.
+            max_overhead (float): Maximum fraction of the wall time spent sampling, in (0, 1].
+            max_seconds (float): Maximum length of a profile.
+            max_depth (int): Maximum number of frames kept per stack, innermost first.
+            include_idle (bool): Keep the samples of threads waiting on a lock, queue or selector.
+        """
+        self.interval: float = interval
+        self.max_overhead: float = max_overhead
+        self.max_seconds: float = max_seconds
+        self.max_depth: int = max_depth
+        self.include_idle: bool = include_idle
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SamplingProfiler":
+        """
+        Create a profiler configured by environment variables.
+
+        REALTIME_PROFILER_INTERVAL_MS, REALTIME_PROFILER_MAX_OVERHEAD and
+        REALTIME_PROFILER_MAX_SECONDS override the defaults.
+        """
+        return cls(
+            interval=float(os.environ.get("REALTIME_PROFILER_INTERVAL_MS", 5)) / 1000,
+            max_overhead=float(os.environ.get("REALTIME_PROFILER_MAX_OVERHEAD", 0.05)),
+            max_seconds=float(os.environ.get("REALTIME_PROFILER_MAX_SECONDS", 60)),
+        )
+
+    def _stack(self, frame: Optional[FrameType]) -> List[str]:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def sample(self, counts: Dict[str, int]) -> None:
+        """
+        Add one sample of every other thread to the stack counts.
+
+        Args:
+            counts (Dict[str, int]): The counts by collapsed stack, updated in place.
+        """
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            if not self.include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                continue
+            stack = ";".join([names.get(thread_id, str(thread_id)), *self._stack(frame)])
+            counts[stack] = counts.get(stack, 0) + 1
+
+    def profile(self, seconds: float, interval: Optional[float] = None) -> Dict[str, int]:
+        """
+        Sample every thread for some time. It blocks, so call it from a worker thread.
+
+        Args:
+            seconds (float): The length of the profile, capped to ``max_seconds``.
+            interval (Optional[float]): Seconds between two samples. Defaults to ``interval``.
+
+        Returns:
+            Dict[str, int]: The number of samples of every collapsed stack.
+
+        Raises:
+            ProfilerBusyError: If another profile is running.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        try:
+            interval = interval or self.interval
+            counts: Dict[str, int] = {}
+            end_time = time.perf_counter() + min(seconds, self.max_seconds)
+            while True:
+                start = time.perf_counter()
+                self.sample(counts)
+                cost = time.perf_counter() - start
+                wait = max(interval - cost, cost / self.max_overhead - cost)
+                if start + cost + wait >= end_time:
+                    return counts
+                time.sleep(wait)
+        finally:
+            self._lock.release()
+
+
+def collapse(counts: Dict[str, int]) -> str:
+    """
+    Render stack counts in the collapsed stack format, most sampled stacks first.
+
+    Args:
+        counts (Dict[str, int]): The number of samples of every collapsed stack.
+
+    Returns:
+        str: One ``stack count`` line per stack.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items(), key=lambda item: -item[1]))
+
+
+# Profiler of the process, used by the /profile route
+profiler = SamplingProfiler.from_env()
@@ -1,8 +1,21 @@
+import asyncio
+import contextlib
+import functools
 import logging
+import math
+import os
+import random
 import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
 from enum import Enum
 from statistics import mean
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, ContextManager, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from realtime.utils import turns
+from realtime.utils.event_log import EventLog
+from realtime.utils.histogram import LatencyHistogram
 
 
 class Event(Enum):
@@ -16,147 +29,619 @@ class Event(Enum):
     TTS_START = "tts_start"
     TTS_TTFB = "tts_ttfb"
     TTS_END = "tts_end"
+    AUDIO_FIRST_SENT = "audio_first_sent"
+    AUDIO_LAST_SENT = "audio_last_sent"
 
 
 class Metric(Enum):
     LLM_TOTAL_BYTES = "llm_total_bytes"
     TTS_TOTAL_BYTES = "tts_total_bytes"
+    IMAGE_ENCODE_BYTES = "image_encode_bytes"
+    IMAGE_ENCODE_MS = "image_encode_ms"
+    OUTPUT_BUFFER_MS = "output_buffer_ms"
+
+
+class Stage(Enum):
+    TRANSCRIPTION = "transcription"
+    LLM_TTFB = "llm_ttfb"
+    LLM_TOTAL = "llm_total"
+    TTS_TTFB = "tts_ttfb"
+    TTS_TOTAL = "tts_total"
+    OUTPUT_QUEUE = "output_queue"
+    SPEECH_TO_SPEECH = "speech_to_speech"
+
+
+# Pipeline stages timed in every turn, as (start event, end event)
+STAGE_EVENTS: Dict[Stage, Tuple[Event, Event]] = {
+    Stage.TRANSCRIPTION: (Event.USER_SPEECH_END, Event.TRANSCRIPTION_RECEIVED),
+    Stage.LLM_TTFB: (Event.LLM_START, Event.LLM_TTFB),
+    Stage.LLM_TOTAL: (Event.LLM_START, Event.LLM_END),
+    Stage.TTS_TOTAL: (Event.TTS_START, Event.TTS_END),
+    Stage.TTS_TTFB: (Event.TTS_START, Event.TTS_TTFB),
+    Stage.OUTPUT_QUEUE: (Event.TTS_TTFB, Event.AUDIO_FIRST_SENT),
+    # Up to the moment the first audio of the reply leaves the process
+    Stage.SPEECH_TO_SPEECH: (Event.USER_SPEECH_END, Event.AUDIO_FIRST_SENT),
+}
+
+# Latencies reported by the stats logs
+LATENCY_STATS: Dict[str, Stage] = {
+    "Transcription Latency": Stage.TRANSCRIPTION,
+    "LLM Time to First Byte": Stage.LLM_TTFB,
+    "LLM Total Latency": Stage.LLM_TOTAL,
+    "TTS Total Latency": Stage.TTS_TOTAL,
+    "TTS Time to First Byte": Stage.TTS_TTFB,
+    "Output Queue Latency": Stage.OUTPUT_QUEUE,
+    "Total Speech to Speech Latency": Stage.SPEECH_TO_SPEECH,
+}
+
+# Throughputs reported by the stats logs, as (metric, stage)
+THROUGHPUT_STATS: Dict[str, Tuple[Metric, Stage]] = {
+    "LLM Throughput": (Metric.LLM_TOTAL_BYTES, Stage.LLM_TOTAL),
+    "TTS Throughput": (Metric.TTS_TOTAL_BYTES, Stage.TTS_TOTAL),
+}
+
+# Stages ending at each event
+_STAGES_BY_END_EVENT: Dict[Event, List[Stage]] = {}
+for _stage, (_, _end_event) in STAGE_EVENTS.items():
+    _STAGES_BY_END_EVENT.setdefault(_end_event, []).append(_stage)
+
+# Event log codes of the events and metrics
+CODES: List[Union[Event, Metric]] = [*Event, *Metric]
+_CODE_BY_KEY: Dict[Union[Event, Metric], int] = {key: code for code, key in enumerate(CODES)}
+
+
+class TurnSummary:
+    """
+    The summary of one turn, updated as its events and metrics are registered.
+
+    It keeps the first time of every event, the first and total value of every metric and
+    the duration of every stage, from the first start event to the first end event after it.
+    """
+
+    __slots__ = (
+        "start_seq",
+        "start_time",
+        "turn_id",
+        "event_times",
+        "event_counts",
+        "metric_values",
+        "metric_totals",
+        "stages",
+    )
+
+    def __init__(self, start_seq: int, start_time: float, turn_id: Optional[int] = None):
+        """
+        Initialize the TurnSummary.
+
+        Args:
+            start_seq (int): The event log sequence number of the first record of the turn.
+            start_time (float): The time the turn started.
+            turn_id (Optional[int]): The id of the turn, None for a turn delimited by its events.
+        """
+        self.start_seq: int = start_seq
+        self.start_time: float = start_time
+        self.turn_id: Optional[int] = turn_id
+        self.event_times: Dict[Event, float] = {}
+        self.event_counts: Dict[Event, int] = {}
+        self.metric_values: Dict[Metric, float] = {}
+        self.metric_totals: Dict[Metric, float] = {}
+        self.stages: Dict[Stage, float] = {}
 
+    def add_event(self, event: Event, event_time: float) -> List[Tuple[Stage, float]]:
+        """
+        Add an event to the turn.
 
-TraceType = Dict[Union[Event, Metric], Union[float, List[float]]]
+        Returns:
+            List[Tuple[Stage, float]]: The stages this event completed, with their durations.
+        """
+        self.event_times.setdefault(event, event_time)
+        self.event_counts[event] = self.event_counts.get(event, 0) + 1
+        completed = []
+        for stage in _STAGES_BY_END_EVENT.get(event, ()):
+            start_time = self.event_times.get(STAGE_EVENTS[stage][0])
+            if stage not in self.stages and start_time is not None and event_time >= start_time:
+                self.stages[stage] = event_time - start_time
+                completed.append((stage, self.stages[stage]))
+        return completed
+
+    def add_metric(self, metric: Metric, metric_value: float) -> None:
+        self.metric_values.setdefault(metric, metric_value)
+        self.metric_totals[metric] = self.metric_totals.get(metric, 0.0) + metric_value
 
 
 class Tracer:
-    def __init__(self):
-        self.events: List[Tuple[float, Event]] = []
-        self.metrics: List[Tuple[float, Metric, float]] = []
+    """
+    Records the events and metrics of one session.
+
+    Records are kept in a fixed-capacity ring buffer, so memory does not grow with the
+    length of the session. Events are grouped into turns. A record tagged with a turn id,
+    explicitly or through the turn of the registering context (see ``realtime.utils.turns``),
+    belongs to that turn, so turns that overlap or are interrupted are still attributed
+    exactly. An untagged record belongs to the latest turn, and an untagged
+    ``Event.USER_SPEECH_END`` starts a new one. Every turn is summarized as its events
+    arrive, ``current_trace`` is the summary of the latest turn, and only the last
+    ``max_turns`` summaries are kept.
+
+    The duration of every stage is recorded once per turn, as soon as its end event is
+    registered, into the session histograms and the process wide ``stage_histograms``.
+    """
+
+    def __init__(self, session_id: Optional[str] = None, max_turns: int = 100, capacity: int = 4096):
+        """
+        Initialize the Tracer.
+
+        Args:
+            session_id (Optional[str]): The id of the traced session. A random id is used if None.
+            max_turns (int): Number of recent turn summaries kept for the average statistics.
+            capacity (int): Number of event and metric records kept in the event log.
+        """
+        self.session_id: str = session_id or uuid.uuid4().hex[:8]
+        self.log: EventLog = EventLog(capacity)
+        self.turns: Deque[TurnSummary] = deque(maxlen=max_turns)
+        self._turns_by_id: Dict[int, TurnSummary] = {}
+        self.histograms: Dict[Stage, LatencyHistogram] = {stage: LatencyHistogram() for stage in Stage}
+
+    @property
+    def current_trace(self) -> Optional[TurnSummary]:
+        return self.turns[-1] if self.turns else None
+
+    @property
+    def events(self) -> List[Tuple[float, Event]]:
+        """The events still in the event log, as (time, event)."""
+        records = self.log.records()
+        return [
+            (time_ns / 1e9, CODES[code]) for time_ns, code, *_ in records.tolist() if isinstance(CODES[code], Event)
+        ]
+
+    @property
+    def metrics(self) -> List[Tuple[float, Metric, float]]:
+        """The metrics still in the event log, as (time, metric, value)."""
+        records = self.log.records()
+        return [
+            (time_ns / 1e9, CODES[code], value)
+            for time_ns, code, value, _ in records.tolist()
+            if isinstance(CODES[code], Metric)
+        ]
+
+    def get_turn(self, turn_id: int) -> Optional[TurnSummary]:
+        """Return the summary of a kept turn by id, or None if it is unknown."""
+        return self._turns_by_id.get(turn_id)
+
+    def _append(
+        self,
+        key: Union[Event, Metric],
+        record_time: Optional[float],
+        value: float = math.nan,
+        turn_id: Optional[int] = None,
+    ) -> Tuple[float, TurnSummary]:
+        record_time = record_time or time.time()
+        if turn_id is None:
+            turn_id = turns.get_turn_id()
+        seq = self.log.append(int(record_time * 1e9), _CODE_BY_KEY[key], value, turn_id or 0)
+        if turn_id is not None:
+            if turn_id in self._turns_by_id:
+                return record_time, self._turns_by_id[turn_id]
+        elif self.turns and key != Event.USER_SPEECH_END:
+            return record_time, self.turns[-1]
+        turn = TurnSummary(seq, record_time, turn_id)
+        self.turns.append(turn)
+        if turn_id is not None:
+            self._turns_by_id[turn_id] = turn
+            if len(self._turns_by_id) > self.turns.maxlen:
+                del self._turns_by_id[next(iter(self._turns_by_id))]
+        return record_time, turn
 
     def start(self, start_time: float = None) -> None:
-        self.events.append((start_time or time.time(), Event.START))
+        self.log.append(int((start_time or time.time()) * 1e9), _CODE_BY_KEY[Event.START])
 
     def end(self) -> None:
-        self.events.append((time.time(), Event.END))
+        self.log.append(time.time_ns(), _CODE_BY_KEY[Event.END])
         self.log_timeline()
 
-    def register_event(self, event: Event, event_time: float = None) -> None:
-        self.events.append((event_time or time.time(), event))
+    def register_event(self, event: Event, event_time: float = None, turn_id: Optional[int] = None) -> None:
+        """
+        Register an event.
 
-    def register_metric(self, metric: Metric, metric_value: float, metric_time: float = None) -> None:
-        self.metrics.append((metric_time or time.time(), metric, metric_value))
+        Args:
+            event (Event): The event.
+            event_time (float): The time of the event. Defaults to now.
+            turn_id (Optional[int]): The turn of the event. Defaults to the turn of the current context.
+        """
+        event_time, turn = self._append(event, event_time, turn_id=turn_id)
+        for stage, duration in turn.add_event(event, event_time):
+            self.histograms[stage].record(duration)
+            stage_histograms[stage].record(duration)
 
-    def _calculate_average(self, start_event: Event, end_event: Event) -> float:
-        latencies = [
-            self.current_trace[end_event][i] - self.current_trace[start_event][i]
-            for i in range(min(len(self.current_trace[start_event]), len(self.current_trace[end_event])))
-            if end_event in self.current_trace and start_event in self.current_trace
-        ]
-        return mean(latencies) if latencies else 0.0
-
-    def _calculate_throughput(self, metric: Metric, start_event: Event, end_event: Event) -> float:
-        try:
-            throughputs = [
-                self.current_trace[metric][i] / (self.current_trace[end_event][i] - self.current_trace[start_event][i])
-                for i in range(
-                    min(
-                        len(self.current_trace[start_event]),
-                        len(self.current_trace[end_event]),
-                        len(self.current_trace[metric]),
-                    )
-                )
-                if end_event in self.current_trace
-                and start_event in self.current_trace
-                and metric in self.current_trace
-            ]
-        except Exception as e:
-            logging.error("Error calculating throughput: %s", e, metric, start_event, end_event)
-            return 0.0
-        return mean(throughputs) if throughputs else 0.0
+    def register_metric(
+        self, metric: Metric, metric_value: float, metric_time: float = None, turn_id: Optional[int] = None
+    ) -> None:
+        """
+        Register a metric value.
 
-    def log_avg_stats(self) -> None:
-        stats = {
-            "Transcription Latency": self._calculate_average(Event.USER_SPEECH_END, Event.TRANSCRIPTION_RECEIVED),
-            "LLM Time to First Byte": self._calculate_average(Event.LLM_START, Event.LLM_TTFB),
-            "LLM Total Latency": self._calculate_average(Event.LLM_START, Event.LLM_END),
-            "LLM Throughput": self._calculate_throughput(Metric.LLM_TOTAL_BYTES, Event.LLM_START, Event.LLM_END),
-            "TTS Total Latency": self._calculate_average(Event.TTS_START, Event.TTS_END),
-            "TTS Throughput": self._calculate_throughput(Metric.TTS_TOTAL_BYTES, Event.TTS_START, Event.TTS_END),
-            "TTS Time to First Byte": self._calculate_average(Event.TTS_START, Event.TTS_TTFB),
-            "Total Speech to Speech Latency": self._calculate_average(Event.USER_SPEECH_END, Event.TTS_END),
-        }
-
-        logging.info("=== Average Performance Statistics ===")
-        for stat_name, stat_value in stats.items():
-            logging.info(f"{stat_name}: {stat_value:.2f} {'seconds' if 'Latency' in stat_name else 'bytes/second'}")
-        logging.info("======================================")
+        Args:
+            metric (Metric): The metric.
+            metric_value (float): The value.
+            metric_time (float): The time of the value. Defaults to now.
+            turn_id (Optional[int]): The turn of the value. Defaults to the turn of the current context.
+        """
+        _, turn = self._append(metric, metric_time, metric_value, turn_id)
+        turn.add_metric(metric, metric_value)
+        metric_totals[metric] += metric_value
 
-    def log_current_stats(self) -> None:
+    def get_avg_stats(self) -> Dict[str, float]:
+        """Return the statistics averaged over the kept turns of the session."""
+        return calculate_avg_stats(self.turns)
+
+    def get_current_stats(self) -> Dict[str, Optional[float]]:
+        """Return the statistics of the current turn."""
         if self.current_trace is None:
             raise RuntimeError("No trace started")
+        return calculate_turn_stats(self.current_trace)
+
+    def get_latency_percentiles(self) -> Dict[Stage, Dict[str, float]]:
+        """Return the count, p50, p90, p99 and max of every stage over the whole session."""
+        return {stage: histogram.percentiles() for stage, histogram in self.histograms.items()}
+
+    def log_avg_stats(self) -> None:
+        _log_stats(f"Average Performance Statistics ({self.session_id})", self.get_avg_stats())
+        _log_percentiles(f"Latency Percentiles ({self.session_id})", self.get_latency_percentiles())
 
-        stats = {
-            "Transcription Latency": self._get_event_diff(Event.USER_SPEECH_END, Event.TRANSCRIPTION_RECEIVED),
-            "LLM Time to First Byte": self._get_event_diff(Event.LLM_START, Event.LLM_TTFB),
-            "LLM Total Latency": self._get_event_diff(Event.LLM_START, Event.LLM_END),
-            "LLM Throughput": self._get_throughput(Metric.LLM_TOTAL_BYTES, Event.LLM_START, Event.LLM_END),
-            "TTS Total Latency": self._get_event_diff(Event.TTS_START, Event.TTS_END),
-            "TTS Throughput": self._get_throughput(Metric.TTS_TOTAL_BYTES, Event.TTS_START, Event.TTS_END),
-            "TTS Time to First Byte": self._get_event_diff(Event.TTS_START, Event.TTS_TTFB),
-            "Total Speech to Speech Latency": self._get_event_diff(Event.USER_SPEECH_END, Event.TTS_END),
-        }
-
-        logging.info("=== Current Performance Statistics ===")
-        for stat_name, stat_value in stats.items():
-            if stat_value is not None:
-                logging.info(f"{stat_name}: {stat_value:.2f} {'seconds' if 'Latency' in stat_name else 'bytes/second'}")
-        logging.info("=======================================")
-
-    def _get_event_diff(self, start_event: Event, end_event: Event) -> Optional[float]:
-        if start_event in self.current_trace and end_event in self.current_trace:
-            return self.current_trace[end_event][-1] - self.current_trace[start_event][-1]
-        return None
-
-    def _get_throughput(self, metric: Metric, start_event: Event, end_event: Event) -> Optional[float]:
-        try:
-            if all(key in self.current_trace for key in (metric, start_event, end_event)):
-                return self.current_trace[metric][-1] / (
-                    self.current_trace[end_event][-1] - self.current_trace[start_event][-1]
-                )
-        except Exception as e:
-            logging.error("Error calculating throughput: %s", e, metric, start_event, end_event)
-            return None
-
-    def log_timeline(self) -> None:
-        if not self.events:
+    def log_current_stats(self) -> None:
+        _log_stats(f"Current Performance Statistics ({self.session_id})", self.get_current_stats())
+
+    def log_timeline(self, turn_id: Optional[int] = None) -> None:
+        """
+        Log the records of a turn, or of the whole session before the first turn.
+
+        Args:
+            turn_id (Optional[int]): The turn. Defaults to the turn of the current context,
+                or the latest turn outside of a turn.
+        """
+        if turn_id is None:
+            turn_id = turns.get_turn_id()
+        turn = self._turns_by_id.get(turn_id) if turn_id is not None else None
+        turn = turn or self.current_trace
+        records = self.log.records(turn.start_seq if turn is not None else 0)
+        if turn is not None and turn.turn_id is not None:
+            records = records[records["turn_id"] == turn.turn_id]
+        if not len(records):
             logging.info("No timeline events recorded.")
             return
 
-        logging.info("=== Timeline ===")
-        start_time = self.events[0][0]
+        logging.info(f"=== Timeline ({self.session_id}) ===")
+        start_time = int(records[0]["time_ns"])
         last_time = start_time
 
         logging.info(f"{'Elapsed':>8} {'Delta':>8} {'Event':<25} {'Value'}")
         logging.info("-" * 50)
 
-        for timestamp, event in self.events:
-            elapsed_time = timestamp - start_time
-            delta_time = timestamp - last_time
-            event_name = event.name if isinstance(event, Event) else event.name
+        for timestamp, code, value, _ in records.tolist():
+            elapsed_time = (timestamp - start_time) / 1e9
+            delta_time = (timestamp - last_time) / 1e9
+            event_name = CODES[code].name
 
-            logging.info(f"{elapsed_time:8.3f}s {delta_time:8.3f}s {event_name:<25}")
+            logging.info(
+                f"{elapsed_time:8.3f}s {delta_time:8.3f}s {event_name:<25} {'' if math.isnan(value) else value}"
+            )
 
             last_time = timestamp
 
         logging.info("=" * 50)
 
 
-# Global instance
-tracer = Tracer()
+def calculate_turn_stats(turn: TurnSummary) -> Dict[str, Optional[float]]:
+    """
+    Calculate the latencies and throughputs of one turn.
+
+    Args:
+        turn (TurnSummary): The summary of the turn.
+
+    Returns:
+        Dict[str, Optional[float]]: The statistics by name, None when the turn lacks the events.
+    """
+    stats: Dict[str, Optional[float]] = {name: turn.stages.get(stage) for name, stage in LATENCY_STATS.items()}
+    for name, (metric, stage) in THROUGHPUT_STATS.items():
+        duration = turn.stages.get(stage)
+        stats[name] = turn.metric_values[metric] / duration if metric in turn.metric_values and duration else None
+    return stats
+
+
+def calculate_avg_stats(turns: Iterable[TurnSummary]) -> Dict[str, float]:
+    """
+    Average the statistics of many turns, skipping the turns that lack a statistic.
+
+    Args:
+        turns (Iterable[TurnSummary]): The summaries of the turns.
+
+    Returns:
+        Dict[str, float]: The average statistics by name, 0.0 when no turn has the statistic.
+    """
+    values: Dict[str, List[float]] = {name: [] for name in (*LATENCY_STATS, *THROUGHPUT_STATS)}
+    for turn in turns:
+        for name, value in calculate_turn_stats(turn).items():
+            if value is not None:
+                values[name].append(value)
+    return {name: mean(stat_values) if stat_values else 0.0 for name, stat_values in values.items()}
+
+
+def _log_stats(title: str, stats: Dict[str, Optional[float]]) -> None:
+    logging.info(f"=== {title} ===")
+    for stat_name, stat_value in stats.items():
+        if stat_value is not None:
+            logging.info(f"{stat_name}: {stat_value:.2f} {'seconds' if 'Latency' in stat_name else 'bytes/second'}")
+    logging.info("=" * (len(title) + 8))
+
+
+def _log_percentiles(
+    title: str, percentiles: Dict[Union[Stage, str], Dict[str, float]], unit: str = "s", scale: float = 1.0
+) -> None:
+    logging.info(f"=== {title} ===")
+    for key, summary in percentiles.items():
+        if summary["count"]:
+            name = key.value if isinstance(key, Stage) else key
+            p50, p90, p99, max_value = (summary[stat] * scale for stat in ("p50", "p90", "p99", "max"))
+            logging.info(
+                f"{name:<18} n={int(summary['count']):<6} p50={p50:.3f}{unit} "
+                f"p90={p90:.3f}{unit} p99={p99:.3f}{unit} max={max_value:.3f}{unit}"
+            )
+    logging.info("=" * (len(title) + 8))
+
+
+# Stage latencies of every session of the process, with a one minute sliding window
+stage_histograms: Dict[Stage, LatencyHistogram] = {stage: LatencyHistogram(window_seconds=60.0) for stage in Stage}
+
+# Tracer used outside of a session
+tracer = Tracer(session_id="global")
+
+_current_tracer: ContextVar[Optional[Tracer]] = ContextVar("tracer", default=None)
+
+# Sum of every metric over all sessions of the process
+metric_totals: Dict[Metric, float] = {metric: 0.0 for metric in Metric}
+
+# Tracers of the sessions that are running, by session id
+sessions: Dict[str, Tracer] = {}
+sessions_started: int = 0
+
+# Turns of the sessions that have ended, for the process wide statistics
+finished_turns: Deque[TurnSummary] = deque(maxlen=10000)
+
+# Tracers of the last sessions that have ended, to inspect them after the fact
+ended_sessions: Deque[Tracer] = deque(maxlen=20)
+
+# Fraction of the spans timed by span and traced, 0 disables them
+span_sample_rate: float = float(os.environ.get("REALTIME_SPAN_SAMPLE_RATE", 0.0))
+
+# Durations of the sampled spans of the process by name, with a one minute sliding window
+span_histograms: Dict[str, LatencyHistogram] = {}
+
+
+def get_tracer() -> Tracer:
+    """Return the tracer of the current session, or the global tracer outside of a session."""
+    return _current_tracer.get() or tracer
+
+
+def start_session(session_id: Optional[str] = None, start_time: float = None) -> Tracer:
+    """
+    Start tracing a new session in the current context.
+
+    Tasks created from this context afterwards inherit the session tracer, so the module
+    functions called from them record into it.
+
+    Args:
+        session_id (Optional[str]): The id of the session. A random id is used if None.
+        start_time (float): The start time of the session. Defaults to now.
+
+    Returns:
+        Tracer: The session tracer.
+    """
+    global sessions_started
+    session_tracer = Tracer(session_id)
+    sessions[session_tracer.session_id] = session_tracer
+    sessions_started += 1
+    _current_tracer.set(session_tracer)
+    session_tracer.start(start_time)
+    return session_tracer
+
+
+def end_session(session_tracer: Optional[Tracer] = None) -> None:
+    """
+    End a session, logging its timeline and keeping its turns for the process wide statistics.
+
+    Args:
+        session_tracer (Optional[Tracer]): The session to end. Defaults to the current session.
+    """
+    session_tracer = session_tracer or get_tracer()
+    session_tracer.end()
+    if sessions.pop(session_tracer.session_id, None) is not None:
+        finished_turns.extend(session_tracer.turns)
+        ended_sessions.append(session_tracer)
+    if _current_tracer.get() is session_tracer:
+        _current_tracer.set(None)
+
+
+def get_session(session_id: str) -> Optional[Tracer]:
+    """Return the tracer of a running or recently ended session, or None if it is unknown."""
+    if session_id in sessions:
+        return sessions[session_id]
+    return next((ended for ended in reversed(ended_sessions) if ended.session_id == session_id), None)
+
+
+def get_process_stats() -> Dict[str, float]:
+    """Return the statistics averaged over the turns of all sessions of the process."""
+    turns = list(finished_turns)
+    for session_tracer in list(sessions.values()):
+        turns.extend(session_tracer.turns)
+    return calculate_avg_stats(turns)
+
+
+def get_process_latency_percentiles(window: bool = False) -> Dict[Stage, Dict[str, float]]:
+    """
+    Return the count, p50, p90, p99 and max of every stage over all sessions of the process.
+
+    Args:
+        window (bool): Only use the latencies of the last minute.
+    """
+    return {stage: histogram.percentiles(window=window) for stage, histogram in stage_histograms.items()}
+
+
+def start(start_time: float = None) -> None:
+    get_tracer().start(start_time)
+
+
+def end() -> None:
+    get_tracer().end()
+
+
+def register_event(event: Event, event_time: float = None, turn_id: Optional[int] = None) -> None:
+    get_tracer().register_event(event, event_time, turn_id)
+
+
+def register_metric(
+    metric: Metric, metric_value: float, metric_time: float = None, turn_id: Optional[int] = None
+) -> None:
+    get_tracer().register_metric(metric, metric_value, metric_time, turn_id)
+
+
+def log_avg_stats() -> None:
+    get_tracer().log_avg_stats()
+
+
+def log_current_stats() -> None:
+    get_tracer().log_current_stats()
+
+
+def log_timeline(turn_id: Optional[int] = None) -> None:
+    get_tracer().log_timeline(turn_id)
+
+
+def log_process_stats() -> None:
+    _log_stats(f"Process Performance Statistics ({len(sessions)} active sessions)", get_process_stats())
+    _log_percentiles("Process Latency Percentiles (last minute)", get_process_latency_percentiles(window=True))
+    if span_histograms:
+        _log_percentiles("Span Durations (last minute)", get_span_percentiles(window=True), unit="ms", scale=1000)
+
+
+def set_span_sample_rate(sample_rate: float) -> None:
+    """
+    Set the fraction of the spans that are timed.
+
+    Args:
+        sample_rate (float): The fraction in [0, 1]. 0 disables the spans, 1 times all of them.
+    """
+    global span_sample_rate
+    span_sample_rate = sample_rate
+
+
+def _sampled() -> bool:
+    return span_sample_rate >= 1.0 or (span_sample_rate > 0.0 and random.random() < span_sample_rate)
+
+
+def record_span(name: str, duration: float) -> None:
+    """
+    Record the duration of a span into the histogram of its name.
+
+    Args:
+        name (str): The name of the span.
+        duration (float): The duration in seconds.
+    """
+    histogram = span_histograms.get(name)
+    if histogram is None:
+        histogram = span_histograms[name] = LatencyHistogram(min_value=1e-6, max_value=60.0, window_seconds=60.0)
+    histogram.record(duration)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str, start: float):
+        self.name: str = name
+        self.start: float = start
+
+    def __enter__(self) -> "_Span":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        record_span(self.name, time.perf_counter() - self.start)
+        return False
+
+
+# Returned by span when the block is not sampled, so that it costs no allocation
+_UNSAMPLED_SPAN = contextlib.nullcontext()
+
+
+def span(name: str) -> ContextManager:
+    """
+    Return a context manager timing a block of code into the span histogram of its name.
+
+    Only a ``span_sample_rate`` fraction of the blocks are timed. When sampling is disabled
+    the span is a shared no-op context manager, which costs little more than a function call.
+
+    Example:
+        with tracing.span("base64_decode"):
+            audio_bytes = base64.b64decode(data)
+
+    Args:
+        name (str): The name of the span.
+
+    Returns:
+        ContextManager: The context manager.
+    """
+    if not span_sample_rate or not _sampled():
+        return _UNSAMPLED_SPAN
+    return _Span(name, time.perf_counter())
+
+
+def traced(name: Union[str, Callable, None] = None) -> Callable:
+    """
+    Decorate a function or coroutine function so that its calls are timed as spans.
+
+    It is used as ``@traced``, which names the span after the qualified name of the
+    function, or as ``@traced("name")``.
+
+    Args:
+        name (Union[str, Callable, None]): The name of the span, or the decorated function.
+
+    Returns:
+        Callable: The decorated function, or a decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name if isinstance(name, str) else func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not span_sample_rate or not _sampled():
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record_span(span_name, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not span_sample_rate or not _sampled():
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_span(span_name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator(name) if callable(name) else decorator
+
+
+def get_span_percentiles(window: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Return the count, p50, p90, p99 and max duration of every span of the process.
 
-# Expose global methods
-start = tracer.start
-end = tracer.end
-register_event = tracer.register_event
-register_metric = tracer.register_metric
-log_avg_stats = tracer.log_avg_stats
-log_current_stats = tracer.log_current_stats
-log_timeline = tracer.log_timeline
+    Args:
+        window (bool): Only use the durations of the last minute.
+    """
+    return {name: histogram.percentiles(window=window) for name, histogram in list(span_histograms.items())}
@@ -0,0 +1,43 @@
+import itertools
+from contextvars import ContextVar
+from typing import Optional
+
+# Turn ids are small process wide integers, so they fit in the event log records
+_turn_ids = itertools.count(1)
+
+_current_turn: ContextVar[Optional[int]] = ContextVar("turn_id", default=None)
+
+
+def new_turn_id() -> int:
+    """Return a turn id that was never used in the process."""
+    return next(_turn_ids)
+
+
+def start_turn() -> int:
+    """
+    Start a new turn in the current context.
+
+    Items put in streams from this context afterwards carry the new turn id, and the
+    events registered from it are attributed to the turn.
+
+    Returns:
+        int: The id of the new turn.
+    """
+    turn_id = new_turn_id()
+    _current_turn.set(turn_id)
+    return turn_id
+
+
+def get_turn_id() -> Optional[int]:
+    """Return the id of the turn the current context works on, or None outside of a turn."""
+    return _current_turn.get()
+
+
+def set_turn_id(turn_id: Optional[int]) -> None:
+    """
+    Set the turn the current context works on.
+
+    Args:
+        turn_id (Optional[int]): The id of the turn, or None to leave any turn.
+    """
+    _current_turn.set(turn_id)
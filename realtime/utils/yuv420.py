@@ -0,0 +1,231 @@
+from typing import Tuple, Union
+
+import numpy as np
+from av import VideoFrame
+
+from realtime.data import ImageData
+
+Planes = Tuple[np.ndarray, np.ndarray, np.ndarray]
+Box = Tuple[int, int, int, int]
+
+
+def yuv420_planes(frame: Union[ImageData, VideoFrame, np.ndarray]) -> Planes:
+    """
+    Get the Y, U and V planes of a yuv420p frame as uint8 arrays.
+
+    For a VideoFrame that is already in yuv420p the planes are zero-copy views of the
+    frame buffers, so they are only valid while the frame is alive. Frames in any other
+    format are converted to yuv420p first.
+
+    Args:
+        frame (Union[ImageData, VideoFrame, np.ndarray]): An ImageData or VideoFrame, or the
+            (h * 3 / 2, w) array returned by ``VideoFrame.to_ndarray(format="yuv420p")``.
+
+    Returns:
+        Planes: The (h, w) luma plane and the two (h / 2, w / 2) chroma planes.
+    """
+    if isinstance(frame, ImageData):
+        frame = frame.get_frame()
+    if isinstance(frame, VideoFrame):
+        if frame.format.name != "yuv420p":
+            return yuv420_planes(frame.to_ndarray(format="yuv420p"))
+        planes = []
+        for plane in frame.planes:
+            data = np.frombuffer(plane, dtype=np.uint8).reshape(-1, plane.line_size)
+            planes.append(data[: plane.height, : plane.width])
+        return planes[0], planes[1], planes[2]
+
+    w, h = frame.shape[1], frame.shape[0] * 2 // 3
+    data1d = frame.reshape(-1)
+    y_end = w * h
+    u_end = y_end + (w // 2) * (h // 2)
+    y = data1d[:y_end].reshape(h, w)
+    u = data1d[y_end:u_end].reshape(h // 2, w // 2)
+    v = data1d[u_end : u_end + (w // 2) * (h // 2)].reshape(h // 2, w // 2)
+    return y, u, v
+
+
+def crop_yuv420_planes(planes: Planes, box: Box) -> Planes:
+    """
+    Crop yuv420p planes to a pixel box without copying.
+
+    The box is snapped outwards to even coordinates so that it lines up with the
+    2x2 chroma subsampling grid.
+
+    Args:
+        planes (Planes): The Y, U and V planes.
+        box (Box): The (left, top, right, bottom) box in luma pixels.
+
+    Returns:
+        Planes: Views of the cropped Y, U and V planes.
+    """
+    y, u, v = planes
+    height, width = y.shape
+    left, top, right, bottom = box
+    left = max(0, int(left)) & ~1
+    top = max(0, int(top)) & ~1
+    right = min(width, int(right) + (int(right) & 1))
+    bottom = min(height, int(bottom) + (int(bottom) & 1))
+    if right <= left or bottom <= top:
+        raise ValueError(f"Invalid crop box {box} for a {width}x{height} frame")
+    return (
+        y[top:bottom, left:right],
+        u[top // 2 : (bottom + 1) // 2, left // 2 : (right + 1) // 2],
+        v[top // 2 : (bottom + 1) // 2, left // 2 : (right + 1) // 2],
+    )
+
+
+def downscale_luma(y: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """
+    Downscale a luma plane with a block mean.
+
+    Large planes are first subsampled with a strided view so that each output pixel
+    averages at most a 4x4 block, which keeps the cost independent of the input
+    resolution.
+
+    Args:
+        y (np.ndarray): The luma plane.
+        size (Tuple[int, int]): The (width, height) of the output.
+
+    Returns:
+        np.ndarray: A (height, width) uint8 array.
+    """
+    out_w, out_h = size
+    height, width = y.shape
+    step_y = max(1, height // (out_h * 4))
+    step_x = max(1, width // (out_w * 4))
+    sampled = y[::step_y, ::step_x]
+    block_h = sampled.shape[0] // out_h
+    block_w = sampled.shape[1] // out_w
+    if block_h == 0 or block_w == 0:
+        raise ValueError(f"Cannot downscale a {width}x{height} plane to {out_w}x{out_h}")
+    blocks = sampled[: block_h * out_h, : block_w * out_w].reshape(out_h, block_h, out_w, block_w)
+    sums = blocks.sum(axis=(1, 3), dtype=np.uint32)
+    return (sums // (block_h * block_w)).astype(np.uint8)
+
+
+def luma_change_ratio(y1: np.ndarray, y2: np.ndarray, noise_floor: int = 12) -> float:
+    """
+    Compute the fraction of pixels whose luma changed by more than a noise floor.
+
+    The absolute difference is computed in uint8 without widening to avoid large
+    temporaries.
+
+    Args:
+        y1 (np.ndarray): The first luma plane.
+        y2 (np.ndarray): The second luma plane.
+        noise_floor (int): Differences up to this value are treated as sensor noise.
+
+    Returns:
+        float: A value in [0, 1]. Planes of different shapes return 1.
+    """
+    if y1.shape != y2.shape:
+        return 1.0
+    diff = np.maximum(y1, y2)
+    diff -= np.minimum(y1, y2)
+    return np.count_nonzero(diff > noise_floor) / diff.size
+
+
+def yuv420_to_rgb(planes: Planes) -> np.ndarray:
+    """
+    Convert yuv420p planes to a uint8 RGB array.
+
+    The planes (typically a crop) are copied into a yuv420p VideoFrame and converted by
+    swscale, which is an order of magnitude faster than any numpy formulation and never
+    materialises float or upsampled chroma arrays. Odd trailing rows and columns are dropped.
+
+    Args:
+        planes (Planes): The Y, U and V planes.
+
+    Returns:
+        np.ndarray: An (h, w, 3) uint8 RGB array.
+    """
+    frame = yuv420_frame(planes)
+    return frame.to_ndarray(format="rgb24")
+
+
+def yuv420_frame(planes: Planes) -> VideoFrame:
+    """
+    Copy yuv420p planes into a new yuv420p VideoFrame.
+
+    Args:
+        planes (Planes): The Y, U and V planes.
+
+    Returns:
+        VideoFrame: A frame with even width and height holding a copy of the planes.
+    """
+    y, u, v = planes
+    height, width = y.shape[0] & ~1, y.shape[1] & ~1
+    if height == 0 or width == 0:
+        raise ValueError(f"Cannot build a frame from a {y.shape[1]}x{y.shape[0]} luma plane")
+    frame = VideoFrame(width, height, "yuv420p")
+    sources = (y[:height, :width], u[: height // 2, : width // 2], v[: height // 2, : width // 2])
+    for source, plane in zip(sources, frame.planes):
+        target = np.frombuffer(plane, dtype=np.uint8).reshape(-1, plane.line_size)
+        target[: plane.height, : plane.width] = source
+    return frame
+
+
+class RegionOfInterest:
+    """
+    A crop region applied to yuv420p planes before any conversion or hashing.
+
+    The box is either fractional, with coordinates in [0, 1] relative to the frame size,
+    or in pixels.
+    """
+
+    def __init__(self, left: float, top: float, right: float, bottom: float, unit: str = "fraction"):
+        """
+        Initialize a RegionOfInterest.
+
+        Args:
+            left (float): The left edge.
+            top (float): The top edge.
+            right (float): The right edge.
+            bottom (float): The bottom edge.
+            unit (str): 'fraction' for coordinates relative to the frame size or 'pixel'.
+
+        Raises:
+            ValueError: If the unit is unknown or the box is empty.
+        """
+        if unit not in ("fraction", "pixel"):
+            raise ValueError("RegionOfInterest unit must be 'fraction' or 'pixel'")
+        if right <= left or bottom <= top:
+            raise ValueError(f"Invalid region of interest: {(left, top, right, bottom)}")
+        if unit == "fraction" and not all(0.0 <= value <= 1.0 for value in (left, top, right, bottom)):
+            raise ValueError("Fractional region of interest coordinates must be in [0, 1]")
+        self.box = (left, top, right, bottom)
+        self.unit: str = unit
+
+    @classmethod
+    def from_value(cls, value: Union["RegionOfInterest", Tuple[float, float, float, float], None]):
+        """
+        Build a region from a RegionOfInterest, a box tuple or None.
+
+        A tuple of floats within [0, 1] is fractional, a tuple of ints is in pixels.
+        None means the full frame.
+        """
+        if value is None or isinstance(value, RegionOfInterest):
+            return value
+        if all(isinstance(v, int) for v in value):
+            return cls(*value, unit="pixel")
+        return cls(*value, unit="fraction")
+
+    def resolve(self, width: int, height: int) -> Box:
+        """Return the (left, top, right, bottom) pixel box for a frame size."""
+        left, top, right, bottom = self.box
+        if self.unit == "fraction":
+            return (round(left * width), round(top * height), round(right * width), round(bottom * height))
+        return (int(left), int(top), min(int(right), width), min(int(bottom), height))
+
+    def crop(self, planes: Planes) -> Planes:
+        """Crop yuv420p planes to the region without copying."""
+        height, width = planes[0].shape
+        return crop_yuv420_planes(planes, self.resolve(width, height))
+
+    def __repr__(self) -> str:
+        return f"RegionOfInterest({self.box}, unit={self.unit!r})"
+
+
+# The region the vision plugins have always looked at
+BOTTOM_LEFT_QUADRANT = RegionOfInterest(0.0, 0.5, 0.5, 1.0)
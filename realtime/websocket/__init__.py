@@ -7,6 +7,7 @@ from typing import Callable, List, Optional, Tuple, Union
 from realtime._realtime_function import RealtimeFunction
 from realtime.server import RealtimeServer
 from realtime.streams import AudioStream, ByteStream, TextStream, VideoStream
+from realtime.utils import chrome_trace, playout, tracing
 from realtime.websocket.handler import create_and_add_ws_handler
 from realtime.websocket.processors import WebsocketInputProcessor, WebsocketOutputProcessor
 
@@ -22,6 +23,10 @@ def websocket(path: str = "/"):
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         async def wrapper(*args, **kwargs) -> None:
+            # Tasks created below inherit the session tracer through the context
+            session_tracer = tracing.start_session()
+            # Interrupts from the plugins flush the output processor
+            playout.start_outputs()
             try:
                 audio_input_q = None
                 video_input_q = None
@@ -77,6 +82,8 @@ def websocket(path: str = "/"):
             finally:
                 logging.info("websocket: Removing connection")
                 RealtimeServer().remove_connection()
+                tracing.end_session(session_tracer)
+                chrome_trace.dump_session_trace(session_tracer)
 
         rt_func = RealtimeFunction(wrapper)
         return rt_func
@@ -35,6 +35,7 @@ def get_websocket_handler(
                 while True:
                     data = await oq.get()
                     await websocket.send_json(data)
+                    websocket_output_processor.on_sent(data)
 
             websocket_input_processor.setInputTrack(iq)
             websocket_input_processor.sample_rate = audio_metadata.get("input_sample_rate", 48000)
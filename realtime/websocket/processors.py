@@ -2,6 +2,7 @@ import asyncio
 import base64
 import logging
 import time
+from typing import Optional
 
 import numpy as np
 import scipy.signal as signal
@@ -9,8 +10,11 @@ from fastapi import WebSocket
 
 from realtime.data import AudioData
 from realtime.streams import AudioStream, ByteStream, TextStream, VideoStream
+from realtime.utils import playout, tracing, turns
+from realtime.utils.playout import PlayoutTracker
 
 
+@tracing.traced
 def resample_wav_bytes(audio_data: AudioData, target_sample_rate: int) -> bytes:
     """
     Resample WAV bytes to a target sample rate.
@@ -91,7 +95,8 @@ class WebsocketInputProcessor:
                 if data.get("type") == "message":
                     await self.message_stream.put(data.get("data"))
                 elif data.get("type") == "audio":
-                    audio_bytes = base64.b64decode(data.get("data"))
+                    with tracing.span("base64_decode"):
+                        audio_bytes = base64.b64decode(data.get("data"))
                     audio_data = AudioData(audio_bytes, sample_rate=self.sample_rate)
                     await self.audio_output_stream.put(audio_data)
             except Exception as e:
@@ -129,6 +134,8 @@ class WebsocketOutputProcessor:
         self.video_stream = video_stream
         self.byte_stream = byte_stream
         self._outputTrack = None
+        self.playout = PlayoutTracker()
+        playout.register_output(self)
 
     def setOutputTrack(self, track: TextStream):
         self._outputTrack = track
@@ -155,13 +162,17 @@ class WebsocketOutputProcessor:
             audio_data = await input_stream.get()
             if audio_data is None:
                 print("Sending audio end")
+                self.playout.on_queued_end()
                 json_data = {"type": "audio_end", "timestamp": time.time()}
                 await self._outputTrack.put(json_data)
             elif isinstance(audio_data, AudioData):
                 data = resample_wav_bytes(audio_data, self.sample_rate)
+                self.playout.on_queued(len(data) / 2 / self.sample_rate, audio_data.turn_id)
+                with tracing.span("base64_encode"):
+                    encoded_data = base64.b64encode(data).decode()
                 json_data = {
                     "type": "audio",
-                    "data": base64.b64encode(data).decode(),
+                    "data": encoded_data,
                     "timestamp": time.time(),
                     "sample_rate": audio_data.sample_rate,
                 }
@@ -171,3 +182,35 @@ class WebsocketOutputProcessor:
                 await self._outputTrack.put(json_data)
             else:
                 raise ValueError(f"Unsupported data type: {type(audio_data)}")
+
+    def interrupt(self) -> Optional[float]:
+        """
+        Drop the audio not sent over the WebSocket yet. Audio the client already received is
+        not recalled.
+
+        Returns:
+            Optional[float]: The milliseconds of the interrupted turn that were sent, or None
+                when no turn was being played.
+        """
+        if self.audio_stream:
+            self.audio_stream.clear()
+        if self._outputTrack:
+            self._outputTrack.clear(keep=lambda json_data: json_data.get("type") != "audio")
+        sent_seconds = self.playout.flush()
+        return sent_seconds * 1000 if sent_seconds is not None else None
+
+    def on_sent(self, json_data: dict) -> None:
+        """
+        Record a message sent over the WebSocket, to trace when the audio of every turn leaves.
+
+        It runs in the task sending the messages, where the turn of the message is current.
+
+        Args:
+            json_data (dict): The message sent.
+        """
+        if json_data.get("type") == "audio":
+            # 16 bit samples, base64 encoded
+            num_bytes = len(json_data["data"]) * 3 // 4 - json_data["data"][-2:].count("=")
+            self.playout.on_sent(num_bytes / 2 / self.sample_rate, turns.get_turn_id())
+        elif json_data.get("type") == "audio_end":
+            self.playout.on_sent_end()
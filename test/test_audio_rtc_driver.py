@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+
+import numpy as np
+from av import AudioFrame
+
+from realtime.data import AudioData
+from realtime.streaming_endpoint.AudioRTCDriver import AudioRTCDriver
+from realtime.streaming_endpoint.server import negotiated_audio_format
+from realtime.streams import AudioStream
+from realtime.utils import playout
+
+
+class FakeTrack:
+    """Delivers 20ms 48kHz stereo frames, like aiortc does."""
+
+    def __init__(self, count):
+        self.count = count
+
+    async def recv(self):
+        if not self.count:
+            await asyncio.Future()
+        self.count -= 1
+        frame = AudioFrame.from_ndarray(np.zeros((1, 1920), dtype=np.int16), format="s16", layout="stereo")
+        frame.sample_rate = 48000
+        return frame
+
+
+@pytest.mark.asyncio
+async def test_input_is_converted_to_the_stream_format():
+    audio_input = AudioStream(sample_rate=16000, frame_duration=0.01)
+    driver = AudioRTCDriver(audio_input, AudioStream())
+    driver.add_track(FakeTrack(5))
+    task = asyncio.create_task(driver.run_input())
+    audio = [await asyncio.wait_for(audio_input.get(), 1) for _ in range(8)]
+    task.cancel()
+    for audio_data in audio:
+        frame = audio_data.get_frame()
+        assert (frame.sample_rate, frame.layout.name, frame.samples) == (16000, "mono", 160)
+        assert audio_data.get_duration_seconds() == pytest.approx(0.01)
+
+
+def make_answer(rtpmap):
+    return "\r\n".join(
+        [
+            "v=0",
+            "o=- 1 1 IN IP4 0.0.0.0",
+            "s=-",
+            "t=0 0",
+            "m=audio 9 UDP/TLS/RTP/SAVPF 0",
+            "c=IN IP4 0.0.0.0",
+            f"a=rtpmap:0 {rtpmap}",
+            "",
+        ]
+    )
+
+
+def test_negotiated_audio_format():
+    assert negotiated_audio_format(make_answer("opus/48000/2")) == (48000, "stereo")
+    assert negotiated_audio_format(make_answer("PCMU/8000")) == (8000, "mono")
+    assert negotiated_audio_format(make_answer("G722/8000")) == (16000, "mono")
+
+
+@pytest.mark.asyncio
+async def test_output_is_produced_in_the_negotiated_format():
+    audio_output = AudioStream()
+    driver = AudioRTCDriver(None, audio_output)
+    driver.set_output_format(8000, "mono")
+    task = asyncio.create_task(driver.run_output())
+    await audio_output.put(AudioData(bytes(3200), sample_rate=16000))
+    frame = await asyncio.wait_for(driver.recv(), 1)
+    while frame is driver.silence_frame:
+        frame = await asyncio.wait_for(driver.recv(), 1)
+    task.cancel()
+    assert (frame.sample_rate, frame.layout.name, frame.samples) == (8000, "mono", 160)
+
+
+@pytest.mark.asyncio
+async def test_input_is_encoded_to_ogg_opus():
+    audio_input = AudioStream(sample_rate=16000, codec="opus")
+    driver = AudioRTCDriver(audio_input, AudioStream())
+    driver.add_track(FakeTrack(10))
+    task = asyncio.create_task(driver.run_input())
+    audio = [await asyncio.wait_for(audio_input.get(), 1) for _ in range(5)]
+    task.cancel()
+    assert all(audio_data.format == "opus" for audio_data in audio)
+    assert audio[0].get_bytes().startswith(b"OggS")
+    assert audio[1].get_duration_seconds() == pytest.approx(0.02)
+    # 20ms of 16kHz linear16 is 640 bytes
+    assert len(audio[1].get_bytes()) < 320
+
+
+@pytest.mark.asyncio
+async def test_interrupt_flushes_the_queued_audio_and_trims_the_reply():
+    playout.start_outputs()
+    audio_output = AudioStream()
+    driver = AudioRTCDriver(None, audio_output)
+    task = asyncio.create_task(driver.run_output())
+    # One second of audio, of which 100ms is sent before the user barges in
+    await audio_output.put(AudioData(bytes(32000), sample_rate=16000))
+    await audio_output.put(None)
+    sent = 0
+    while sent < 5:
+        frame = await asyncio.wait_for(driver.recv(), 1)
+        sent += frame is not driver.silence_frame
+    history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello there, how are you?"}]
+    transmitted_ms = playout.interrupt_reply(history, generating=False)
+    assert transmitted_ms == pytest.approx(100)
+    assert history[-1]["content"] == ""
+    assert (await asyncio.wait_for(driver.recv(), 1)) is driver.silence_frame
+    # Nothing is being played anymore, so the reply is left alone
+    assert playout.interrupt_reply(history, generating=False) is None
+    task.cancel()
+    assert playout.heard_text("Hello there, how are you?", 1000) == "Hello there,"
@@ -0,0 +1,34 @@
+import json
+
+from realtime.utils import chrome_trace, tracing
+from realtime.utils.tracing import Event, Metric
+
+
+def test_export_spans_per_session(tmp_path):
+    session_tracer = tracing.Tracer(session_id="slow")
+    session_tracer.start(1.0)
+    for turn_start in (2.0, 10.0):
+        session_tracer.register_event(Event.USER_SPEECH_END, turn_start)
+        session_tracer.register_event(Event.TRANSCRIPTION_RECEIVED, turn_start + 0.2)
+        session_tracer.register_event(Event.LLM_START, turn_start + 0.3)
+        session_tracer.register_event(Event.LLM_TTFB, turn_start + 0.5)
+        for sentence in range(2):
+            session_tracer.register_event(Event.TTS_START, turn_start + 0.6 + sentence)
+            session_tracer.register_event(Event.TTS_END, turn_start + 1.2 + sentence)
+        session_tracer.register_event(Event.LLM_END, turn_start + 1.0)
+        session_tracer.register_metric(Metric.LLM_TOTAL_BYTES, 100, turn_start + 1.0)
+
+    trace = chrome_trace.export_chrome_trace([session_tracer])
+    spans = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    names = [span["name"] for span in spans]
+    assert names.count("tts") == 4 and names.count("llm") == 2 and names.count("stt -> llm") == 2
+    assert {"turn 1", "turn 2", "session slow"} <= set(names)
+    llm = next(span for span in spans if span["name"] == "llm")
+    assert llm["ts"] == 2.3e6 and abs(llm["dur"] - 0.7e6) < 1
+    wait = next(span for span in spans if span["name"] == "llm -> tts")
+    assert abs(wait["dur"] - 0.1e6) < 1 and wait["tid"] == chrome_trace.LANES["queue"]
+    assert any(event["ph"] == "C" for event in trace["traceEvents"])
+
+    path = chrome_trace.dump_chrome_trace(str(tmp_path / "trace.json"), [session_tracer])
+    with open(path) as trace_file:
+        assert json.load(trace_file) == json.loads(json.dumps(trace))
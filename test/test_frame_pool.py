@@ -0,0 +1,60 @@
+import io
+
+import numpy as np
+from av import AudioResampler
+from PIL import Image
+
+from realtime.data import AudioData, ImageData
+from realtime.utils.frame_pool import AudioFramePool, VideoFramePool
+
+
+def test_audio_frames_are_reused_after_release():
+    pool = AudioFramePool()
+    frame, view = pool.acquire(160, 16000)
+    view[...] = 7
+    assert (frame.to_ndarray() == 7).all()
+    assert pool.release(frame)
+    assert not pool.release(frame)
+    again, _ = pool.acquire(160, 16000)
+    assert again is frame
+    assert pool.allocated == 1 and pool.reused == 1
+    other, _ = pool.acquire(160, 16000, layout="stereo")
+    assert other is not frame
+
+
+def test_pooled_audio_data_frames_match_unpooled_resampling():
+    samples = np.arange(16000 * 3 // 4, dtype=np.int16)
+    audio = AudioData(samples.tobytes(), sample_rate=16000, relative_start_time=1.0)
+    pool = AudioFramePool()
+
+    expected = AudioResampler(format="s16", layout="stereo", rate=48000, frame_size=960).resample(audio.get_frame())
+    resampler = AudioResampler(format="s16", layout="stereo", rate=48000, frame_size=960)
+    resampled = []
+    pts = []
+    for frame in audio.get_frames(320, pool=pool):
+        pts.append(frame.pts)
+        resampled.extend(nframe.to_ndarray() for nframe in resampler.resample(frame))
+        pool.release(frame)
+
+    assert pts[:2] == [16000, 16320]
+    assert pool.allocated == 2 and pool.in_use == 0
+    np.testing.assert_array_equal(
+        np.concatenate(resampled, axis=1), np.concatenate([f.to_ndarray() for f in expected], axis=1)
+    )
+
+
+def test_pooled_image_frames():
+    rgb = np.random.default_rng(0).integers(0, 256, size=(30, 50, 3), dtype=np.uint8)
+    pool = VideoFramePool()
+    frame = ImageData(rgb, frame_rate=10, relative_start_time=2.0).get_frame(pool=pool)
+    np.testing.assert_array_equal(frame.to_ndarray(format="rgb24"), rgb)
+    assert frame.pts == 20
+    pool.release(frame)
+
+    buffer = io.BytesIO()
+    Image.fromarray(rgb).save(buffer, format="png")
+    data = buffer.getvalue()
+    again = ImageData(data, format="png").get_frame(pool=pool)
+    assert again is frame
+    np.testing.assert_array_equal(again.to_ndarray(format="rgb24"), rgb)
+    assert pool.decode_image(data, "png") is pool.decode_image(bytes(data), "png")
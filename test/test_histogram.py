@@ -0,0 +1,32 @@
+import pytest
+
+import numpy as np
+
+from realtime.utils.histogram import LatencyHistogram
+
+
+def test_percentiles_within_precision():
+    values = np.random.default_rng(0).lognormal(mean=-1.0, sigma=0.8, size=5000)
+    histogram = LatencyHistogram(precision=0.02)
+    for value in values:
+        histogram.record(float(value))
+    summary = histogram.percentiles()
+    assert summary["count"] == 5000
+    assert summary["max"] == pytest.approx(values.max())
+    for percentile in (50, 90, 99):
+        expected = np.percentile(values, percentile)
+        assert expected <= summary[f"p{percentile}"] <= expected * 1.03
+    assert histogram.mean == pytest.approx(values.mean())
+
+
+def test_sliding_window_forgets_old_values():
+    histogram = LatencyHistogram(window_seconds=60.0, window_slots=6)
+    histogram.record(5.0, now=0.0)
+    histogram.record(0.1, now=30.0)
+    assert histogram.percentiles(window=True, now=30.0)["max"] == 5.0
+    window = histogram.percentiles(window=True, now=65.0)
+    assert window["count"] == 1 and window["max"] == 0.1
+    assert histogram.percentiles(window=True, now=200.0)["count"] == 0
+    assert histogram.percentiles()["max"] == 5.0
+    with pytest.raises(ValueError):
+        LatencyHistogram().percentiles(window=True)
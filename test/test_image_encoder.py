@@ -0,0 +1,76 @@
+import base64
+import io
+import logging
+import pytest
+
+import numpy as np
+from PIL import Image
+
+from realtime.utils import tracing
+from realtime.utils.image_encoder import ImageEncoder
+from realtime.utils.tracing import Metric
+
+
+def make_noise(width, height):
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+
+def decode(data):
+    return Image.open(io.BytesIO(data))
+
+
+def test_image_is_scaled_to_fit_the_max_size():
+    encoder = ImageEncoder(max_size=(320, 240), max_bytes=None)
+    image = Image.new("RGB", (1280, 720))
+    assert decode(encoder.encode_sync(image)).size == (320, 180)
+    assert image.size == (1280, 720)
+    encoder.close()
+
+
+def test_image_is_fit_to_the_byte_budget():
+    image = make_noise(400, 400)
+    high = len(ImageEncoder(quality=85, max_bytes=None).encode_sync(image))
+    low = len(ImageEncoder(quality=55, max_bytes=None).encode_sync(image))
+    # Lowering the quality is enough, so the size is kept
+    encoder = ImageEncoder(quality=85, min_quality=55, max_bytes=(high + low) // 2)
+    data = encoder.encode_sync(image)
+    assert len(data) <= encoder.max_bytes and decode(data).size == (400, 400)
+    # Past the lowest quality, the image is downscaled
+    encoder = ImageEncoder(quality=85, min_quality=55, max_bytes=low // 2)
+    data = encoder.encode_sync(image)
+    assert len(data) <= encoder.max_bytes and decode(data).width < 400
+
+
+def test_formats_without_quality_are_downscaled_at_once():
+    image = make_noise(200, 200)
+    encoder = ImageEncoder(
+        format="png", max_bytes=len(ImageEncoder(format="png", max_bytes=None).encode_sync(image)) // 2
+    )
+    saved = []
+    save = encoder._save
+    encoder._save = lambda image, quality: saved.append(image.size) or save(image, quality)
+    encoder.encode_sync(image)
+    assert len(saved) > 1 and saved[1] != saved[0]
+
+
+def test_impossible_budget_is_logged(caplog):
+    encoder = ImageEncoder(max_bytes=10)
+    with caplog.at_level(logging.WARNING, logger="realtime.utils.image_encoder"):
+        data = encoder.encode_sync(make_noise(200, 200))
+    assert "could not fit" in caplog.text
+    assert min(decode(data).size) <= 64
+
+
+@pytest.mark.asyncio
+async def test_encode_to_url_reports_the_encode():
+    session_tracer = tracing.start_session("image_encoder")
+    encoder = ImageEncoder()
+    url = await encoder.encode_to_url(make_noise(64, 64))
+    encoder.close()
+    prefix = "data:image/jpeg;base64,"
+    assert url.startswith(prefix)
+    assert decode(base64.b64decode(url[len(prefix) :])).format == "JPEG"
+    turn = session_tracer.current_trace
+    assert turn.metric_values[Metric.IMAGE_ENCODE_BYTES] == len(base64.b64decode(url[len(prefix) :]))
+    assert turn.metric_values[Metric.IMAGE_ENCODE_MS] >= 0
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+
+from av import AudioFrame
+
+from realtime.utils.jitter_buffer import AudioJitterBuffer
+
+
+def make_frame(samples=160, sample_rate=16000):
+    frame = AudioFrame(format="s16", layout="mono", samples=samples)
+    frame.sample_rate = sample_rate
+    return frame
+
+
+@pytest.mark.asyncio
+async def test_frames_are_paced_without_drift():
+    loop = asyncio.get_running_loop()
+    buffer = AudioJitterBuffer()
+    for _ in range(30):
+        buffer.put(make_frame(), turn_id=1)
+    buffer.end_turn(1)
+
+    start = loop.time()
+    frames = []
+    while True:
+        frame, turn_id = await buffer.get()
+        if frame is None:
+            break
+        frames.append(frame)
+        # Overshoot of a consumer must be caught up on the next frames
+        await asyncio.sleep(0.002)
+    elapsed = loop.time() - start
+    assert len(frames) == 30 and turn_id == 1
+    assert 0.29 <= elapsed < 0.33
+    assert buffer.underruns == 0 and buffer.depth == pytest.approx(0.0)
+
+
+def test_target_depth_adapts_to_bursts():
+    buffer = AudioJitterBuffer(initial_depth=0.02)
+    # The second 20ms frame arrives 150ms after the first, 130ms later than real time
+    buffer.put(make_frame(320), now=10.0)
+    buffer.put(make_frame(320), now=10.15)
+    assert buffer.target_depth == pytest.approx(0.13)
+    buffer.end_turn()
+    assert buffer.target_depth == pytest.approx(0.13 * buffer.decay)
+
+
+@pytest.mark.asyncio
+async def test_underrun_is_counted():
+    buffer = AudioJitterBuffer(initial_depth=0.02)
+    buffer.put(make_frame(320), turn_id=2)
+    assert (await buffer.get())[1] == 2
+    get = asyncio.create_task(buffer.get())
+    await asyncio.sleep(0.01)
+    assert buffer.underruns == 1 and not get.done()
+    buffer.end_turn(2)
+    assert await asyncio.wait_for(get, 1) == (None, 2)
+
+
+@pytest.mark.asyncio
+async def test_idle_frame_keeps_the_cadence():
+    loop = asyncio.get_running_loop()
+    buffer = AudioJitterBuffer(initial_depth=0.02)
+    silence = make_frame()
+    start = loop.time()
+    for _ in range(3):
+        assert await buffer.get(silence) == (silence, None)
+    buffer.put(make_frame(320), turn_id=3)
+    buffer.end_turn(3)
+    frame, turn_id = await buffer.get(silence)
+    assert frame is not silence and turn_id == 3
+    assert await buffer.get(silence) == (None, 3)
+    assert await buffer.get(silence) == (silence, None)
+    # Three 10ms idle frames and one 20ms frame, played back to back
+    assert 0.05 <= loop.time() - start < 0.07
+    assert buffer.underruns == 0 and buffer.resyncs == 0
+
+
+@pytest.mark.asyncio
+async def test_next_turn_queued_before_playback_starts():
+    buffer = AudioJitterBuffer(initial_depth=0.02)
+    silence = make_frame()
+    buffer.put(make_frame(), turn_id=1)
+    buffer.end_turn(1)
+    buffer.put(make_frame(), turn_id=2)
+    assert (await buffer.get(silence))[1] == 1
+    assert await buffer.get(silence) == (None, 1)
+    frames = [await buffer.get(silence) for _ in range(3)]
+    assert any(frame is not silence and turn_id == 2 for frame, turn_id in frames)
@@ -0,0 +1,60 @@
+import pytest
+
+import numpy as np
+
+from realtime.plugins.vision_plugin import VisionPlugin
+from realtime.utils.key_frames import BlockMeanEngine, DHashEngine, PHashEngine, create_key_frame_engine
+
+
+def scene(seed, shape=(360, 640)):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, size=(9, 16), dtype=np.uint8)
+    return np.kron(small, np.ones((shape[0] // 9 + 1, shape[1] // 16 + 1), dtype=np.uint8))[: shape[0], : shape[1]]
+
+
+def noisy(luma, seed):
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(-4, 5, size=luma.shape)
+    return np.clip(luma.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("engine_cls", [DHashEngine, PHashEngine, BlockMeanEngine])
+def test_sensor_noise_is_not_a_key_frame(engine_cls):
+    engine = engine_cls(min_interval=0.0)
+    base = scene(0)
+    assert engine.is_key_frame(base, now=0.0)
+    for i in range(1, 20):
+        assert not engine.is_key_frame(noisy(base, i), now=float(i))
+
+
+@pytest.mark.parametrize("engine_cls", [DHashEngine, PHashEngine, BlockMeanEngine])
+def test_scene_change_is_detected_once_settled(engine_cls):
+    engine = engine_cls(min_interval=0.0, history_size=2)
+    engine.is_key_frame(scene(0), now=0.0)
+    new_scene = scene(1)
+    results = [engine.is_key_frame(noisy(new_scene, i), now=1.0 + i) for i in range(5)]
+    assert results == [False, False, True, False, False]
+
+
+def test_min_and_max_interval():
+    engine = DHashEngine(min_interval=1.0, max_interval=5.0, history_size=1)
+    engine.is_key_frame(scene(0), now=0.0)
+    assert not engine.is_key_frame(scene(1), now=0.5)
+    assert engine.is_key_frame(scene(1), now=1.5)
+    assert not engine.is_key_frame(scene(1), now=4.0)
+    assert engine.is_key_frame(scene(1), now=7.0)
+
+
+def test_create_key_frame_engine():
+    assert isinstance(create_key_frame_engine("phash", threshold=0.3), PHashEngine)
+    with pytest.raises(ValueError):
+        create_key_frame_engine("unknown")
+
+
+def test_vision_plugin_builds_its_engine():
+    plugin = VisionPlugin(key_frame_engine="phash", key_frame_threshold=0.4, min_interval=0.5, auto_respond=3)
+    engine = plugin._key_frame_engine
+    assert isinstance(engine, PHashEngine)
+    assert (engine.threshold, engine.min_interval, engine.max_interval) == (0.4, 0.5, 6.0)
+    # The first frame only primes the engine
+    assert not plugin._is_key_frame(scene(0))
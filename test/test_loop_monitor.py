@@ -0,0 +1,27 @@
+import asyncio
+import pytest
+import time
+
+from realtime.utils.loop_monitor import LoopMonitor
+
+
+async def blocking_plugin():
+    await asyncio.sleep(0.05)
+    time.sleep(0.2)
+
+
+@pytest.mark.asyncio
+async def test_stall_is_attributed_to_the_blocking_task():
+    monitor = LoopMonitor(interval=0.005, slow_callback_threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.create_task(blocking_plugin())
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+    assert monitor.lag_histogram.count > 5
+    assert monitor.lag_histogram.max >= 0.15
+    assert monitor.stall_counts == {"blocking_plugin": 1}
+    stall = monitor.stalls[0]
+    assert stall.duration >= 0.15
+    assert any("time.sleep(0.2)" in line for line in stall.stack)
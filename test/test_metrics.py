@@ -0,0 +1,45 @@
+import re
+
+from realtime.streams import AudioStream
+from realtime.utils import metrics, tracing
+from realtime.utils.histogram import LatencyHistogram
+
+SAMPLE = re.compile(r'^[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? [0-9.e+-]+$')
+
+
+def test_render_is_valid_openmetrics():
+    histogram = LatencyHistogram()
+    for value in (0.04, 0.2, 0.2, 0.6, 12.0):
+        histogram.record(value)
+    family = metrics.Histogram("test_latency_seconds", "Test.", lambda: {(("stage", "x"),): histogram})
+    lines = family.render()
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in lines if "_bucket" in line]
+    assert buckets == sorted(buckets)
+    assert 'test_latency_seconds_bucket{stage="x",le="0.05"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="x",le="0.25"} 3' in lines
+    assert 'test_latency_seconds_bucket{stage="x",le="+Inf"} 5' in lines
+
+    stream = AudioStream()
+    stream.put_nowait(b"")
+    metrics.dropped_frames.inc(stream="video", reason="test")
+    tracing.register_metric(tracing.Metric.TTS_TOTAL_BYTES, 10)
+    text = metrics.render()
+    assert text.endswith("# EOF\n")
+    for line in text.splitlines():
+        assert line.startswith("#") or SAMPLE.match(line), line
+    assert 'realtime_stream_max_depth{stream="audio"}' in text
+    assert 'realtime_dropped_frames_total{stream="video",reason="test"} 1' in text
+    assert 'realtime_provider_bytes_total{stage="tts"}' in text
+    assert 'realtime_stage_latency_seconds_count{stage="speech_to_speech"}' in text
+
+
+def test_non_finite_values_are_rendered():
+    gauge = metrics.Gauge(
+        "test_gauge",
+        "Test.",
+        lambda: {(("v", "nan"),): float("nan"), (("v", "inf"),): float("inf"), (("v", "ninf"),): -float("inf")},
+    )
+    lines = gauge.render()
+    assert 'test_gauge{v="nan"} NaN' in lines
+    assert 'test_gauge{v="inf"} +Inf' in lines
+    assert 'test_gauge{v="ninf"} -Inf' in lines
@@ -0,0 +1,39 @@
+import pytest
+import threading
+import time
+
+from realtime.utils.profiler import ProfilerBusyError, SamplingProfiler, collapse
+
+
+def busy_loop(stop_event):
+    while not stop_event.is_set():
+        sum(range(1000))
+
+
+def test_profile_collapses_worker_thread_stacks():
+    stop_event = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop_event,), name="worker")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.002, max_overhead=0.5)
+    try:
+        counts = profiler.profile(0.2)
+    finally:
+        stop_event.set()
+        worker.join()
+
+    worker_stacks = [stack for stack in counts if stack.startswith("worker;")]
+    assert worker_stacks and all("busy_loop (test_profiler.py:" in stack for stack in worker_stacks)
+    lines = collapse(counts).splitlines()
+    assert len(lines) == len(counts)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert counts[stack] == int(count) == max(counts.values())
+
+
+def test_one_profile_at_a_time():
+    profiler = SamplingProfiler(interval=0.01)
+    thread = threading.Thread(target=profiler.profile, args=(0.2,))
+    thread.start()
+    time.sleep(0.05)
+    with pytest.raises(ProfilerBusyError):
+        profiler.profile(0.1)
+    thread.join()
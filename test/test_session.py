@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+
+from realtime.plugins.base_plugin import Plugin
+from realtime.session import Session, SessionPool, active_sessions, install_task_factory
+from realtime.utils import tracing
+
+
+class EchoPlugin(Plugin):
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+
+    def run(self):
+        self.task = asyncio.create_task(self.serve())
+        return self.task
+
+    async def serve(self):
+        # Tasks created by session tasks belong to the session too
+        self.child = asyncio.create_task(asyncio.sleep(3600))
+        await asyncio.sleep(3600)
+
+    async def close(self):
+        self.closed = True
+
+
+async def build_pipeline():
+    plugin = EchoPlugin()
+    plugin.run()
+    await asyncio.sleep(0)
+    return plugin
+
+
+@pytest.mark.asyncio
+async def test_closing_a_session_only_stops_its_own_tasks():
+    install_task_factory()
+    first, second = Session(), Session()
+    first_plugin = await first.run(build_pipeline())
+    second_plugin = await second.run(build_pipeline())
+    assert first.plugins == [first_plugin] and first_plugin.task in first.tasks
+    assert first_plugin.child in first.tasks and first.session_id in tracing.sessions
+    assert tracing.get_tracer() is tracing.tracer
+
+    await first.close()
+    assert first_plugin.closed and first_plugin.task.cancelled() and first_plugin.child.cancelled()
+    assert first.session_id not in tracing.sessions and first not in active_sessions
+    assert not second_plugin.closed and not second_plugin.task.done()
+
+    await second.close()
+    assert second_plugin.task.cancelled()
+
+
+class WarmPlugin(Plugin):
+    async def warmup(self):
+        self.warm = True
+
+
+async def build_warm_plugin():
+    return WarmPlugin()
+
+
+@pytest.mark.asyncio
+async def test_pool_hands_out_warm_sessions_and_replaces_idle_ones():
+    install_task_factory()
+    built = []
+
+    async def create_session():
+        session = Session()
+        plugin = await session.run(build_warm_plugin())
+        built.append(session)
+        return session, plugin
+
+    pool = SessionPool(create_session, size=2, idle_timeout=0.2)
+    pool.start()
+    await asyncio.sleep(0.05)
+    assert len(pool) == 2
+    session, plugin = await pool.get()
+    assert plugin.warm and not session.closed
+    await asyncio.sleep(0.05)
+    # The pool is refilled in the background
+    assert len(pool) == 2 and len(built) == 3
+    await asyncio.sleep(0.3)
+    assert built[1].closed and not session.closed and len(built) >= 4
+    await pool.close()
+    assert all(pooled.closed for pooled in built if pooled is not session)
+    await session.close()
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import pytest
+import struct
+
+from realtime.streaming_endpoint.TextRTCDriver import TextRTCDriver
+from realtime.streams import TextStream
+
+
+class FakeChannel:
+    def __init__(self, ready_state="open"):
+        self.readyState = ready_state
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+@pytest.mark.asyncio
+async def test_items_are_batched_and_kept_until_the_channel_opens():
+    output = TextStream()
+    driver = TextRTCDriver(None, output, batch_delay=0.01)
+    task = asyncio.create_task(driver.run_input())
+    for token in ("Hel", "lo", "!"):
+        await output.put(token)
+    await asyncio.sleep(0.05)
+    channel = FakeChannel()
+    driver.add_track(channel)
+    await output.put("Bye")
+    await asyncio.sleep(0.05)
+    task.cancel()
+    assert [json.loads(message) for message in channel.sent] == [["Hel", "lo", "!"], ["Bye"]]
+
+
+def test_binary_framing():
+    driver = TextRTCDriver(None, None, binary=True)
+    assert driver.frame(["ab", "é"]) == struct.pack(">I", 2) + b"ab" + struct.pack(">I", 2) + "é".encode()
+
+
+def test_pending_messages_are_bounded():
+    driver = TextRTCDriver(None, None, max_buffered_bytes=4)
+    driver.add_track(FakeChannel("connecting"))
+    for message in ("aa", "bb", "cc"):
+        driver._send(message)
+    driver._track.readyState = "open"
+    driver._flush()
+    assert driver._track.sent == ["bb", "cc"]
+    # The bound is on UTF-8 bytes, so two characters of two bytes fill it
+    driver = TextRTCDriver(None, None, max_buffered_bytes=4)
+    driver.add_track(FakeChannel("connecting"))
+    for message in ("éé", "ü"):
+        driver._send(message)
+    driver._track.readyState = "open"
+    driver._flush()
+    assert driver._track.sent == ["ü"]
@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+
+from realtime.data import TextData
+from realtime.streams import TextStream
+from realtime.utils import tracing, turns
+from realtime.utils.playout import PlayoutTracker
+from realtime.utils.tracing import Event, Metric
+
+
+async def run_session(session_id, latency):
+    session_tracer = tracing.start_session(session_id)
+
+    async def plugin():
+        for turn in range(2):
+            start = 100.0 * (turn + 1)
+            tracing.register_event(Event.USER_SPEECH_END, start)
+            tracing.register_event(Event.TRANSCRIPTION_RECEIVED, start + latency)
+            tracing.register_event(Event.TTS_START, start + latency)
+            tracing.register_event(Event.TTS_END, start + 2 * latency)
+            tracing.register_event(Event.AUDIO_FIRST_SENT, start + 2 * latency)
+            tracing.register_metric(Metric.TTS_TOTAL_BYTES, 1000)
+            await asyncio.sleep(0)
+
+    await asyncio.create_task(plugin())
+    return session_tracer
+
+
+@pytest.mark.asyncio
+async def test_sessions_trace_separately():
+    a, b = await asyncio.gather(run_session("a", 0.5), run_session("b", 1.0))
+    assert tracing.get_tracer() is tracing.tracer
+    assert len(a.turns) == len(b.turns) == 2
+    assert a.get_avg_stats()["Transcription Latency"] == pytest.approx(0.5)
+    assert b.get_current_stats()["Total Speech to Speech Latency"] == pytest.approx(2.0)
+    assert b.get_current_stats()["TTS Throughput"] == pytest.approx(1000.0)
+    assert tracing.get_process_stats()["Transcription Latency"] == pytest.approx(0.75)
+    percentiles = b.get_latency_percentiles()[tracing.Stage.SPEECH_TO_SPEECH]
+    assert percentiles["count"] == 2 and percentiles["max"] == pytest.approx(2.0)
+    assert tracing.stage_histograms[tracing.Stage.TRANSCRIPTION].count >= 4
+
+    tracing.end_session(a)
+    tracing.end_session(b)
+    assert "a" not in tracing.sessions
+    assert tracing.get_process_stats()["Transcription Latency"] == pytest.approx(0.75)
+
+
+def test_event_log_is_bounded():
+    session_tracer = tracing.Tracer(capacity=8)
+    for turn in range(5):
+        session_tracer.register_event(Event.USER_SPEECH_END, 10.0 * turn + 1)
+        session_tracer.register_event(Event.TRANSCRIPTION_RECEIVED, 10.0 * turn + 1.5)
+        session_tracer.register_metric(Metric.LLM_TOTAL_BYTES, 5)
+    assert len(session_tracer.log) == 8
+    assert session_tracer.log.records()["time_ns"][0] == int(21.5e9)
+    assert [event for _, event in session_tracer.events][-2:] == [Event.USER_SPEECH_END, Event.TRANSCRIPTION_RECEIVED]
+    assert len(session_tracer.log.records(session_tracer.current_trace.start_seq)) == 3
+    assert session_tracer.current_trace.metric_totals[Metric.LLM_TOTAL_BYTES] == 5
+    assert session_tracer.get_avg_stats()["Transcription Latency"] == pytest.approx(0.5)
+
+
+@pytest.mark.asyncio
+async def test_overlapping_turns_follow_stream_items():
+    session_tracer = tracing.Tracer()
+    transcripts = TextStream()
+
+    async def stt():
+        for speech_end in (1.0, 2.0):
+            turns.start_turn()
+            session_tracer.register_event(Event.USER_SPEECH_END, speech_end)
+            session_tracer.register_event(Event.TRANSCRIPTION_RECEIVED, speech_end + 0.5)
+            await transcripts.put(TextData(f"turn at {speech_end}"))
+            transcripts.put_nowait(None)
+
+    async def llm():
+        items = [await transcripts.get() for _ in range(4)]
+        turn_ids = [item.turn_id for item in items if item is not None]
+        # The plain None item of the second turn made it current; it is answered before the first one ends
+        session_tracer.register_event(Event.LLM_START, 3.0)
+        session_tracer.register_event(Event.LLM_END, 3.5)
+        session_tracer.register_event(Event.LLM_START, 2.0, turn_id=turn_ids[0])
+        session_tracer.register_event(Event.LLM_END, 4.0, turn_id=turn_ids[0])
+        return turn_ids, turns.get_turn_id()
+
+    await asyncio.create_task(stt())
+    turn_ids, last_turn_id = await asyncio.create_task(llm())
+    assert turn_ids[0] != turn_ids[1] and last_turn_id == turn_ids[1]
+    first, second = (session_tracer.get_turn(turn_id) for turn_id in turn_ids)
+    assert first.stages[tracing.Stage.LLM_TOTAL] == pytest.approx(2.0)
+    assert second.stages[tracing.Stage.LLM_TOTAL] == pytest.approx(0.5)
+    assert second.stages[tracing.Stage.TRANSCRIPTION] == pytest.approx(0.5)
+    assert set(session_tracer.log.records()["turn_id"]) == set(turn_ids)
+
+
+def test_playout_tracker_records_audio_sent_per_turn():
+    session_tracer = tracing.Tracer()
+    playout = PlayoutTracker(session_tracer)
+    session_tracer.register_event(Event.USER_SPEECH_END, 1.0, turn_id=1)
+    session_tracer.register_event(Event.TTS_TTFB, 1.5, turn_id=1)
+    for turn_id in (1, 2):
+        for _ in range(3):
+            playout.on_queued(0.02, turn_id)
+    playout.on_queued_end()
+    for index in range(6):
+        playout.on_sent(0.02, 1 if index < 3 else 2, 2.0 + index * 0.02)
+    playout.on_sent_end()
+
+    first, second = session_tracer.get_turn(1), session_tracer.get_turn(2)
+    assert first.stages[tracing.Stage.SPEECH_TO_SPEECH] == pytest.approx(1.0)
+    assert first.stages[tracing.Stage.OUTPUT_QUEUE] == pytest.approx(0.5)
+    assert first.event_times[Event.AUDIO_LAST_SENT] == pytest.approx(2.04)
+    assert second.event_times[Event.AUDIO_FIRST_SENT] == pytest.approx(2.06)
+    assert second.event_times[Event.AUDIO_LAST_SENT] == pytest.approx(2.1)
+    assert second.metric_values[Metric.OUTPUT_BUFFER_MS] == pytest.approx(60.0)
+    assert playout.buffered_seconds == pytest.approx(0.0)
+
+
+@pytest.mark.asyncio
+async def test_spans_record_only_when_sampled():
+    @tracing.traced
+    def add(a, b):
+        return a + b
+
+    @tracing.traced("sleep")
+    async def sleep():
+        await asyncio.sleep(0.01)
+
+    tracing.set_span_sample_rate(0.0)
+    with tracing.span("block"):
+        assert add(1, 2) == 3
+    assert "block" not in tracing.span_histograms
+
+    tracing.set_span_sample_rate(1.0)
+    try:
+        with tracing.span("block"):
+            add(1, 2)
+        await sleep()
+    finally:
+        tracing.set_span_sample_rate(0.0)
+    percentiles = tracing.get_span_percentiles()
+    assert percentiles["block"]["count"] == 1
+    assert percentiles[add.__qualname__]["count"] == 1
+    assert percentiles["sleep"]["p50"] >= 0.009
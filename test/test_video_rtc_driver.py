@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+
+from av import VideoFrame
+
+from realtime.streaming_endpoint.VideoRTCDriver import VideoRTCDriver
+from realtime.streams import VideoStream
+from realtime.utils import metrics
+
+
+class FakeTrack:
+    """Delivers a frame every 10ms."""
+
+    def __init__(self, count):
+        self.count = count
+
+    async def recv(self):
+        if not self.count:
+            await asyncio.Future()
+        self.count -= 1
+        await asyncio.sleep(0.01)
+        return VideoFrame(16, 16, "yuv420p")
+
+
+def test_put_latest_replaces_queued_items():
+    stream = VideoStream(latest=True)
+    clone = stream.clone()
+    assert stream.put_latest(1) == 0
+    assert stream.put_latest(2) == 2
+    assert stream.get_nowait() == 2 and clone.get_nowait() == 2
+    assert stream.empty() and clone.latest
+
+
+@pytest.mark.asyncio
+async def test_input_keeps_latest_frame_at_fps():
+    video_input = VideoStream(latest=True, fps=20)
+    driver = VideoRTCDriver(video_input, None)
+    driver.add_track(FakeTrack(20))
+    dropped = metrics.dropped_frames.get(stream="video", reason="fps")
+    task = asyncio.create_task(driver.run_input())
+    await asyncio.sleep(0.35)
+    task.cancel()
+    # One frame in five is sampled, and only the newest one stays queued
+    assert video_input.qsize() == 1
+    assert 14 <= metrics.dropped_frames.get(stream="video", reason="fps") - dropped <= 17
@@ -0,0 +1,82 @@
+import pytest
+
+import numpy as np
+from av import VideoFrame
+
+from realtime.utils.images import convert_yuv420_to_pil
+from realtime.utils.yuv420 import (
+    BOTTOM_LEFT_QUADRANT,
+    RegionOfInterest,
+    crop_yuv420_planes,
+    downscale_luma,
+    luma_change_ratio,
+    yuv420_planes,
+    yuv420_to_rgb,
+)
+
+
+def make_frame(width=64, height=48, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.integers(16, 236, size=(height * 3 // 2, width), dtype=np.uint8)
+    return data, VideoFrame.from_ndarray(data, format="yuv420p")
+
+
+def test_planes_from_frame_match_planes_from_ndarray():
+    data, frame = make_frame()
+    for from_frame, from_array in zip(yuv420_planes(frame), yuv420_planes(data)):
+        np.testing.assert_array_equal(from_frame, from_array)
+
+
+def test_crop_snaps_to_chroma_grid():
+    _, frame = make_frame()
+    y, u, v = crop_yuv420_planes(yuv420_planes(frame), (1, 23, 31, 48))
+    assert y.shape == (26, 32)
+    assert u.shape == v.shape == (13, 16)
+    with pytest.raises(ValueError):
+        crop_yuv420_planes(yuv420_planes(frame), (10, 10, 10, 20))
+
+
+def test_rgb_matches_reference_conversion():
+    _, frame = make_frame()
+    reference = frame.to_ndarray(format="rgb24")
+    rgb = yuv420_to_rgb(yuv420_planes(frame))
+    assert rgb.dtype == np.uint8
+    cropped = yuv420_to_rgb(crop_yuv420_planes(yuv420_planes(frame), (0, 24, 32, 48)))
+    assert cropped.shape == (24, 32, 3)
+    np.testing.assert_array_equal(rgb, reference)
+
+
+def test_luma_helpers():
+    data, frame = make_frame()
+    y = yuv420_planes(frame)[0]
+    assert luma_change_ratio(y, y.copy()) == 0.0
+    assert luma_change_ratio(y, 255 - y) > 0.5
+    assert luma_change_ratio(y, y[:10]) == 1.0
+    small = downscale_luma(y, (8, 6))
+    assert small.shape == (6, 8)
+    assert small.dtype == np.uint8
+    assert abs(int(small.mean()) - int(y.mean())) <= 2
+
+
+def test_convert_yuv420_to_pil_keeps_ycbcr_layout():
+    data, frame = make_frame()
+    image = convert_yuv420_to_pil(frame)
+    assert image.mode == "YCbCr"
+    assert image.size == (64, 48)
+    y, u, _ = yuv420_planes(data)
+    array = np.asarray(image)
+    np.testing.assert_array_equal(array[..., 0], y)
+    np.testing.assert_array_equal(array[::2, ::2, 1], u)
+
+
+def test_region_of_interest():
+    _, frame = make_frame()
+    planes = yuv420_planes(frame)
+    y, u, _ = BOTTOM_LEFT_QUADRANT.crop(planes)
+    assert y.shape == (24, 32) and u.shape == (12, 16)
+    np.testing.assert_array_equal(y, planes[0][24:, :32])
+    assert RegionOfInterest.from_value((8, 8, 24, 24)).resolve(64, 48) == (8, 8, 24, 24)
+    assert RegionOfInterest.from_value((0.0, 0.0, 0.5, 1.0)).resolve(64, 48) == (0, 0, 32, 48)
+    assert RegionOfInterest.from_value(None) is None
+    with pytest.raises(ValueError):
+        RegionOfInterest(0.0, 0.0, 1.5, 1.0)